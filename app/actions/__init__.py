@@ -0,0 +1,27 @@
+"""
+采集状态处理器
+每个业务状态一个异步处理器，CrawlSession把它们注册到状态机驱动完整的采集流程
+"""
+
+from .context import CrawlContext
+from .base import ActionHandler
+from .login_handler import CheckingLoginHandler, LoginWaitHandler
+from .list_handler import ListStateHandler, SearchingHandler, SelectingHandler
+from .detail_handler import DetailStateHandler
+from .crawl_session import CrawlSession, StartHandler, StopHandler, register_handlers, run_crawls
+
+__all__ = [
+    'CrawlContext',
+    'ActionHandler',
+    'CheckingLoginHandler',
+    'LoginWaitHandler',
+    'ListStateHandler',
+    'SearchingHandler',
+    'SelectingHandler',
+    'DetailStateHandler',
+    'CrawlSession',
+    'StartHandler',
+    'StopHandler',
+    'register_handlers',
+    'run_crawls'
+]
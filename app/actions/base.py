@@ -0,0 +1,42 @@
+"""
+状态处理器基类
+事件到目标状态的映射写成类属性；STOP只在转换表允许的状态下直接进入停止状态，
+其余状态记下停止请求，当前步骤完成回到列表状态后再停止
+"""
+
+from typing import Dict, Optional
+
+from core.state_machine import BaseStateHandler
+from core.state_types import BusinessState, Event, EventType
+from .context import CrawlContext
+
+
+class ActionHandler(BaseStateHandler):
+    """绑定采集上下文的状态处理器"""
+
+    # 事件类型 -> 目标状态
+    transitions: Dict[str, BusinessState] = {}
+
+    def __init__(self, context: CrawlContext, event_bus=None):
+        super().__init__(event_bus or context.event_bus)
+        self.context = context
+
+    async def process_event(self, event: Event, current_state: BusinessState) -> Optional[BusinessState]:
+        if event.type == EventType.STOP:
+            self.context.stop_reason = event.data.get("reason") or "stop"
+            if current_state.can_transition_to(BusinessState.STOP):
+                return BusinessState.STOP
+            self.context.stop_requested = True
+            return None
+
+        target = self.transitions.get(event.type)
+        if target is not None:
+            await self.handle(event)
+        return target
+
+    async def handle(self, event: Event):
+        """触发状态转换的事件在转换前的处理（记录关键词、笔记ID等）"""
+        pass
+
+
+__all__ = ['ActionHandler']
@@ -0,0 +1,92 @@
+"""
+采集会话上下文
+一个标签页上一次采集的共享状态：状态机、调度器、待搜索关键词和采集结果，
+由各状态处理器读写
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from ..core.detail_scheduler import DetailScheduler
+from ..core.login_status import DEFAULT_PROFILE
+from ..core.scroll_harvester import HarvestResult
+from ..models.rednote import RedNoteDetail, RedNotePreview
+
+
+class CrawlContext:
+    """采集会话上下文"""
+
+    def __init__(
+        self,
+        tab,
+        keywords: Iterable[str] = (),
+        event_bus=None,
+        note_cache=None,
+        scheduler: Optional[DetailScheduler] = None,
+        selectors=None,
+        target_per_keyword: Optional[int] = 50,
+        max_details: Optional[int] = None,
+        login_timeout: float = 120.0,
+        packet_timeout: float = 8.0,
+        login_status=None,
+        profile: str = DEFAULT_PROFILE,
+        governor=None,
+        name: str = "crawl"
+    ):
+        self.tab = tab
+        self.name = name
+        self.keywords: Deque[str] = deque(keywords)
+        self.event_bus = event_bus
+        self.note_cache = note_cache
+        # 可选的Governor：本会话一个会话桶，同一用户目录的会话共用账号桶
+        self.governor = governor
+        self.scheduler = scheduler or DetailScheduler(
+            keywords=self.keywords,
+            max_per_session=max_details,
+            governor=governor,
+            governor_keys=(f"session:{name}", f"account:{profile}")
+        )
+        # 可选的SelectorRegistry，详情接口没等到时DOM兜底解析用
+        self.selectors = selectors
+        self.target_per_keyword = target_per_keyword
+        self.login_timeout = login_timeout
+        self.packet_timeout = packet_timeout
+        # 可选的LoginStatusService：登录状态走缓存，数据包被动发现失效
+        self.login_status = login_status
+        self.profile = profile
+        # 被动发现登录失效后置位，回到列表状态时转入CHECKING_LOGIN
+        self.login_expired = False
+
+        # 由CrawlSession设置
+        self.state_machine = None
+
+        # 当前正在处理的关键词/笔记
+        self.keyword: Optional[str] = None
+        self.note_id: Optional[str] = None
+
+        self.previews: List[RedNotePreview] = []
+        self.details: List[RedNoteDetail] = []
+        self.harvests: Dict[str, HarvestResult] = {}
+        self.stop_reason = ""
+        # 在不能直接停止的状态收到STOP时置位，回到LIST_STATE/LOGIN_WAIT时停止
+        self.stop_requested = False
+        self.done = asyncio.Event()
+
+    async def emit(self, event_type: str, data: Optional[Dict] = None):
+        """把事件送进本会话的状态机"""
+        await self.state_machine.emit_event(event_type, data)
+
+    async def browser(self, func: Callable, *args) -> Any:
+        """在线程里执行阻塞的浏览器操作，不占用事件循环"""
+        return await asyncio.to_thread(func, *args)
+
+    def log(self, message: str):
+        print(f"[{self.name}] {message}")
+
+    def __repr__(self):
+        return (f"CrawlContext({self.name}, previews={len(self.previews)}, details={len(self.details)}, "
+                f"keywords_left={len(self.keywords)}, stop={self.stop_reason or '-'})")
+
+
+__all__ = ['CrawlContext']
@@ -0,0 +1,115 @@
+"""
+采集会话
+一个标签页 + 一个状态机 + 全部状态处理器：START → CHECKING_LOGIN → LIST_STATE ⇄ SEARCHING / SELECTING → DETAIL_STATE，
+浏览器操作都在线程里执行，多个会话可以在同一个事件循环上并发运行；
+传入login_status时登录检查走缓存，数据包被动发现失效后回到CHECKING_LOGIN，并在后台保活
+"""
+
+import asyncio
+from typing import Iterable, List, Optional
+
+from core.event_bus import EventBus
+from core.state_machine import StateMachine
+from core.state_types import BusinessState, EventType
+from .base import ActionHandler
+from .context import CrawlContext
+from .detail_handler import DetailStateHandler
+from .list_handler import ListStateHandler, SearchingHandler, SelectingHandler
+from .login_handler import CheckingLoginHandler, LoginWaitHandler
+
+
+class StartHandler(ActionHandler):
+    """START：系统初始化完成后检查登录"""
+
+    transitions = {
+        EventType.SYSTEM_INITIALIZED: BusinessState.CHECKING_LOGIN,
+    }
+
+
+class StopHandler(ActionHandler):
+    """STOP：通知会话结束"""
+
+    async def process_event(self, event, current_state):
+        return None
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        self.context.log(f"采集结束: {self.context.stop_reason or 'stop'}")
+        self.context.done.set()
+
+
+def register_handlers(state_machine: StateMachine, context: CrawlContext):
+    """给状态机注册全部采集状态处理器"""
+    handlers = {
+        BusinessState.START: StartHandler(context),
+        BusinessState.CHECKING_LOGIN: CheckingLoginHandler(context),
+        BusinessState.LOGIN_WAIT: LoginWaitHandler(context),
+        BusinessState.LIST_STATE: ListStateHandler(context),
+        BusinessState.SEARCHING: SearchingHandler(context),
+        BusinessState.SELECTING: SelectingHandler(context),
+        BusinessState.DETAIL_STATE: DetailStateHandler(context),
+        BusinessState.STOP: StopHandler(context),
+    }
+    for state, handler in handlers.items():
+        state_machine.register_handler(state, handler)
+
+
+class CrawlSession:
+    """一个标签页上的完整采集流程"""
+
+    def __init__(self, tab, keywords: Iterable[str] = (), event_bus: Optional[EventBus] = None, name: str = "crawl", **options):
+        self.event_bus = event_bus or EventBus(name)
+        self.context = CrawlContext(tab, keywords, event_bus=self.event_bus, name=name, **options)
+        self.state_machine = StateMachine(initial_state=BusinessState.START, event_bus=self.event_bus)
+        self.context.state_machine = self.state_machine
+        register_handlers(self.state_machine, self.context)
+
+        login_status = self.context.login_status
+        if login_status is not None:
+            login_status.bind(tab, self.context.profile)
+            login_status.attach()
+        governor = self.context.governor
+        if governor is not None:
+            governor.bind(tab, name, self.context.profile)
+            governor.attach()
+
+    def _on_login_expired(self, profile: str):
+        # 可能在等待数据包的线程里调用，只置位，由LIST_STATE处理
+        if profile == self.context.profile:
+            self.context.login_expired = True
+
+    @property
+    def state(self) -> BusinessState:
+        return self.state_machine.current_state
+
+    async def run(self, timeout: Optional[float] = None) -> CrawlContext:
+        """运行到STOP（或超时），返回采集上下文"""
+        task = asyncio.create_task(self.state_machine.run())
+        login_status = self.context.login_status
+        keepalive = None
+        if login_status is not None:
+            login_status.add_listener(self._on_login_expired)
+            keepalive = asyncio.create_task(login_status.keepalive(self.context.tab, self.context.profile))
+        try:
+            await self.state_machine.emit_event(EventType.SYSTEM_INITIALIZED)
+            await asyncio.wait_for(self.context.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.context.stop_reason = "timeout"
+        finally:
+            await self.state_machine.stop()
+            task.cancel()
+            if login_status is not None:
+                login_status.remove_listener(self._on_login_expired)
+                keepalive.cancel()
+        return self.context
+
+    async def stop(self, reason: str = "user"):
+        """请求停止，当前步骤完成后进入STOP"""
+        await self.state_machine.emit_event(EventType.STOP, {"reason": reason})
+
+
+async def run_crawls(sessions: Iterable[CrawlSession], timeout: Optional[float] = None) -> List[CrawlContext]:
+    """在同一个事件循环上并发运行多个采集会话"""
+    return await asyncio.gather(*(session.run(timeout) for session in sessions))
+
+
+__all__ = ['CrawlSession', 'StartHandler', 'StopHandler', 'register_handlers', 'run_crawls']
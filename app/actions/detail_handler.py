@@ -0,0 +1,63 @@
+"""
+详情状态处理器
+DETAIL_STATE: 等待本标签页的feed/评论数据包组装详情（没等到时DOM兜底），
+发布DETAIL_LOADED，然后后退并发出BACK_TO_LIST
+"""
+
+from typing import Optional
+
+from core.state_types import BusinessState, EventFactory, EventType
+from ..core.dom_extract import extract_detail
+from ..core.multi_tab_capture import collect_detail
+from ..models.rednote import RedNoteDetail
+from .base import ActionHandler
+
+
+class DetailStateHandler(ActionHandler):
+    """DETAIL_STATE"""
+
+    transitions = {
+        EventType.BACK_TO_LIST: BusinessState.LIST_STATE,
+        EventType.LOGIN_EXPIRED: BusinessState.CHECKING_LOGIN,
+    }
+
+    def __init__(self, context, event_bus=None, dom_fallback: bool = True):
+        super().__init__(context, event_bus)
+        self.dom_fallback = dom_fallback
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        context = self.context
+        note_id = context.note_id
+        try:
+            detail = await self._load(note_id)
+            if detail is not None:
+                context.details.append(detail)
+                context.log(f"笔记 {note_id}: {detail.title[:20]} ({len(detail.comments)} 条评论)")
+                if self.event_bus:
+                    await self.event_bus.publish(EventFactory.detail_loaded(note_id, detail))
+            else:
+                context.log(f"笔记 {note_id} 没有拿到详情数据")
+        except Exception as e:
+            context.log(f"解析笔记 {note_id} 失败: {e}")
+        finally:
+            try:
+                await context.browser(context.tab.back)
+            except Exception as e:
+                context.log(f"返回列表失败: {e}")
+            context.note_id = None
+            await context.emit(EventType.BACK_TO_LIST)
+
+    async def _load(self, note_id: str) -> Optional[RedNoteDetail]:
+        context = self.context
+        detail = await context.browser(
+            collect_detail, context.tab, note_id, context.packet_timeout, RedNoteDetail, context.note_cache
+        )
+        if detail is None and self.dom_fallback:
+            tab = context.tab
+            detail = await context.browser(lambda: extract_detail(tab, note_id, tab.url, context.selectors))
+            if not (detail.title or detail.content):
+                detail = None
+        return detail
+
+
+__all__ = ['DetailStateHandler']
@@ -0,0 +1,117 @@
+"""
+列表相关状态处理器
+LIST_STATE: 决定下一步——有停止请求就停止，登录已失效就重新检查登录，调度器里还有候选笔记就选一篇，否则搜索下一个关键词，都没有时停止
+SEARCHING: 打开搜索页滚动采集，候选笔记交给调度器，完成后发出SEARCH_RESULT
+SELECTING: 打开选中的笔记，进入详情页发出NOTE_CLICKED，否则CANCEL_SELECT
+"""
+
+from typing import Optional
+
+from core.state_types import BusinessState, Event, EventType
+from ..core.browser_wait import wait_for_url
+from ..core.multi_tab_capture import open_detail_page
+from ..core.scroll_harvester import HarvestResult, ScrollHarvester
+from ..core.search_runner import open_search_page
+from .base import ActionHandler
+
+
+class ListStateHandler(ActionHandler):
+    """LIST_STATE"""
+
+    transitions = {
+        EventType.SEARCH: BusinessState.SEARCHING,
+        EventType.NOTE_SELECT: BusinessState.SELECTING,
+        EventType.LOGIN_EXPIRED: BusinessState.CHECKING_LOGIN,
+    }
+
+    async def handle(self, event: Event):
+        if event.type == EventType.SEARCH:
+            self.context.keyword = event.data.get("keyword")
+        elif event.type == EventType.NOTE_SELECT:
+            self.context.note_id = event.data.get("note_id")
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        context = self.context
+        if context.stop_requested:
+            await context.emit(EventType.STOP, {"reason": context.stop_reason})
+            return
+        if context.login_expired:
+            await context.emit(EventType.LOGIN_EXPIRED)
+            return
+        if await context.scheduler.feed(context.state_machine):
+            return
+        if context.keywords:
+            await context.emit(EventType.SEARCH, {"keyword": context.keywords.popleft()})
+            return
+        await context.emit(EventType.STOP, {"reason": "done"})
+
+
+class SearchingHandler(ActionHandler):
+    """SEARCHING"""
+
+    transitions = {
+        EventType.SEARCH_RESULT: BusinessState.LIST_STATE,
+    }
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        context = self.context
+        keyword = context.keyword
+        result = HarvestResult()
+        try:
+            if context.governor is not None:
+                await context.governor.acquire(context.tab)
+            await context.browser(open_search_page, context.tab, keyword)
+            harvester = ScrollHarvester(
+                context.tab,
+                event_bus=context.event_bus,
+                note_cache=context.note_cache,
+                target_count=context.target_per_keyword,
+                governor=context.governor
+            )
+            result = await harvester.harvest(keyword)
+            context.harvests[keyword] = result
+            context.previews.extend(result.previews)
+            queued = context.scheduler.add_many(result.previews, keyword)
+            context.log(f"关键词 {keyword}: {result}, 入队 {queued} 篇")
+        except Exception as e:
+            context.log(f"搜索 {keyword} 失败: {e}")
+        finally:
+            # 失败时也要回到列表状态
+            await context.emit(EventType.SEARCH_RESULT, {
+                "keyword": keyword,
+                "notes": result.previews,
+                "stop_reason": result.stop_reason
+            })
+
+
+class SelectingHandler(ActionHandler):
+    """SELECTING"""
+
+    transitions = {
+        EventType.NOTE_CLICKED: BusinessState.DETAIL_STATE,
+        EventType.CANCEL_SELECT: BusinessState.LIST_STATE,
+    }
+
+    def __init__(self, context, event_bus=None, open_timeout: float = 5.0):
+        super().__init__(context, event_bus)
+        self.open_timeout = open_timeout
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        context = self.context
+        note_id = context.note_id
+        opened = False
+        try:
+            await context.browser(open_detail_page, context.tab, note_id)
+            opened = bool(await context.browser(wait_for_url, context.tab, note_id, self.open_timeout))
+        except Exception as e:
+            context.log(f"打开笔记 {note_id} 失败: {e}")
+
+        if opened:
+            await context.emit(EventType.NOTE_CLICKED, {"note_id": note_id})
+        else:
+            context.log(f"笔记 {note_id} 未进入详情页")
+            context.note_id = None
+            await context.emit(EventType.CANCEL_SELECT)
+
+
+__all__ = ['ListStateHandler', 'SearchingHandler', 'SelectingHandler']
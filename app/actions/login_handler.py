@@ -0,0 +1,110 @@
+"""
+登录相关状态处理器
+CHECKING_LOGIN: 进入时检查登录状态（有LoginStatusService时优先用缓存，不加载页面），发出LOGIN_SUCCESS或LOGIN_REQUIRED
+LOGIN_WAIT: 打开首页后后台轮询Cookie等待扫码，登录后发出LOGIN_SUCCESS，超时发出STOP
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from core.state_types import BusinessState, EventType
+from ..core.browser_pool import LOGIN_COOKIE
+from .base import ActionHandler
+
+
+HOME_URL = 'https://www.xiaohongshu.com/explore'
+
+
+def has_login_cookie(tab) -> bool:
+    """标签页是否带有登录Cookie"""
+    try:
+        cookies = tab.cookies(all_domains=True)
+    except Exception:
+        return False
+    return any(cookie.get('name') == LOGIN_COOKIE for cookie in cookies)
+
+
+def check_login(tab) -> bool:
+    """不在小红书页面时先打开首页，再检查登录Cookie"""
+    if 'xiaohongshu.com' not in (tab.url or ''):
+        tab.get(HOME_URL)
+    return has_login_cookie(tab)
+
+
+class CheckingLoginHandler(ActionHandler):
+    """CHECKING_LOGIN"""
+
+    transitions = {
+        EventType.LOGIN_SUCCESS: BusinessState.LIST_STATE,
+        EventType.LOGIN_REQUIRED: BusinessState.LOGIN_WAIT,
+    }
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        context = self.context
+        context.login_expired = False
+        try:
+            if context.login_status is not None:
+                logged_in = await context.browser(context.login_status.check, context.tab, context.profile)
+            else:
+                logged_in = await context.browser(check_login, context.tab)
+        except Exception as e:
+            context.log(f"检查登录失败: {e}")
+            logged_in = False
+        await context.emit(EventType.LOGIN_SUCCESS if logged_in else EventType.LOGIN_REQUIRED)
+
+
+class LoginWaitHandler(ActionHandler):
+    """LOGIN_WAIT"""
+
+    transitions = {
+        EventType.LOGIN_SUCCESS: BusinessState.LIST_STATE,
+    }
+
+    def __init__(self, context, event_bus=None, poll_interval: float = 2.0):
+        super().__init__(context, event_bus)
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def on_enter_state(self, from_state: Optional[BusinessState] = None):
+        if self.context.stop_requested:
+            await self.context.emit(EventType.STOP, {"reason": self.context.stop_reason})
+            return
+        self.context.log("未登录，请在浏览器中扫码登录...")
+        self._task = asyncio.create_task(self._poll())
+
+    @staticmethod
+    def _open_home(tab):
+        if 'xiaohongshu.com' not in (tab.url or ''):
+            tab.get(HOME_URL)
+
+    def _logged_in(self, tab) -> bool:
+        context = self.context
+        if context.login_status is None:
+            return has_login_cookie(tab)
+        # 被动发现失效时Cookie可能还在，优先用接口确认
+        result = context.login_status.refresh(tab, context.profile)
+        return result if result is not None else context.login_status.check(tab, context.profile, force=True)
+
+    async def on_exit_state(self, to_state: Optional[BusinessState] = None):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _poll(self):
+        context = self.context
+        deadline = time.monotonic() + context.login_timeout
+        try:
+            await context.browser(self._open_home, context.tab)
+        except Exception as e:
+            context.log(f"打开首页失败: {e}")
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            if await context.browser(self._logged_in, context.tab):
+                context.log("登录成功")
+                await context.emit(EventType.LOGIN_SUCCESS)
+                return
+        await context.emit(EventType.STOP, {"reason": "login_timeout"})
+
+
+__all__ = ['CheckingLoginHandler', 'LoginWaitHandler', 'check_login', 'has_login_cookie', 'HOME_URL']
@@ -0,0 +1,39 @@
+"""
+采集业务核心组件
+"""
+
+from .detail_scheduler import DetailScheduler, ScoreContext, default_score
+from .multi_tab_capture import MultiTabDetailCapture, TabSlot
+from .browser_pool import BrowserPool, BrowserInstance, TabLease
+from .scroll_harvester import ScrollHarvester, HarvestResult, StopReason
+from .search_runner import SearchBatchRunner, load_keywords
+from .dom_extract import DomExtractor, DomField, extract_detail, extract_note_cards
+from .selector_registry import SelectorRegistry, SelectorStats
+from .login_status import LoginStatusService, LoginState
+from .governor import Governor, AimdBucket
+
+__all__ = [
+    'DetailScheduler',
+    'ScoreContext',
+    'default_score',
+    'MultiTabDetailCapture',
+    'TabSlot',
+    'BrowserPool',
+    'BrowserInstance',
+    'TabLease',
+    'ScrollHarvester',
+    'HarvestResult',
+    'StopReason',
+    'SearchBatchRunner',
+    'load_keywords',
+    'DomExtractor',
+    'DomField',
+    'extract_detail',
+    'extract_note_cards',
+    'SelectorRegistry',
+    'SelectorStats',
+    'LoginStatusService',
+    'LoginState',
+    'Governor',
+    'AimdBucket'
+]
@@ -0,0 +1,337 @@
+"""
+浏览器实例池
+管理多个端口/用户目录的Chromium实例：健康检查、按页数回收重启、向会话出租标签页
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+
+XHS_HOME = 'https://www.xiaohongshu.com/'
+LOGIN_COOKIE = 'web_session'
+
+
+class HealthReport:
+    """实例健康状况"""
+
+    __slots__ = ('responsive', 'memory_mb', 'logged_in', 'checked_at')
+
+    def __init__(self, responsive: bool, memory_mb: float = 0.0, logged_in: bool = False):
+        self.responsive = responsive
+        self.memory_mb = memory_mb
+        self.logged_in = logged_in
+        self.checked_at = time.time()
+
+    def __repr__(self):
+        return f"HealthReport(responsive={self.responsive}, memory={self.memory_mb:.0f}MB, logged_in={self.logged_in})"
+
+
+class BrowserInstance:
+    """一个Chromium实例（固定端口 + 用户目录）"""
+
+    def __init__(self, port: int, profile_dir: Optional[str] = None, launcher: Optional[Callable] = None):
+        self.port = port
+        self.profile_dir = profile_dir
+        self._launcher = launcher
+        self.browser = None
+        self.pages_served = 0
+        self.active_leases = 0
+        self.started_at = 0.0
+        self.last_health: Optional[HealthReport] = None
+        self.restarts = 0
+        # 正在池锁外重启，期间不出租、不重复重启
+        self.restarting = False
+
+    @property
+    def name(self) -> str:
+        return f"chromium:{self.port}"
+
+    def launch(self):
+        """连接或启动浏览器（已有同端口浏览器时直接接管，保留登录状态）"""
+        if self._launcher:
+            self.browser = self._launcher(self.port, self.profile_dir)
+        else:
+            from DrissionPage import Chromium, ChromiumOptions
+            options = ChromiumOptions().set_local_port(self.port)
+            if self.profile_dir:
+                options.set_user_data_path(self.profile_dir)
+            self.browser = Chromium(options)
+        self.pages_served = 0
+        self.started_at = time.time()
+
+    def close(self):
+        """关闭浏览器"""
+        if self.browser is None:
+            return
+        try:
+            self.browser.quit()
+        except Exception as e:
+            print(f"关闭浏览器 {self.name} 失败: {e}")
+        self.browser = None
+
+    def restart(self):
+        """重启浏览器释放内存"""
+        self.close()
+        self.launch()
+        self.restarts += 1
+
+    def check_health(self) -> HealthReport:
+        """检查响应、JS内存占用和登录状态"""
+        if self.browser is None:
+            self.last_health = HealthReport(False)
+            return self.last_health
+
+        try:
+            tab = self.browser.latest_tab
+            responsive = tab.run_js('return 1;', timeout=5) == 1
+        except Exception:
+            self.last_health = HealthReport(False)
+            return self.last_health
+
+        memory_mb = 0.0
+        try:
+            for tab_id in self.browser.tab_ids:
+                used = self.browser.get_tab(tab_id).run_js(
+                    'return performance.memory ? performance.memory.usedJSHeapSize : 0;', timeout=3
+                )
+                memory_mb += (used or 0) / 1024 / 1024
+        except Exception:
+            pass
+
+        logged_in = False
+        try:
+            cookies = tab.cookies(all_domains=True)
+            logged_in = any(cookie.get('name') == LOGIN_COOKIE for cookie in cookies)
+        except Exception:
+            pass
+
+        self.last_health = HealthReport(responsive, memory_mb, logged_in)
+        return self.last_health
+
+
+class TabLease:
+    """租借给会话的标签页，用完后归还"""
+
+    def __init__(self, pool: 'BrowserPool', instance: BrowserInstance, tab):
+        self.pool = pool
+        self.instance = instance
+        self.tab = tab
+        self.pages = 0
+        self.released = False
+
+    def record_page(self, count: int = 1):
+        """记录打开的页面数，用于触发回收"""
+        self.pages += count
+
+    def release(self):
+        """归还标签页"""
+        self.pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class BrowserPool:
+    """浏览器池：实例健康检查、按页数回收、出租标签页"""
+
+    def __init__(
+        self,
+        ports: Sequence[int] = (9933,),
+        profile_dirs: Optional[Sequence[Optional[str]]] = None,
+        tabs_per_browser: int = 3,
+        max_pages: int = 300,
+        max_memory_mb: float = 1536,
+        health_interval: float = 60.0,
+        launcher: Optional[Callable] = None
+    ):
+        profile_dirs = list(profile_dirs) if profile_dirs else [None] * len(ports)
+        self.instances: List[BrowserInstance] = [
+            BrowserInstance(port, profile, launcher) for port, profile in zip(ports, profile_dirs)
+        ]
+        self.tabs_per_browser = tabs_per_browser
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.health_interval = health_interval
+        self._condition = threading.Condition()
+        self._started = False
+
+    def start(self):
+        """启动所有实例并做一次健康检查"""
+        with self._condition:
+            if self._started:
+                return
+            for instance in self.instances:
+                instance.launch()
+                instance.check_health()
+            self._started = True
+
+    def close(self):
+        """关闭所有实例"""
+        with self._condition:
+            for instance in self.instances:
+                instance.close()
+            self._started = False
+            self._condition.notify_all()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def lease(self, timeout: Optional[float] = None, require_login: bool = False) -> Optional[TabLease]:
+        """租借一个标签页，优先选择负载最低的健康实例；超时返回None"""
+        if not self._started:
+            self.start()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            stale = None
+            with self._condition:
+                instance = self._pick_instance(require_login)
+                if instance is not None:
+                    instance.active_leases += 1
+                else:
+                    # 没有可出租的实例时，先把空闲的待回收实例重启
+                    stale = self._claim_stale_instance()
+                    if stale is None:
+                        remaining = self._remaining(deadline)
+                        if remaining is not None and remaining <= 0:
+                            return None
+                        self._condition.wait(remaining)
+                        continue
+
+            if stale is not None:
+                self._restart_claimed(stale, f"回收浏览器 {stale.name}: 已服务 {stale.pages_served} 页")
+                continue
+
+            try:
+                tab = instance.browser.new_tab(XHS_HOME)
+            except Exception as e:
+                print(f"实例 {instance.name} 打开标签页失败: {e}")
+                with self._condition:
+                    instance.active_leases -= 1
+                    instance.last_health = HealthReport(False)
+                    self._condition.notify_all()
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    return None
+                continue
+
+            return TabLease(self, instance, tab)
+
+    async def lease_async(self, timeout: Optional[float] = None, require_login: bool = False) -> Optional[TabLease]:
+        """异步租借标签页"""
+        return await asyncio.to_thread(self.lease, timeout, require_login)
+
+    def release(self, lease: TabLease):
+        """归还标签页，实例空闲且达到回收条件时重启"""
+        if lease.released:
+            return
+        lease.released = True
+
+        try:
+            lease.tab.close()
+        except Exception:
+            pass
+
+        instance = lease.instance
+        with self._condition:
+            instance.active_leases -= 1
+            instance.pages_served += lease.pages
+            claimed = self._needs_restart(instance) and self._claim(instance)
+            self._condition.notify_all()
+        if claimed:
+            self._restart_claimed(instance, f"回收浏览器 {instance.name}: 已服务 {instance.pages_served} 页")
+
+    def health_check(self) -> List[HealthReport]:
+        """检查所有实例，失去响应的空闲实例直接重启；检查和重启都在池锁外进行"""
+        reports = []
+        for instance in self.instances:
+            with self._condition:
+                restarting = instance.restarting
+            if restarting:
+                reports.append(instance.last_health or HealthReport(False))
+                continue
+            report = instance.check_health()
+            if not report.responsive:
+                with self._condition:
+                    claimed = self._claim(instance)
+                if claimed:
+                    report = self._restart_claimed(instance, f"浏览器 {instance.name} 无响应，重启")
+            reports.append(report)
+        with self._condition:
+            self._condition.notify_all()
+        return reports
+
+    async def run_health_checks(self):
+        """后台定期健康检查"""
+        while self._started:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.to_thread(self.health_check)
+
+    def _pick_instance(self, require_login: bool) -> Optional[BrowserInstance]:
+        candidates = []
+        for instance in self.instances:
+            health = instance.last_health
+            if instance.browser is None or (health is not None and not health.responsive):
+                continue
+            if require_login and not (health and health.logged_in):
+                continue
+            if instance.active_leases >= self.tabs_per_browser:
+                continue
+            # 待回收的实例不再出租：有租约时等归还后重启，空闲时由lease()先重启
+            if instance.restarting or self._needs_restart(instance):
+                continue
+            candidates.append(instance)
+        if not candidates:
+            return None
+        return min(candidates, key=lambda inst: (inst.active_leases, inst.pages_served))
+
+    def _claim_stale_instance(self) -> Optional[BrowserInstance]:
+        """认领一个空闲的待回收实例，调用方持有池锁"""
+        for instance in self.instances:
+            if instance.browser is not None and self._needs_restart(instance) and self._claim(instance):
+                return instance
+        return None
+
+    @staticmethod
+    def _claim(instance: BrowserInstance) -> bool:
+        """实例空闲且没有在重启时标记为重启中，调用方持有池锁"""
+        if instance.restarting or instance.active_leases > 0:
+            return False
+        instance.restarting = True
+        return True
+
+    def _restart_claimed(self, instance: BrowserInstance, reason: str) -> HealthReport:
+        """在池锁外重启已认领的实例，完成后唤醒等待的租借者"""
+        print(reason)
+        try:
+            instance.restart()
+            report = instance.check_health()
+        except Exception as e:
+            print(f"重启浏览器 {instance.name} 失败: {e}")
+            report = instance.last_health = HealthReport(False)
+        with self._condition:
+            instance.restarting = False
+            self._condition.notify_all()
+        return report
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _needs_restart(self, instance: BrowserInstance) -> bool:
+        if instance.pages_served >= self.max_pages:
+            return True
+        health = instance.last_health
+        return health is not None and health.memory_mb > self.max_memory_mb
+
+
+__all__ = ['BrowserPool', 'BrowserInstance', 'TabLease', 'HealthReport']
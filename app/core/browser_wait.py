@@ -0,0 +1,172 @@
+"""
+浏览器就绪等待
+条件一满足就立即返回，代替固定的 time.sleep；每次等待都有超时并记录实际等待时长
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from ..utils.packet_body import PacketBody
+
+
+# 数据包观察者：wait_for_packets收到的每个数据包（包括被丢弃的）都会调用 observer(tab, packet)，
+# 用于登录状态、限速等旁路统计；在等待所在的线程里调用，不能阻塞
+_packet_observers: List[Callable[[Any, Any], None]] = []
+
+
+def add_packet_observer(observer: Callable[[Any, Any], None]):
+    if observer not in _packet_observers:
+        _packet_observers.append(observer)
+
+
+def remove_packet_observer(observer: Callable[[Any, Any], None]):
+    if observer in _packet_observers:
+        _packet_observers.remove(observer)
+
+
+def _notify_observers(tab, packet):
+    for observer in list(_packet_observers):
+        try:
+            observer(tab, packet)
+        except Exception as e:
+            print(f"数据包观察者 {getattr(observer, '__name__', observer)} 错误: {e}")
+
+
+class WaitResult:
+    """等待结果：是否满足条件、实际等待秒数、条件返回的值"""
+
+    __slots__ = ('ok', 'waited', 'value', 'condition')
+
+    def __init__(self, ok: bool, waited: float, value: Any = None, condition: str = ""):
+        self.ok = ok
+        self.waited = waited
+        self.value = value
+        self.condition = condition
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self):
+        status = '✅' if self.ok else '⌛'
+        return f"WaitResult({status} {self.condition}, {self.waited:.2f}s)"
+
+
+def wait_until(condition: Callable[[], Any], timeout: float = 10.0, interval: float = 0.1, name: str = "") -> WaitResult:
+    """轮询条件直到返回真值或超时"""
+    start = time.monotonic()
+    deadline = start + timeout
+    while True:
+        try:
+            value = condition()
+        except Exception:
+            value = None
+        if value:
+            return WaitResult(True, time.monotonic() - start, value, name)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return WaitResult(False, time.monotonic() - start, None, name)
+        time.sleep(min(interval, remaining))
+
+
+def wait_for_packets(
+    tab,
+    url_parts: Union[str, Iterable[str]],
+    timeout: float = 10.0,
+    predicate: Optional[Callable[[str, Any], bool]] = None
+) -> WaitResult:
+    """等待监听器收到每个url片段对应的数据包，value为 {url片段: 数据包}
+
+    需要先调用 tab.listen.start()；predicate(url片段, 数据包) 返回False的数据包会被丢弃，
+    超时时value里只包含已经到达的部分
+    """
+    parts = [url_parts] if isinstance(url_parts, str) else list(url_parts)
+    matched: Dict[str, Any] = {}
+    start = time.monotonic()
+    deadline = start + timeout
+
+    while len(matched) < len(parts):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        packet = tab.listen.wait(timeout=remaining)
+        if not packet:
+            break
+        if _packet_observers:
+            _notify_observers(tab, packet)
+
+        url = getattr(packet, 'url', '')
+        for part in parts:
+            if part not in matched and part in url and (predicate is None or predicate(part, packet)):
+                matched[part] = packet
+                break
+
+    name = '数据包 ' + ','.join(parts)
+    return WaitResult(len(matched) == len(parts), time.monotonic() - start, matched, name)
+
+
+def wait_for_packet(tab, url_part: str, timeout: float = 10.0, predicate: Optional[Callable[[Any], bool]] = None) -> WaitResult:
+    """等待某个API数据包到达，value为数据包"""
+    check = (lambda _, packet: predicate(packet)) if predicate else None
+    result = wait_for_packets(tab, url_part, timeout, check)
+    result.value = result.value.get(url_part)
+    return result
+
+
+def wait_for_json_packet(tab, url_part: str, timeout: float = 10.0) -> WaitResult:
+    """等待API数据包并返回其PacketBody"""
+    result = wait_for_packet(tab, url_part, timeout)
+    if result.value is not None:
+        result.value = PacketBody.from_packet(result.value)
+    return result
+
+
+def wait_for_selector(tab, selector: str, timeout: float = 10.0, displayed: bool = False) -> WaitResult:
+    """等待元素出现，value为元素"""
+    start = time.monotonic()
+    element = None
+    try:
+        # DrissionPage在timeout内持续查找，找到即返回
+        element = tab.ele(selector, timeout=timeout)
+    except Exception:
+        element = None
+
+    if element and displayed:
+        remaining = max(0.0, timeout - (time.monotonic() - start))
+        try:
+            if not element.wait.displayed(timeout=remaining, raise_err=False):
+                element = None
+        except Exception:
+            element = None
+
+    return WaitResult(bool(element), time.monotonic() - start, element or None, f"元素 {selector}")
+
+
+def wait_for_url(tab, contains: str, timeout: float = 10.0, interval: float = 0.1) -> WaitResult:
+    """等待URL包含指定片段，value为当前URL"""
+    return wait_until(lambda: tab.url if contains in (tab.url or '') else None, timeout, interval, f"URL包含 {contains}")
+
+
+def wait_for_url_change(tab, old_url: str, timeout: float = 10.0, interval: float = 0.1) -> WaitResult:
+    """等待URL发生变化，value为新URL"""
+    return wait_until(lambda: tab.url if tab.url and tab.url != old_url else None, timeout, interval, "URL变化")
+
+
+def wait_for_url_leave(tab, fragment: str, timeout: float = 10.0, interval: float = 0.1) -> WaitResult:
+    """等待URL不再包含指定片段（例如离开详情页），value为当前URL"""
+    return wait_until(lambda: tab.url if fragment not in (tab.url or '') else None, timeout, interval, f"离开 {fragment}")
+
+
+__all__ = [
+    'WaitResult',
+    'add_packet_observer',
+    'remove_packet_observer',
+    'wait_until',
+    'wait_for_packets',
+    'wait_for_packet',
+    'wait_for_json_packet',
+    'wait_for_selector',
+    'wait_for_url',
+    'wait_for_url_change',
+    'wait_for_url_leave',
+]
@@ -0,0 +1,247 @@
+"""
+详情访问调度器
+按可插拔的评分函数给候选笔记排序，在会话/小时预算内把最值得看的笔记
+作为NOTE_SELECT事件送进状态机
+"""
+
+import heapq
+import itertools
+import math
+import re
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.state_types import EventType
+from ..models.rednote import RedNotePreview
+
+
+class ScoreContext:
+    """评分上下文"""
+
+    def __init__(self, keywords: Iterable[str] = (), visited: Optional[Set[str]] = None, now: Optional[float] = None):
+        self.keywords = [kw.lower() for kw in keywords if kw]
+        self.visited = visited if visited is not None else set()
+        self.now = time.time() if now is None else now
+
+
+ScoreFunc = Callable[[RedNotePreview, ScoreContext], float]
+
+# 搜索结果角标里的发布时间："刚刚"、"5分钟前"、"3小时前"、"2天前"、"昨天 12:30"、"05-12"、"2023-05-12"，详情接口为毫秒时间戳
+_RELATIVE_TIME = re.compile(r'(\d+)\s*(分钟|小时|天)前')
+_RELATIVE_UNITS = {'分钟': 60, '小时': 3600, '天': 86400}
+_DATE_TIME = re.compile(r'(?:(\d{4})-)?(\d{1,2})-(\d{1,2})')
+
+
+def publish_timestamp(text: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """把发布时间文本解析成时间戳，无法识别时返回None"""
+    if not text:
+        return None
+    text = text.strip()
+    now = time.time() if now is None else now
+    if text.isdigit():
+        value = float(text)
+        return value / 1000 if value > 1e11 else value
+    if text.startswith('刚刚'):
+        return now
+    match = _RELATIVE_TIME.search(text)
+    if match:
+        return now - int(match.group(1)) * _RELATIVE_UNITS[match.group(2)]
+    if text.startswith('今天'):
+        return now
+    if text.startswith('昨天'):
+        return now - 86400
+    if text.startswith('前天'):
+        return now - 2 * 86400
+    match = _DATE_TIME.search(text)
+    if match:
+        year, month, day = match.groups()
+        today = datetime.fromtimestamp(now)
+        try:
+            published = datetime(int(year) if year else today.year, int(month), int(day))
+        except ValueError:
+            return None
+        if not year and published > today:
+            # 不带年份的日期是今年的，晚于今天说明是去年
+            published = published.replace(year=today.year - 1)
+        return published.timestamp()
+    return None
+
+
+def default_score(preview: RedNotePreview, context: ScoreContext) -> float:
+    """默认评分：互动量 + 发布时间新鲜度 + 关键词命中"""
+    interaction = preview.interaction
+    engagement = math.log1p(
+        interaction.like_count
+        + 2 * interaction.collect_count
+        + 3 * interaction.comment_count
+        + 3 * interaction.share_count
+    )
+
+    # 发布时间未知的笔记不加分
+    published = publish_timestamp(preview.publish_time, context.now)
+    recency = 0.0
+    if published is not None:
+        age_days = max(0.0, context.now - published) / 86400
+        recency = 1.0 / (1.0 + age_days / 7)
+
+    title = preview.title.lower()
+    keyword_match = 1.0 if any(kw in title for kw in context.keywords) else 0.0
+
+    return engagement + 2.0 * recency + 3.0 * keyword_match
+
+
+class DetailScheduler:
+    """候选笔记优先队列 + 访问预算"""
+
+    def __init__(
+        self,
+        score_func: ScoreFunc = default_score,
+        keywords: Iterable[str] = (),
+        max_per_session: Optional[int] = None,
+        max_per_hour: Optional[int] = None,
+        duplicate_index=None,
+        governor=None,
+        governor_keys: Optional[Iterable[str]] = None
+    ):
+        self.score_func = score_func
+        self.keywords = list(keywords)
+        self.max_per_session = max_per_session
+        self.max_per_hour = max_per_hour
+        # 可选的app.data.near_duplicate.NearDuplicateIndex，与已有笔记重复的候选不入队
+        self.duplicate_index = duplicate_index
+        self.skipped_duplicates = 0
+        # 可选的app.core.governor.Governor：feed()送出下一条笔记前按这些桶限速
+        self.governor = governor
+        self.governor_keys = list(governor_keys) if governor_keys is not None else None
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._candidates: Dict[str, Tuple[RedNotePreview, float]] = {}
+        self._visited: Set[str] = set()
+        self._visit_times: Deque[float] = deque()
+        self.session_visits = 0
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self._candidates
+
+    @property
+    def visited(self) -> Set[str]:
+        """已访问过的笔记ID"""
+        return self._visited
+
+    def add(self, preview: RedNotePreview, keyword: Optional[str] = None) -> Optional[float]:
+        """加入候选笔记，已访问或与已有笔记重复的笔记不再入队，返回评分"""
+        if not preview.note_id or preview.note_id in self._visited:
+            return None
+        if self.duplicate_index is not None:
+            match = self.duplicate_index.find(preview)
+            if match is not None:
+                self.skipped_duplicates += 1
+                print(f"跳过笔记 {preview.note_id}: 与 {match.note_id} 重复 ({match.reason}, 相似度{match.similarity:.2f})")
+                return None
+
+        keywords = self.keywords + [keyword] if keyword else self.keywords
+        score = self.score_func(preview, ScoreContext(keywords, self._visited))
+
+        # 同一笔记重复入队时只保留最新评分，旧堆条目在弹出时跳过
+        self._candidates[preview.note_id] = (preview, score)
+        heapq.heappush(self._heap, (-score, next(self._counter), preview.note_id))
+        return score
+
+    def add_many(self, previews: Iterable[RedNotePreview], keyword: Optional[str] = None) -> int:
+        """批量加入候选笔记，返回入队数量"""
+        return sum(1 for preview in previews if self.add(preview, keyword) is not None)
+
+    def mark_visited(self, note_id: str, visit_time: Optional[float] = None):
+        """记录一次详情访问，计入预算"""
+        self._visited.add(note_id)
+        self._candidates.pop(note_id, None)
+        self._visit_times.append(time.time() if visit_time is None else visit_time)
+        self.session_visits += 1
+
+    def budget_remaining(self, now: Optional[float] = None) -> Optional[int]:
+        """剩余可访问次数，无限制时返回None"""
+        self._trim_window(now)
+        limits = []
+        if self.max_per_session is not None:
+            limits.append(self.max_per_session - self.session_visits)
+        if self.max_per_hour is not None:
+            limits.append(self.max_per_hour - len(self._visit_times))
+        return max(0, min(limits)) if limits else None
+
+    def next_available_in(self, now: Optional[float] = None) -> Optional[float]:
+        """距离下一次允许访问的秒数，会话预算耗尽时返回None"""
+        now = time.time() if now is None else now
+        if self.max_per_session is not None and self.session_visits >= self.max_per_session:
+            return None
+        self._trim_window(now)
+        if self.max_per_hour is not None and len(self._visit_times) >= self.max_per_hour:
+            return self._visit_times[0] + 3600 - now
+        return 0.0
+
+    def peek(self) -> Optional[RedNotePreview]:
+        """查看评分最高的候选笔记"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return self._candidates[self._heap[0][2]][0]
+
+    def pop(self, now: Optional[float] = None) -> Optional[RedNotePreview]:
+        """取出评分最高的候选笔记，预算耗尽或队列为空时返回None"""
+        if self.budget_remaining(now) == 0:
+            return None
+
+        self._drop_stale()
+        if not self._heap:
+            return None
+
+        _, _, note_id = heapq.heappop(self._heap)
+        preview, _ = self._candidates.pop(note_id)
+        return preview
+
+    async def feed(self, state_machine) -> Optional[str]:
+        """把下一条笔记作为NOTE_SELECT事件送进状态机，返回笔记ID"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+
+        if self.governor is not None and self.budget_remaining() != 0:
+            await self.governor.acquire(keys=self.governor_keys)
+            self._drop_stale()
+            if not self._heap:
+                return None
+
+        score = -self._heap[0][0]
+        preview = self.pop()
+        if preview is None:
+            return None
+
+        self.mark_visited(preview.note_id)
+        await state_machine.emit_event(EventType.NOTE_SELECT, {
+            "note_id": preview.note_id,
+            "score": score,
+            "title": preview.title
+        })
+        return preview.note_id
+
+    def _drop_stale(self):
+        """跳过已被重新评分或已访问的堆条目"""
+        while self._heap:
+            neg_score, _, note_id = self._heap[0]
+            candidate = self._candidates.get(note_id)
+            if candidate is not None and candidate[1] == -neg_score:
+                return
+            heapq.heappop(self._heap)
+
+    def _trim_window(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        while self._visit_times and now - self._visit_times[0] >= 3600:
+            self._visit_times.popleft()
+
+
+__all__ = ['DetailScheduler', 'ScoreContext', 'ScoreFunc', 'default_score', 'publish_timestamp']
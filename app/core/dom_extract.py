@@ -0,0 +1,241 @@
+"""
+批量DOM提取
+一次注入的JS脚本按候选选择器依次查找所有字段，结果作为一个JSON返回，代替每个选择器一次
+DrissionPage往返+超时；候选顺序和命中统计来自SelectorRegistry
+"""
+
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..models.rednote import RedNoteDetail, RedNoteInteraction, RedNoteMedia, _parse_count
+from ..utils import json_codec
+from .selector_registry import SelectorRegistry, default_registry
+
+
+PAGE_DETAIL = 'detail'
+PAGE_LIST = 'list'
+
+# 取值方式
+MODE_FIRST = 'first'    # 第一个有值的元素
+MODE_ALL = 'all'        # 第一个命中选择器下的全部元素，按元素位置对齐（不可见/无值为null）
+MODE_MERGE = 'merge'    # 所有选择器的全部值，去重
+
+
+class DomField(NamedTuple):
+    """一个字段的候选选择器和取值方式
+
+    attr为空时取元素文本；inner不为空时先在元素内部查找该选择器再取值（元素本身匹配时用元素本身）
+    """
+    name: str
+    selectors: Tuple[str, ...]
+    mode: str = MODE_FIRST
+    attr: str = ''
+    inner: str = ''
+    visible: bool = False
+    limit: int = 0
+
+
+DETAIL_FIELDS: Tuple[DomField, ...] = (
+    DomField('title', ('.note-title', '.note-detail-title', 'h1', '.title')),
+    DomField('author_name', ('.author-name', '.user-name', '.username', '.user-info .name')),
+    DomField('content', ('.note-content .content', '.desc-text', '.note-text .content-text', '[data-testid="note-content"]')),
+    DomField('images', ('.note-content img', '.image-item img', '.photo img'), MODE_MERGE, attr='src'),
+    DomField('videos', ('.video video',), MODE_MERGE, attr='src'),
+    DomField('like_count', ('.like-count', '.liked-count', '[data-testid="like-count"]')),
+    DomField('comment_count', ('.comment-count', '[data-testid="comment-count"]')),
+    DomField('collect_count', ('.collect-count', '[data-testid="collect-count"]')),
+)
+
+# 没有卡片容器时退回到直接找笔记链接，只取前MAX_LINKS个
+NOTE_LINK_SELECTOR = 'a[href*="/explore/"]'
+MAX_LINKS = 10
+
+LIST_FIELDS: Tuple[DomField, ...] = (
+    DomField(
+        'cards',
+        (
+            '.note-item',
+            '.note-card',
+            '.feeds-container .note-item',
+            '.note-list .note',
+            '[data-testid="note-item"]',
+            '.feed-item',
+            '.explore-feed .note',
+            NOTE_LINK_SELECTOR,
+        ),
+        MODE_ALL,
+        attr='href',
+        inner=NOTE_LINK_SELECTOR,
+        visible=True,
+    ),
+)
+
+
+# arguments[0]: {"fields": [{name, selectors(已按偏好排序), mode, attr, inner, visible, limit}]}
+# 返回JSON字符串：{字段名: {"selector": 命中的选择器, "value": 值} 或 null}
+_EXTRACT_JS = r"""
+const spec = JSON.parse(arguments[0]);
+const isVisible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+const read = (el, field) => {
+    let target = el;
+    if (field.inner && !el.matches(field.inner)) {
+        target = el.querySelector(field.inner);
+        if (!target) return '';
+    }
+    if (field.attr) return target.getAttribute(field.attr) || target[field.attr] || '';
+    return (target.innerText || target.textContent || '').trim();
+};
+const query = (selector) => {
+    try { return Array.from(document.querySelectorAll(selector)); } catch (e) { return []; }
+};
+const result = {};
+for (const field of spec.fields) {
+    let found = null;
+    if (field.mode === 'merge') {
+        const values = [];
+        let hit = null;
+        for (const selector of field.selectors) {
+            for (const el of query(selector)) {
+                if (field.visible && !isVisible(el)) continue;
+                const value = read(el, field);
+                if (value && !values.includes(value)) {
+                    values.push(value);
+                    if (hit === null) hit = selector;
+                }
+            }
+        }
+        if (values.length) found = {selector: hit, value: values};
+    } else {
+        for (const selector of field.selectors) {
+            let elements = query(selector);
+            if (field.limit) elements = elements.slice(0, field.limit);
+            if (field.mode === 'all') {
+                const values = elements.map((el) => (field.visible && !isVisible(el)) ? null : (read(el, field) || null));
+                if (values.some((value) => value !== null)) { found = {selector: selector, value: values}; break; }
+            } else {
+                for (const el of elements) {
+                    if (field.visible && !isVisible(el)) continue;
+                    const value = read(el, field);
+                    if (value) { found = {selector: selector, value: value}; break; }
+                }
+                if (found) break;
+            }
+        }
+    }
+    result[field.name] = found;
+}
+return JSON.stringify(result);
+"""
+
+
+class DomExtractor:
+    """一次JS调用提取一种页面的全部字段"""
+
+    def __init__(self, page_type: str, fields: Sequence[DomField], registry: Optional[SelectorRegistry] = None):
+        self.page_type = page_type
+        self.fields = tuple(fields)
+        self.registry = registry if registry is not None else default_registry
+        # 最近一次提取中每个字段的尝试顺序和命中的选择器
+        self.orders: Dict[str, List[str]] = {}
+        self.matched: Dict[str, Optional[str]] = {}
+
+    def _spec(self) -> str:
+        fields = []
+        self.orders = {}
+        for field in self.fields:
+            spec = field._asdict()
+            if field.mode != MODE_MERGE:
+                spec['selectors'] = self.orders[field.name] = self.registry.order(self.page_type, field.name, field.selectors)
+            fields.append(spec)
+        return json_codec.dumps_str({"fields": fields})
+
+    def extract(self, tab) -> Dict[str, Any]:
+        """执行一次提取，返回 {字段名: 值}，没找到的字段为None"""
+        spec = self._spec()
+        start = time.monotonic()
+        try:
+            raw = tab.run_js(_EXTRACT_JS, spec)
+        except Exception as e:
+            print(f"DOM批量提取失败: {str(e)}")
+            return self.parse(None, record=False)
+        return self.parse(raw, time.monotonic() - start)
+
+    def parse(self, raw, elapsed: float = 0.0, record: bool = True) -> Dict[str, Any]:
+        """解析JS返回值（JSON字符串或已转换的dict）并记录选择器命中情况"""
+        data = raw
+        if isinstance(raw, (str, bytes)):
+            try:
+                data = json_codec.loads(raw)
+            except json_codec.DECODE_ERRORS:
+                data = None
+        if not isinstance(data, dict):
+            data = {}
+
+        values: Dict[str, Any] = {}
+        self.matched = {}
+        for field in self.fields:
+            found = data.get(field.name)
+            selector = found.get('selector') if isinstance(found, dict) else None
+            values[field.name] = found.get('value') if selector else None
+            self.matched[field.name] = selector
+            if record and field.mode != MODE_MERGE:
+                tried = self.orders.get(field.name) or field.selectors
+                self.registry.record_batch(self.page_type, field.name, tried, selector, elapsed)
+        return values
+
+
+def extract_detail(tab, note_id: str, url: str = '', registry: Optional[SelectorRegistry] = None) -> RedNoteDetail:
+    """用一次JS调用从详情页DOM解析笔记"""
+    values = DomExtractor(PAGE_DETAIL, DETAIL_FIELDS, registry).extract(tab)
+
+    media_list = [
+        RedNoteMedia(url=src, media_type='image', width=None, height=None) for src in values['images'] or []
+    ]
+    media_list.extend(
+        RedNoteMedia(url=src, media_type='video', width=None, height=None) for src in values['videos'] or []
+    )
+
+    return RedNoteDetail(
+        note_id=note_id,
+        url=url,
+        title=values['title'] or '',
+        author_name=values['author_name'] or '',
+        content=values['content'] or '',
+        media_list=media_list,
+        interaction=RedNoteInteraction(
+            like_count=_parse_count(values['like_count']),
+            comment_count=_parse_count(values['comment_count']),
+            collect_count=_parse_count(values['collect_count'])
+        ),
+        publish_time=None,
+        last_update_time=None,
+        location=None
+    )
+
+
+def extract_note_cards(tab, registry: Optional[SelectorRegistry] = None) -> Tuple[Optional[str], List[Tuple[int, str]]]:
+    """用一次JS调用找出列表页的可见笔记卡片，返回 (命中的选择器, [(元素位置, 链接)])
+
+    元素位置是 document.querySelectorAll(命中的选择器) 的下标，按CSS取元素才能对上：
+    tab.eles(f'css:{selector}')（DrissionPage不会把不带前缀的字符串当成CSS选择器）
+    """
+    extractor = DomExtractor(PAGE_LIST, LIST_FIELDS, registry)
+    hrefs = extractor.extract(tab)['cards'] or []
+    selector = extractor.matched.get('cards')
+    if selector == NOTE_LINK_SELECTOR:
+        hrefs = hrefs[:MAX_LINKS]
+    cards = [(position, href) for position, href in enumerate(hrefs) if href]
+    return selector, cards
+
+
+__all__ = [
+    'DomField',
+    'DomExtractor',
+    'DETAIL_FIELDS',
+    'LIST_FIELDS',
+    'PAGE_DETAIL',
+    'PAGE_LIST',
+    'NOTE_LINK_SELECTOR',
+    'extract_detail',
+    'extract_note_cards',
+]
@@ -0,0 +1,281 @@
+"""
+自适应限速
+按会话和账号各维护一个令牌桶，请求前从所有相关的桶里取令牌；
+桶的速率按AIMD调整：接口正常返回时加性提升，出现限流状态码/风控code、5xx或响应明显变慢时乘性下降，
+触发风控时整个桶暂停一段时间。信号来自 wait_for_packets 捕获到的 edith.xiaohongshu.com 数据包
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..utils.packet_body import PacketBody
+from .browser_wait import add_packet_observer, remove_packet_observer
+from .login_status import API_HOST, EXPIRED_CODES
+
+
+# 限流/风控：HTTP状态码和业务code（访问频次异常、IP风险、浏览器环境异常）
+THROTTLE_STATUS = frozenset({429, 461, 471})
+THROTTLE_CODES = frozenset({300012, 300013, 300015})
+
+SIGNAL_OK = 'ok'
+SIGNAL_ERROR = 'error'        # 5xx、未知失败：只降速
+SIGNAL_THROTTLE = 'throttle'  # 限流/风控：降速并暂停
+SIGNAL_SLOW = 'slow'          # 响应明显变慢：只降速
+
+DEFAULT_ACCOUNT = 'default'
+
+
+def classify_response(status: Optional[int], data: Any) -> Optional[str]:
+    """把接口响应归类为限速信号，登录失效等与限速无关的返回None"""
+    if status in THROTTLE_STATUS:
+        return SIGNAL_THROTTLE
+    if status is not None and status >= 500:
+        return SIGNAL_ERROR
+    if not isinstance(data, dict):
+        return None
+    code = data.get('code')
+    if code in THROTTLE_CODES:
+        return SIGNAL_THROTTLE
+    if code in EXPIRED_CODES:
+        return None
+    if data.get('success') is True or code == 0:
+        return SIGNAL_OK
+    if data.get('success') is False:
+        return SIGNAL_ERROR
+    return None
+
+
+class AimdBucket:
+    """速率按AIMD调整的令牌桶"""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: float = 3.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        cooldown: float = 5.0
+    ):
+        self.name = name
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        # 每秒速率对应的一轮成功后提升increase（约每秒提升increase）
+        self.increase = increase
+        self.decrease = decrease
+        # 两次降速之间的最短间隔，同一波失败只降一次
+        self.cooldown = cooldown
+
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = float('-inf')
+        self.latency_ema: Optional[float] = None
+        self.successes = 0
+        self.errors = 0
+        self.throttles = 0
+
+    def _refill(self, now: float):
+        # 暂停期间updated在未来，令牌从暂停结束时才开始累积
+        if now <= self.updated:
+            return
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now: Optional[float] = None) -> float:
+        """预定一个令牌，返回需要等待的秒数；暂停期间排队的请求在暂停结束后按速率错开"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= 1
+        deficit = -self.tokens if self.tokens < 0 else 0.0
+        return max(self.paused_until, now) - now + deficit / self.rate
+
+    def on_success(self):
+        self.successes += 1
+        self.rate = min(self.max_rate, self.rate + self.increase / max(self.rate, 1.0))
+
+    def on_congestion(self, pause: float = 0.0, now: Optional[float] = None) -> bool:
+        """乘性降速（冷却期内只降一次），pause>0时暂停；返回是否降速"""
+        now = time.monotonic() if now is None else now
+        decreased = now - self.last_decrease >= self.cooldown
+        if decreased:
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            self.last_decrease = now
+        if pause > 0:
+            # 暂停期间不累积令牌，暂停结束时从空桶开始
+            self.paused_until = max(self.paused_until, now + pause)
+            self.updated = self.paused_until
+            self.tokens = 0.0
+        return decreased
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rate": round(self.rate, 3),
+            "successes": self.successes,
+            "errors": self.errors,
+            "throttles": self.throttles,
+            "paused": max(0.0, self.paused_until - time.monotonic()),
+        }
+
+    def __repr__(self):
+        return f"AimdBucket({self.name}, {self.rate:.2f}/s, ok={self.successes}, throttled={self.throttles})"
+
+
+class Governor:
+    """会话 + 账号两级的自适应限速器"""
+
+    def __init__(
+        self,
+        session_rate: float = 0.5,
+        account_rate: float = 1.0,
+        min_rate: float = 0.05,
+        max_session_rate: float = 3.0,
+        max_account_rate: float = 6.0,
+        burst: float = 3.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        cooldown: float = 5.0,
+        throttle_pause: float = 60.0,
+        slow_factor: float = 3.0
+    ):
+        self.session_rate = session_rate
+        self.account_rate = account_rate
+        self.min_rate = min_rate
+        self.max_session_rate = max_session_rate
+        self.max_account_rate = max_account_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        # 触发风控后整个桶暂停的秒数
+        self.throttle_pause = throttle_pause
+        # 响应耗时超过平均值的倍数视为变慢
+        self.slow_factor = slow_factor
+
+        self._buckets: Dict[str, AimdBucket] = {}
+        self._tab_keys: Dict[int, Tuple[str, ...]] = {}
+        # 数据包观察者在等待线程里调用
+        self._lock = threading.Lock()
+
+    # ---------- 桶 ----------
+
+    def bucket(self, key: str) -> AimdBucket:
+        """按键取桶，session:* 和 account:* 使用各自的默认速率"""
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if key.startswith('account:'):
+                rate, max_rate = self.account_rate, self.max_account_rate
+            else:
+                rate, max_rate = self.session_rate, self.max_session_rate
+            bucket = self._buckets[key] = AimdBucket(
+                key, rate, self.min_rate, max_rate, self.burst, self.increase, self.decrease, self.cooldown
+            )
+        return bucket
+
+    def bind(self, tab, session: str, account: str = DEFAULT_ACCOUNT):
+        """登记标签页所属的会话和账号"""
+        self._tab_keys[id(tab)] = (f"session:{session}", f"account:{account}")
+
+    def unbind(self, tab):
+        self._tab_keys.pop(id(tab), None)
+
+    def keys_for(self, tab) -> Tuple[str, ...]:
+        return self._tab_keys.get(id(tab), (f"account:{DEFAULT_ACCOUNT}",))
+
+    # ---------- 取令牌 ----------
+
+    def reserve(self, keys: Iterable[str]) -> float:
+        """从所有桶各预定一个令牌，返回需要等待的秒数"""
+        now = time.monotonic()
+        with self._lock:
+            return max((self.bucket(key).reserve(now) for key in keys), default=0.0)
+
+    async def acquire(self, tab=None, keys: Optional[Iterable[str]] = None) -> float:
+        """请求前调用：等待标签页（或指定键）对应的所有桶放行，返回等待的秒数"""
+        wait = self.reserve(keys if keys is not None else self.keys_for(tab))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    # ---------- 信号 ----------
+
+    def record(self, keys: Iterable[str], signal: str):
+        """把一个信号应用到所有相关的桶"""
+        with self._lock:
+            for key in keys:
+                bucket = self.bucket(key)
+                if signal == SIGNAL_OK:
+                    bucket.on_success()
+                elif signal == SIGNAL_THROTTLE:
+                    bucket.throttles += 1
+                    if bucket.on_congestion(self.throttle_pause):
+                        print(f"限速 {key}: 触发风控，降到 {bucket.rate:.2f}/s 并暂停 {self.throttle_pause:.0f}s")
+                elif signal == SIGNAL_SLOW:
+                    bucket.on_congestion()
+                else:
+                    bucket.errors += 1
+                    bucket.on_congestion()
+
+    def observe_packet(self, tab, packet) -> Optional[str]:
+        """检查一个捕获到的API数据包，返回信号"""
+        if API_HOST not in (getattr(packet, 'url', '') or ''):
+            return None
+        status = getattr(getattr(packet, 'response', None), 'status', None)
+        data = PacketBody.from_packet(packet).json() if status is None or status < 400 else None
+        signal = classify_response(status, data)
+        if signal is not None:
+            self.record(self.keys_for(tab), signal)
+        return signal
+
+    def observe_latency(self, tab, seconds: float) -> bool:
+        """记录一次请求耗时，明显慢于平均值时按变慢降速；返回是否判定为变慢"""
+        keys = self.keys_for(tab)
+        slow = False
+        with self._lock:
+            for key in keys:
+                bucket = self.bucket(key)
+                ema = bucket.latency_ema
+                if ema is not None and ema > 0 and seconds > self.slow_factor * ema:
+                    slow = True
+                bucket.latency_ema = seconds if ema is None else 0.8 * ema + 0.2 * seconds
+        if slow:
+            self.record(keys, SIGNAL_SLOW)
+        return slow
+
+    def attach(self):
+        """开始观察所有 wait_for_packets 收到的数据包"""
+        add_packet_observer(self.observe_packet)
+
+    def detach(self):
+        remove_packet_observer(self.observe_packet)
+
+    # ---------- 查询 ----------
+
+    def rate(self, tab=None, keys: Optional[Iterable[str]] = None) -> float:
+        """标签页当前的有效速率（各桶中最小的）"""
+        keys = keys if keys is not None else self.keys_for(tab)
+        return min((self.bucket(key).rate for key in keys), default=0.0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {key: bucket.to_dict() for key, bucket in self._buckets.items()}
+
+
+__all__ = [
+    'Governor',
+    'AimdBucket',
+    'classify_response',
+    'SIGNAL_OK',
+    'SIGNAL_ERROR',
+    'SIGNAL_THROTTLE',
+    'SIGNAL_SLOW',
+    'THROTTLE_STATUS',
+    'THROTTLE_CODES',
+]
@@ -0,0 +1,342 @@
+"""
+登录状态服务
+按浏览器用户目录缓存由Cookie得出的登录状态（带过期时间，可落盘跨运行保留），
+从捕获到的API数据包被动发现登录失效（HTTP 401 / code -100），后台定期在页面内请求接口保活；
+状态机只有在缓存过期或被动发现失效时才需要真正检查登录
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from ..utils import json_codec
+from ..utils.packet_body import PacketBody
+from .browser_pool import LOGIN_COOKIE
+from .browser_wait import add_packet_observer, remove_packet_observer
+
+
+API_HOST = 'edith.xiaohongshu.com'
+# 登录失效时接口返回的业务code和HTTP状态码
+EXPIRED_CODES = frozenset({-100, -101})
+EXPIRED_STATUS = frozenset({401})
+
+DEFAULT_PROFILE = 'default'
+
+# 页面内保活请求：带Cookie请求当前用户接口，返回HTTP状态和业务code
+_KEEPALIVE_JS = r"""
+return fetch('https://edith.xiaohongshu.com/api/sns/web/v2/user/me', {credentials: 'include'})
+    .then((response) => response.json().then((data) => JSON.stringify({status: response.status, code: data.code, success: data.success}))
+        .catch(() => JSON.stringify({status: response.status})))
+    .catch((e) => JSON.stringify({error: String(e)}));
+"""
+
+
+class LoginState:
+    """一个用户目录的登录状态"""
+
+    __slots__ = ('profile', 'logged_in', 'checked_at', 'expires_at', 'source')
+
+    def __init__(self, profile: str, logged_in: bool, checked_at: float, expires_at: Optional[float] = None, source: str = 'cookie'):
+        self.profile = profile
+        self.logged_in = logged_in
+        self.checked_at = checked_at
+        # 登录Cookie的过期时间，会话Cookie为None
+        self.expires_at = expires_at
+        self.source = source
+
+    def is_fresh(self, ttl: float, now: Optional[float] = None) -> bool:
+        """缓存是否仍然可信：未超过ttl，且登录Cookie未过期"""
+        now = time.time() if now is None else now
+        if now - self.checked_at > ttl:
+            return False
+        return not (self.logged_in and self.expires_at is not None and now >= self.expires_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "logged_in": self.logged_in,
+            "checked_at": self.checked_at,
+            "expires_at": self.expires_at,
+            "source": self.source,
+        }
+
+    def __repr__(self):
+        status = '已登录' if self.logged_in else '未登录'
+        return f"LoginState({self.profile}, {status}, {self.source})"
+
+
+def login_cookie_expiry(cookies: List[Dict]) -> Optional[float]:
+    """登录Cookie的过期时间；没有登录Cookie时返回0，会话Cookie返回None"""
+    for cookie in cookies:
+        if cookie.get('name') == LOGIN_COOKIE and cookie.get('value', True):
+            expires = cookie.get('expires', cookie.get('expiry'))
+            try:
+                expires = float(expires)
+            except (TypeError, ValueError):
+                return None
+            return expires if expires > 0 else None
+    return 0
+
+
+def response_login_status(status: Optional[int], data: Any) -> Optional[bool]:
+    """从接口响应判断登录状态：失效返回False，成功返回True，无法判断返回None"""
+    if status in EXPIRED_STATUS:
+        return False
+    if isinstance(data, dict):
+        if data.get('code') in EXPIRED_CODES:
+            return False
+        if data.get('success') is True or data.get('code') == 0:
+            return True
+    return None
+
+
+class LoginStatusService:
+    """登录状态缓存 + 被动失效检测 + 后台保活"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 1800.0,
+        keepalive_interval: float = 600.0,
+        expiry_margin: float = 3600.0
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.keepalive_interval = keepalive_interval
+        # 登录Cookie剩余时间少于该值时保活请求后重新读取Cookie
+        self.expiry_margin = expiry_margin
+
+        self._states: Dict[str, LoginState] = {}
+        self._tab_profiles: Dict[int, str] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        # 数据包观察者在等待线程里调用
+        self._lock = threading.Lock()
+        # 串行化落盘：快照、写临时文件和替换在同一把锁里完成
+        self._save_lock = threading.Lock()
+        # 有还没落盘的状态变化（被动检测时不写盘，留给下一次检查或保活）
+        self._dirty = False
+        self.checks = 0
+        self.cache_hits = 0
+        if path:
+            self.load()
+
+    # ---------- 状态 ----------
+
+    def get(self, profile: str = DEFAULT_PROFILE) -> Optional[LoginState]:
+        return self._states.get(profile)
+
+    def cached(self, profile: str = DEFAULT_PROFILE) -> Optional[bool]:
+        """缓存中仍然可信的登录状态，没有或已过期时返回None"""
+        state = self._states.get(profile)
+        if state is None or not state.is_fresh(self.ttl):
+            return None
+        return state.logged_in
+
+    def set(
+        self,
+        profile: str,
+        logged_in: bool,
+        expires_at: Optional[float] = None,
+        source: str = 'cookie',
+        persist: bool = True
+    ) -> LoginState:
+        """更新登录状态；persist为False时只标记待落盘"""
+        with self._lock:
+            state = self._states[profile] = LoginState(profile, logged_in, time.time(), expires_at, source)
+            self._dirty = True
+        if persist:
+            self.flush()
+        return state
+
+    def mark_expired(self, profile: str = DEFAULT_PROFILE, source: str = 'packet', persist: bool = True):
+        """标记登录失效，之前认为已登录（或未知）时通知监听者；先通知再落盘，写盘失败不影响通知"""
+        previous = self._states.get(profile)
+        self.set(profile, False, None, source, persist=False)
+        if previous is None or previous.logged_in:
+            self._notify_expired(profile)
+        if persist:
+            self.flush()
+
+    def update_from_cookies(self, profile: str, cookies: List[Dict]) -> LoginState:
+        expiry = login_cookie_expiry(cookies)
+        logged_in = expiry != 0 and (expiry is None or expiry > time.time())
+        return self.set(profile, logged_in, expiry or None, 'cookie')
+
+    # ---------- 检查 ----------
+
+    def bind(self, tab, profile: str = DEFAULT_PROFILE):
+        """登记标签页所属的用户目录，被动检测时按标签页找到用户目录"""
+        self._tab_profiles[id(tab)] = profile
+
+    def unbind(self, tab):
+        self._tab_profiles.pop(id(tab), None)
+
+    def profile_of(self, tab) -> str:
+        return self._tab_profiles.get(id(tab), DEFAULT_PROFILE)
+
+    def check(self, tab, profile: Optional[str] = None, force: bool = False) -> bool:
+        """检查登录状态：缓存可信时直接返回，否则读取Cookie（不加载页面）"""
+        profile = profile or self.profile_of(tab)
+        if not force:
+            cached = self.cached(profile)
+            if cached is not None:
+                self.cache_hits += 1
+                # 被动检测到的失效在这里落盘
+                self.flush()
+                return cached
+
+        self.checks += 1
+        try:
+            cookies = tab.cookies(all_domains=True)
+        except Exception as e:
+            print(f"读取Cookie失败: {e}")
+            return False
+        return self.update_from_cookies(profile, cookies).logged_in
+
+    # ---------- 被动检测 ----------
+
+    def observe_packet(self, tab, packet) -> Optional[bool]:
+        """检查一个捕获到的API数据包，登录失效时更新状态并通知监听者"""
+        if API_HOST not in (getattr(packet, 'url', '') or ''):
+            return None
+        response = getattr(packet, 'response', None)
+        status = getattr(response, 'status', None)
+        data = PacketBody.from_packet(packet).json() if status not in EXPIRED_STATUS else None
+        result = response_login_status(status, data)
+
+        profile = self.profile_of(tab)
+        if result is False:
+            state = self._states.get(profile)
+            if state is None or state.logged_in:
+                code = data.get('code') if isinstance(data, dict) else None
+                print(f"用户目录 {profile} 登录已失效 (HTTP {status}, code {code})")
+                # 观察者在等待线程里调用，不在这里写盘
+                self.mark_expired(profile, persist=False)
+        elif result is True:
+            state = self._states.get(profile)
+            if state is not None and state.logged_in:
+                # 接口正常返回，顺便延长缓存
+                state.checked_at = time.time()
+        return result
+
+    def attach(self):
+        """开始观察所有 wait_for_packets 收到的数据包"""
+        add_packet_observer(self.observe_packet)
+
+    def detach(self):
+        remove_packet_observer(self.observe_packet)
+
+    def add_listener(self, listener: Callable[[str], None]):
+        """登录失效时调用 listener(profile)，可能在等待线程里调用"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify_expired(self, profile: str):
+        for listener in list(self._listeners):
+            try:
+                listener(profile)
+            except Exception as e:
+                print(f"登录失效监听者错误: {e}")
+
+    # ---------- 保活 ----------
+
+    def refresh(self, tab, profile: Optional[str] = None) -> Optional[bool]:
+        """在页面内请求一次用户接口保持会话，按结果更新状态；Cookie快过期时重新读取"""
+        profile = profile or self.profile_of(tab)
+        try:
+            raw = tab.run_js(_KEEPALIVE_JS, timeout=10)
+            result = json_codec.loads(raw) if isinstance(raw, (str, bytes)) else raw
+        except Exception as e:
+            print(f"登录保活请求失败: {e}")
+            return None
+        if not isinstance(result, dict) or 'error' in result:
+            return None
+
+        logged_in = response_login_status(result.get('status'), result)
+        state = self._states.get(profile)
+        if logged_in is False:
+            self.mark_expired(profile, 'keepalive')
+        elif logged_in is True:
+            expiring = state is None or (state.expires_at is not None and state.expires_at - time.time() < self.expiry_margin)
+            if expiring or not state.logged_in:
+                self.check(tab, profile, force=True)
+            else:
+                state.checked_at = time.time()
+        return logged_in
+
+    async def keepalive(self, tab, profile: Optional[str] = None):
+        """后台定期保活，直到任务被取消"""
+        profile = profile or self.profile_of(tab)
+        while True:
+            await asyncio.sleep(self.keepalive_interval)
+            state = self._states.get(profile)
+            if state is not None and not state.logged_in:
+                continue
+            await asyncio.to_thread(self.refresh, tab, profile)
+
+    # ---------- 持久化 ----------
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                data = json_codec.load(f)
+        except (OSError,) + json_codec.DECODE_ERRORS as e:
+            print(f"读取登录状态失败: {e}")
+            return False
+        for profile, values in (data.get("profiles") or {}).items():
+            self._states[profile] = LoginState(
+                profile, bool(values.get("logged_in")), float(values.get("checked_at", 0)),
+                values.get("expires_at"), values.get("source", 'cookie')
+            )
+        return True
+
+    def flush(self) -> bool:
+        """有未落盘的状态变化时写盘，返回是否写入"""
+        if not self.path or not self._dirty:
+            return False
+        return self.save()
+
+    def save(self, path: Optional[str] = None) -> bool:
+        path = path or self.path
+        if not path:
+            return False
+        directory = os.path.dirname(os.path.abspath(path))
+        with self._save_lock:
+            with self._lock:
+                data = {"profiles": {profile: state.to_dict() for profile, state in self._states.items()}}
+                self._dirty = False
+            tmp_path = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                # 每次写独立的临时文件，再原子替换
+                fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+                with os.fdopen(fd, 'wb') as f:
+                    json_codec.dump(data, f)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"保存登录状态失败: {e}")
+                self._dirty = True
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+        return True
+
+
+__all__ = [
+    'LoginStatusService',
+    'LoginState',
+    'login_cookie_expiry',
+    'response_login_status',
+    'API_HOST',
+    'EXPIRED_CODES',
+    'EXPIRED_STATUS',
+    'DEFAULT_PROFILE',
+]
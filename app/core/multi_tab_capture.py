@@ -0,0 +1,229 @@
+"""
+多标签页并发详情捕获
+同一个浏览器里开N个标签页直接打开 /explore/<note_id>，每个标签页有自己的监听器，
+数据包天然按标签页路由到对应笔记；每个标签页是一个 LIST_STATE → SELECTING → DETAIL_STATE
+的子状态机，用完后回收复用
+"""
+
+import asyncio
+from typing import Iterable, List, Optional, Union
+
+from core.state_types import BusinessState, EventFactory
+from ..models.rednote import RedNoteDetail, RedNotePreview
+from ..models.lazy_detail import LazyRedNoteDetail
+from ..utils.packet_body import PacketBody
+from ..utils.id_extract import url_has_note_id
+from .browser_wait import wait_for_packets
+
+
+DETAIL_URL = 'https://www.xiaohongshu.com/explore/{note_id}'
+FEED_API = '/api/sns/web/v1/feed'
+COMMENT_API = '/api/sns/web/v2/comment/page'
+
+
+class TabSlot:
+    """标签页槽位：单个标签页的子状态机"""
+
+    def __init__(self, index: int, tab):
+        self.index = index
+        self.tab = tab
+        self.state = BusinessState.LIST_STATE
+        self.note_id: Optional[str] = None
+        self.uses = 0
+
+    def transition(self, new_state: BusinessState):
+        """按业务状态转换规则切换子状态"""
+        if not self.state.can_transition_to(new_state):
+            raise RuntimeError(f"标签页{self.index}: 不能从 {self.state.display_name} 转换到 {new_state.display_name}")
+        self.state = new_state
+
+    def __repr__(self):
+        return f"TabSlot({self.index}, {self.state.short_name}, note={self.note_id})"
+
+
+class MultiTabDetailCapture:
+    """标签页池，并发捕获笔记详情"""
+
+    def __init__(
+        self,
+        browser,
+        size: int = 3,
+        max_uses: int = 30,
+        packet_timeout: float = 8.0,
+        event_bus=None,
+        note_cache=None,
+        lazy_details: bool = False,
+        governor=None,
+        account: str = 'default'
+    ):
+        self.browser = browser
+        self.size = size
+        self.max_uses = max_uses
+        self.packet_timeout = packet_timeout
+        self.event_bus = event_bus
+        self.note_cache = note_cache
+        # 为True时返回LazyRedNoteDetail，字段在下游第一次访问时才解析
+        self.detail_cls = LazyRedNoteDetail if lazy_details else RedNoteDetail
+        self.slots: List[TabSlot] = []
+        # 可选的自适应限速器：每个标签页一个会话桶，共用账号桶
+        self.governor = governor
+        self.account = account
+
+    async def start(self):
+        """打开标签页并启动各自的网络监听"""
+        for index in range(len(self.slots), self.size):
+            tab = await asyncio.to_thread(self._open_tab)
+            self.slots.append(TabSlot(index, tab))
+            self._bind(index, tab)
+
+    async def close(self):
+        """关闭所有标签页"""
+        for slot in self.slots:
+            await asyncio.to_thread(self._close_tab, slot.tab)
+        self.slots.clear()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def capture(self, notes: Iterable[Union[str, RedNotePreview]]) -> List[RedNoteDetail]:
+        """并发捕获一批笔记详情，按完成顺序返回成功的结果"""
+        if not self.slots:
+            await self.start()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for note in notes:
+            queue.put_nowait(note.note_id if isinstance(note, RedNotePreview) else note)
+
+        results: List[RedNoteDetail] = []
+        workers = [asyncio.create_task(self._worker(slot, queue, results)) for slot in self.slots]
+        await asyncio.gather(*workers)
+        return results
+
+    async def _worker(self, slot: TabSlot, queue: asyncio.Queue, results: List[RedNoteDetail]):
+        while True:
+            try:
+                note_id = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                detail = await self._capture_one(slot, note_id)
+                if detail:
+                    results.append(detail)
+                    if self.event_bus:
+                        await self.event_bus.publish(EventFactory.detail_loaded(note_id, detail))
+            except Exception as e:
+                print(f"标签页{slot.index} 捕获笔记 {note_id} 失败: {e}")
+                slot.state = BusinessState.LIST_STATE
+            finally:
+                # 失败也算一次使用，反复失败的标签页同样会被回收
+                slot.note_id = None
+                slot.uses += 1
+
+            await self._recycle(slot)
+
+    async def _capture_one(self, slot: TabSlot, note_id: str) -> Optional[RedNoteDetail]:
+        """在指定标签页中打开笔记并收集数据包"""
+        slot.note_id = note_id
+        slot.transition(BusinessState.SELECTING)
+        if self.governor is not None:
+            await self.governor.acquire(slot.tab)
+        await asyncio.to_thread(self._navigate, slot.tab, note_id)
+
+        slot.transition(BusinessState.DETAIL_STATE)
+        detail = await asyncio.to_thread(self._collect, slot.tab, note_id)
+
+        slot.transition(BusinessState.LIST_STATE)
+        return detail
+
+    async def _recycle(self, slot: TabSlot):
+        """标签页用满次数后关闭重开，控制内存增长"""
+        if slot.uses < self.max_uses:
+            return
+        await asyncio.to_thread(self._close_tab, slot.tab)
+        if self.governor is not None:
+            self.governor.unbind(slot.tab)
+        slot.tab = await asyncio.to_thread(self._open_tab)
+        self._bind(slot.index, slot.tab)
+        slot.uses = 0
+
+    def _bind(self, index: int, tab):
+        if self.governor is not None:
+            self.governor.attach()
+            self.governor.bind(tab, f"detail{index}", self.account)
+
+    def _open_tab(self):
+        tab = self.browser.new_tab()
+        tab.listen.start([FEED_API, COMMENT_API])
+        return tab
+
+    @staticmethod
+    def _close_tab(tab):
+        try:
+            tab.listen.stop()
+            tab.close()
+        except Exception as e:
+            print(f"关闭标签页失败: {e}")
+
+    @staticmethod
+    def _navigate(tab, note_id: str):
+        open_detail_page(tab, note_id, listen=False)
+
+    def _collect(self, tab, note_id: str) -> Optional[RedNoteDetail]:
+        return collect_detail(tab, note_id, self.packet_timeout, self.detail_cls, self.note_cache)
+
+
+def open_detail_page(tab, note_id: str, listen: bool = True):
+    """打开笔记详情页；listen为True时先把监听目标切换到feed/评论接口"""
+    if listen:
+        tab.listen.start([FEED_API, COMMENT_API])
+    # 丢弃上一篇笔记的迟到数据包，避免串到当前笔记
+    try:
+        tab.listen.clear()
+    except AttributeError:
+        pass
+    tab.get(DETAIL_URL.format(note_id=note_id))
+
+
+def collect_detail(
+    tab,
+    note_id: str,
+    timeout: float = 8.0,
+    detail_cls=RedNoteDetail,
+    note_cache=None
+) -> Optional[RedNoteDetail]:
+    """等待标签页的feed/评论数据包，只接收属于当前笔记的数据；两个都没等到时返回None"""
+    parsed = {}
+
+    def belongs_to_note(part, packet):
+        if part == COMMENT_API:
+            return url_has_note_id(packet.url, note_id)
+        detail = detail_cls.from_feed_response(PacketBody.from_packet(packet).json_dict(), note_cache)
+        if detail and detail.note_id in ('', note_id):
+            parsed[FEED_API] = detail
+            return True
+        return False
+
+    result = wait_for_packets(tab, [FEED_API, COMMENT_API], timeout, belongs_to_note)
+    detail: Optional[RedNoteDetail] = parsed.get(FEED_API)
+    comment_packet = result.value.get(COMMENT_API)
+    comment_body = PacketBody.from_packet(comment_packet) if comment_packet is not None else None
+
+    if detail is None and comment_body is None:
+        return None
+
+    if detail is None:
+        detail = RedNoteDetail(note_id=note_id)
+    detail.note_id = detail.note_id or note_id
+    detail.url = DETAIL_URL.format(note_id=note_id)
+
+    if comment_body is not None:
+        RedNoteDetail.from_comment_response(comment_body.json_dict(), detail)
+    return detail
+
+
+__all__ = ['MultiTabDetailCapture', 'TabSlot', 'open_detail_page', 'collect_detail', 'DETAIL_URL', 'FEED_API', 'COMMENT_API']
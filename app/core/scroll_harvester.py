@@ -0,0 +1,171 @@
+"""
+增量无限滚动采集
+边滚动边监听 search/notes 响应：has_more为false、连续几页没有新笔记或达到目标数量时停止，
+根据响应耗时调整滚动节奏，每一页的RedNotePreview作为事件实时发出
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from core.state_types import EventFactory
+from ..models.rednote import RedNotePreview, create_rednote_previews_from_api_response
+from ..utils.packet_body import PacketBody
+from .browser_wait import wait_for_packet
+
+
+SEARCH_NOTES_API = '/api/sns/web/v1/search/notes'
+
+
+class StopReason:
+    """停止原因"""
+    NO_MORE = "no_more"        # 接口返回has_more=false
+    NO_NEW = "no_new"          # 连续几页没有新笔记ID
+    TARGET = "target"          # 达到目标数量
+    TIMEOUT = "timeout"        # 连续几次滚动都没有等到响应
+    MAX_SCROLLS = "max_scrolls"
+
+
+class HarvestResult:
+    """一次滚动采集的结果"""
+
+    def __init__(self):
+        self.previews: List[RedNotePreview] = []
+        self.note_ids: Set[str] = set()
+        self.pages = 0
+        self.scrolls = 0
+        self.stop_reason = ""
+        self.elapsed = 0.0
+
+    def __repr__(self):
+        return (f"HarvestResult({len(self.note_ids)} notes, {self.pages} pages, "
+                f"{self.scrolls} scrolls, {self.stop_reason}, {self.elapsed:.1f}s)")
+
+
+class ScrollHarvester:
+    """按响应驱动的滚动采集器"""
+
+    def __init__(
+        self,
+        tab,
+        event_bus=None,
+        note_cache=None,
+        target_count: Optional[int] = None,
+        max_idle_pages: int = 2,
+        max_timeouts: int = 2,
+        max_scrolls: int = 100,
+        response_timeout: float = 6.0,
+        min_delay: float = 0.3,
+        max_delay: float = 3.0,
+        scroll_step: int = 3,
+        governor=None
+    ):
+        self.tab = tab
+        self.event_bus = event_bus
+        self.note_cache = note_cache
+        self.target_count = target_count
+        self.max_idle_pages = max_idle_pages
+        self.max_timeouts = max_timeouts
+        self.max_scrolls = max_scrolls
+        self.response_timeout = response_timeout
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.scroll_step = scroll_step
+        # 可选的app.core.governor.Governor：每次滚动前取令牌，响应耗时反馈给它
+        self.governor = governor
+
+        # 响应耗时的指数移动平均，用于调整滚动节奏
+        self.latency_ema: Optional[float] = None
+
+    @property
+    def scroll_delay(self) -> float:
+        """下一次滚动前的等待时间：响应越慢，滚动越慢"""
+        if self.latency_ema is None:
+            return self.min_delay
+        return min(self.max_delay, max(self.min_delay, self.latency_ema * 0.5))
+
+    async def harvest(self, keyword: Optional[str] = None, first_page_pending: bool = True) -> HarvestResult:
+        """开始滚动采集；first_page_pending表示第一页请求已经发出（如刚提交搜索），先等它返回"""
+        result = HarvestResult()
+        start = time.monotonic()
+        idle_pages = 0
+        timeouts = 0
+
+        while True:
+            if first_page_pending and result.pages == 0 and result.scrolls == 0:
+                waited = await asyncio.to_thread(wait_for_packet, self.tab, SEARCH_NOTES_API, self.response_timeout)
+            else:
+                if result.scrolls >= self.max_scrolls:
+                    result.stop_reason = StopReason.MAX_SCROLLS
+                    break
+                await asyncio.sleep(self.scroll_delay)
+                if self.governor is not None:
+                    await self.governor.acquire(self.tab)
+                waited = await asyncio.to_thread(self._scroll_and_wait)
+                result.scrolls += 1
+
+            if not waited:
+                timeouts += 1
+                if timeouts >= self.max_timeouts:
+                    result.stop_reason = StopReason.TIMEOUT
+                    break
+                continue
+            timeouts = 0
+            self._update_latency(waited.waited)
+            if self.governor is not None:
+                self.governor.observe_latency(self.tab, waited.waited)
+
+            body = PacketBody.from_packet(waited.value)
+            has_more, new_ids = await self._handle_page(body, keyword, result)
+
+            idle_pages = 0 if new_ids else idle_pages + 1
+            if not has_more:
+                result.stop_reason = StopReason.NO_MORE
+                break
+            if self.target_count is not None and len(result.note_ids) >= self.target_count:
+                result.stop_reason = StopReason.TARGET
+                break
+            if idle_pages >= self.max_idle_pages:
+                result.stop_reason = StopReason.NO_NEW
+                break
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+    def _scroll_and_wait(self):
+        self.tab.scroll.down(self.scroll_step)
+        return wait_for_packet(self.tab, SEARCH_NOTES_API, self.response_timeout)
+
+    def _update_latency(self, latency: float):
+        if self.latency_ema is None:
+            self.latency_ema = latency
+        else:
+            self.latency_ema = 0.7 * self.latency_ema + 0.3 * latency
+
+    async def _handle_page(self, body: PacketBody, keyword: Optional[str], result: HarvestResult):
+        """解析一页响应并发出事件，返回 (has_more, 新笔记ID列表)"""
+        data = body.json_dict()
+        data_section = data.get('data') or {}
+        items = data_section.get('items', []) if isinstance(data_section, dict) else []
+        has_more = bool(data_section.get('has_more', False)) if isinstance(data_section, dict) else False
+
+        # 按原始条目ID判断是否有新笔记，被缓存跳过的重复笔记不算新
+        new_ids = [item['id'] for item in items if item.get('id') and item['id'] not in result.note_ids]
+        result.note_ids.update(new_ids)
+        result.pages += 1
+
+        deltas: Dict[str, Dict[str, int]] = {}
+        previews = create_rednote_previews_from_api_response(
+            data, note_cache=self.note_cache, on_delta=deltas.__setitem__
+        )
+        result.previews.extend(previews)
+
+        if self.event_bus:
+            await self.event_bus.publish(EventFactory.notes_page(previews, result.pages, keyword, has_more))
+            for note_id, delta in deltas.items():
+                await self.event_bus.publish(EventFactory.note_delta(note_id, delta))
+
+        return has_more, new_ids
+
+
+__all__ = ['ScrollHarvester', 'HarvestResult', 'StopReason', 'SEARCH_NOTES_API']
@@ -0,0 +1,287 @@
+"""
+关键词批量搜索
+从文件读取大量关键词，分配到多个会话（标签页）并发搜索，全局限速，
+接入CheckpointManager时已完成的关键词连同采集到的笔记追加到检查点日志，每个关键词都走 SEARCH → SEARCHING → SEARCH_RESULT 状态流转
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+from urllib.parse import quote
+
+from core.event_bus import EventBus
+from core.state_machine import BaseStateHandler, StateMachine
+from core.state_types import BusinessState, Event, EventType
+from ..models.rednote import RedNotePreview
+from .governor import DEFAULT_ACCOUNT
+from .scroll_harvester import HarvestResult, ScrollHarvester, StopReason, SEARCH_NOTES_API
+
+
+SEARCH_URL = 'https://www.xiaohongshu.com/search_result?keyword={keyword}&source=web_explore_feed'
+
+
+def load_keywords(path: str) -> List[str]:
+    """读取关键词文件：每行一个，忽略空行和#注释，去重并保持顺序"""
+    keywords = []
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            keyword = line.strip()
+            if not keyword or keyword.startswith('#') or keyword in seen:
+                continue
+            seen.add(keyword)
+            keywords.append(keyword)
+    return keywords
+
+
+class RateLimiter:
+    """全局搜索限速：相邻两次搜索之间至少间隔 60/per_minute 秒"""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_time = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+            self._next_time = now + self.interval
+
+
+class SearchFlowHandler(BaseStateHandler):
+    """只负责搜索流转的状态处理器：LIST_STATE --SEARCH--> SEARCHING --SEARCH_RESULT--> LIST_STATE"""
+
+    async def process_event(self, event: Event, current_state: BusinessState) -> Optional[BusinessState]:
+        if current_state == BusinessState.LIST_STATE and event.type == EventType.SEARCH:
+            return BusinessState.SEARCHING
+        if current_state == BusinessState.SEARCHING and event.type == EventType.SEARCH_RESULT:
+            return BusinessState.LIST_STATE
+        return None
+
+
+class SearchSession:
+    """一个搜索会话：一个标签页 + 一个状态机"""
+
+    def __init__(self, index: int, tab, event_bus: EventBus, lease=None):
+        self.index = index
+        self.tab = tab
+        self.lease = lease
+        self.state_machine = StateMachine(initial_state=BusinessState.LIST_STATE, event_bus=event_bus)
+        handler = SearchFlowHandler(event_bus)
+        self.state_machine.register_handler(BusinessState.LIST_STATE, handler)
+        self.state_machine.register_handler(BusinessState.SEARCHING, handler)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self.state_machine.run())
+
+    async def stop(self):
+        # 等队列里的事件处理完再停
+        while not self.state_machine.event_queue.empty():
+            await asyncio.sleep(0.01)
+        await self.state_machine.stop()
+        if self._task:
+            self._task.cancel()
+
+
+class SearchBatchRunner:
+    """关键词批量搜索执行器"""
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        tabs: Optional[List] = None,
+        pool=None,
+        sessions: int = 2,
+        searches_per_minute: float = 6,
+        target_per_keyword: Optional[int] = 100,
+        event_bus: Optional[EventBus] = None,
+        note_cache=None,
+        max_attempts: int = 2,
+        governor=None
+    ):
+        self.keywords = list(keywords)
+        self.tabs = tabs
+        self.pool = pool
+        self.session_count = len(tabs) if tabs else sessions
+        self.rate_limiter = RateLimiter(searches_per_minute)
+        self.target_per_keyword = target_per_keyword
+        self.event_bus = event_bus or EventBus("search_runner")
+        self.note_cache = note_cache
+        self.max_attempts = max_attempts
+        # 可选的自适应限速器，在固定的每分钟搜索数之外按接口反馈限速
+        self.governor = governor
+
+        self.results: Dict[str, HarvestResult] = {}
+        self.failed: Dict[str, str] = {}
+        self.done: Set[str] = set()
+        self.captured_note_ids: Set[str] = set()
+        # 由attach_checkpoint设置，完成的关键词追加到检查点日志
+        self.checkpoint = None
+        self._journal_name: Optional[str] = None
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'SearchBatchRunner':
+        """从关键词文件创建"""
+        return cls(load_keywords(path), **kwargs)
+
+    def cursor(self) -> Dict:
+        """体量小的采集进度，供CheckpointManager快照"""
+        return {"failed": self.failed}
+
+    def restore_cursor(self, cursor: Dict):
+        """从快照恢复失败的关键词"""
+        self.failed.update(cursor.get("failed", {}))
+
+    def replay_keyword(self, entry: Dict[str, Any]):
+        """回放检查点日志里的一个已完成关键词：恢复采集结果，之后不再搜索"""
+        result = HarvestResult()
+        result.previews = [RedNotePreview(**note) for note in entry.get("notes", [])]
+        result.note_ids = {preview.note_id for preview in result.previews}
+        result.stop_reason = entry.get("stop_reason", "")
+
+        keyword = entry["keyword"]
+        self.results[keyword] = result
+        self.captured_note_ids.update(result.note_ids)
+        self.done.add(keyword)
+        self.failed.pop(keyword, None)
+
+    def attach_checkpoint(self, manager, name: str = "search_runner"):
+        """把进度注册到检查点管理器：失败记录进快照，完成的关键词和笔记追加到日志"""
+        self.checkpoint = manager
+        self._journal_name = f"{name}.keywords"
+        manager.register_cursor(name, self.cursor, self.restore_cursor)
+        manager.register_journal(self._journal_name, self.replay_keyword)
+
+    async def run(self) -> Dict[str, HarvestResult]:
+        """执行所有未完成的关键词，返回 {关键词: 采集结果}"""
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = [kw for kw in self.keywords if kw not in self.done]
+        for keyword in pending:
+            queue.put_nowait((keyword, 1))
+
+        print(f"批量搜索: {len(pending)} 个关键词, {self.session_count} 个会话, "
+              f"已完成 {len(self.done)} 个")
+
+        if self.governor is not None:
+            self.governor.attach()
+        sessions = await self._open_sessions()
+        try:
+            await asyncio.gather(*(self._worker(session, queue) for session in sessions))
+        finally:
+            for session in sessions:
+                await session.stop()
+                if session.lease is not None:
+                    await asyncio.to_thread(session.lease.release)
+
+        return self.results
+
+    async def _open_sessions(self) -> List[SearchSession]:
+        sessions = []
+        for index in range(self.session_count):
+            lease = None
+            if self.tabs:
+                tab = self.tabs[index]
+            else:
+                lease = await self.pool.lease_async()
+                tab = lease.tab
+            session = SearchSession(index, tab, self.event_bus, lease)
+            if self.governor is not None:
+                account = lease.instance.name if lease is not None else DEFAULT_ACCOUNT
+                self.governor.bind(tab, f"search{index}", account)
+            session.start()
+            sessions.append(session)
+        return sessions
+
+    async def _worker(self, session: SearchSession, queue: asyncio.Queue):
+        while True:
+            try:
+                keyword, attempt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            await self.rate_limiter.acquire()
+            if self.governor is not None:
+                await self.governor.acquire(session.tab)
+            try:
+                result = await self._search(session, keyword)
+                self.results[keyword] = result
+                self.captured_note_ids.update(result.note_ids)
+                self._mark_done(keyword, result)
+                print(f"会话{session.index} 关键词 {keyword}: {result}")
+            except Exception as e:
+                print(f"会话{session.index} 关键词 {keyword} 第{attempt}次失败: {e}")
+                if attempt < self.max_attempts:
+                    queue.put_nowait((keyword, attempt + 1))
+                else:
+                    self.failed[keyword] = str(e)
+
+    def _mark_done(self, keyword: str, result: HarvestResult):
+        self.done.add(keyword)
+        self.failed.pop(keyword, None)
+        if self.checkpoint is not None:
+            self.checkpoint.append(self._journal_name, {
+                "keyword": keyword,
+                "stop_reason": result.stop_reason,
+                "notes": [preview.model_dump(mode='json') for preview in result.previews],
+            })
+
+    async def _search(self, session: SearchSession, keyword: str) -> HarvestResult:
+        """执行一个关键词：发出SEARCH，打开搜索页滚动采集，发出SEARCH_RESULT"""
+        machine = session.state_machine
+        await machine.emit_event(EventType.SEARCH, {"keyword": keyword})
+
+        result = HarvestResult()
+        try:
+            await asyncio.to_thread(self._open_search_page, session.tab, keyword)
+            if session.lease is not None:
+                session.lease.record_page()
+
+            harvester = ScrollHarvester(
+                session.tab,
+                event_bus=self.event_bus,
+                note_cache=self.note_cache,
+                target_count=self.target_per_keyword,
+                governor=self.governor
+            )
+            result = await harvester.harvest(keyword)
+            if result.pages == 0 and result.stop_reason == StopReason.TIMEOUT:
+                # 搜索页没加载出来（或被限流/暂停），不能当作已完成，交给重试
+                raise RuntimeError(f"搜索结果一页都没有加载 ({result})")
+        finally:
+            # 失败时也要回到列表状态，保证下一个关键词能重新发起搜索
+            await machine.emit_event(EventType.SEARCH_RESULT, {
+                "keyword": keyword,
+                "notes": result.previews,
+                "stop_reason": result.stop_reason
+            })
+        return result
+
+    @staticmethod
+    def _open_search_page(tab, keyword: str):
+        open_search_page(tab, keyword)
+
+
+def open_search_page(tab, keyword: str):
+    """监听搜索接口并打开关键词的搜索结果页"""
+    tab.listen.start(SEARCH_NOTES_API)
+    try:
+        tab.listen.clear()
+    except AttributeError:
+        pass
+    tab.get(SEARCH_URL.format(keyword=quote(keyword)))
+
+
+__all__ = [
+    'SearchBatchRunner',
+    'SearchSession',
+    'SearchFlowHandler',
+    'RateLimiter',
+    'load_keywords',
+    'open_search_page',
+    'SEARCH_URL',
+]
@@ -0,0 +1,250 @@
+"""
+选择器命中率统计
+按 (页面类型, 字段) 记录每个候选选择器的尝试次数、命中次数和耗时，下次按历史表现排序，
+命中率高、耗时短的先试；统计写入JSON文件，跨运行保留。
+统计按指数衰减：每次尝试先把旧统计乘以decay，读取文件时再按距上次更新的时间衰减，
+页面改版后原来的选择器连续未命中几次就会排到后面
+"""
+
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..utils import json_codec
+
+
+class SelectorStats:
+    """单个选择器的统计"""
+
+    __slots__ = ('tries', 'hits', 'hit_time', 'miss_time', 'last_hit', 'updated')
+
+    def __init__(
+        self,
+        tries: float = 0,
+        hits: float = 0,
+        hit_time: float = 0.0,
+        miss_time: float = 0.0,
+        last_hit: float = 0.0,
+        updated: Optional[float] = None
+    ):
+        self.tries = tries
+        self.hits = hits
+        self.hit_time = hit_time
+        self.miss_time = miss_time
+        self.last_hit = last_hit
+        # 最近一次尝试的时间，旧版本文件没有时用最近命中时间
+        self.updated = last_hit if updated is None else updated
+
+    def scale(self, factor: float):
+        """所有计数和耗时乘以factor（衰减），命中率和平均耗时不变"""
+        self.tries *= factor
+        self.hits *= factor
+        self.hit_time *= factor
+        self.miss_time *= factor
+
+    def observe(self, hit: bool, elapsed: float, decay: float = 1.0, now: Optional[float] = None):
+        """先衰减旧统计，再记入一次尝试"""
+        now = time.time() if now is None else now
+        self.scale(decay)
+        self.tries += 1
+        if hit:
+            self.hits += 1
+            self.hit_time += elapsed
+            self.last_hit = now
+        else:
+            self.miss_time += elapsed
+        self.updated = now
+
+    @property
+    def hit_rate(self) -> float:
+        """平滑后的命中率，没试过的选择器为0.5"""
+        return (self.hits + 1) / (self.tries + 2)
+
+    @property
+    def avg_hit_time(self) -> float:
+        return self.hit_time / self.hits if self.hits else 0.0
+
+    @property
+    def avg_miss_time(self) -> float:
+        misses = self.tries - self.hits
+        return self.miss_time / misses if misses > 1e-9 else 0.0
+
+    def expected_cost(self) -> float:
+        """先试这个选择器的期望耗时（未命中的超时按历史平均计）"""
+        rate = self.hit_rate
+        return rate * self.avg_hit_time + (1 - rate) * self.avg_miss_time
+
+    def to_list(self) -> List:
+        return [
+            round(self.tries, 4), round(self.hits, 4), round(self.hit_time, 4), round(self.miss_time, 4),
+            self.last_hit, self.updated
+        ]
+
+    @classmethod
+    def from_list(cls, values: Sequence) -> 'SelectorStats':
+        return cls(*values)
+
+    def __repr__(self):
+        return f"SelectorStats({self.hits:.1f}/{self.tries:.1f}, hit={self.avg_hit_time:.3f}s, miss={self.avg_miss_time:.3f}s)"
+
+
+class SelectorRegistry:
+    """选择器统计表，order() 返回按历史表现排序的候选列表"""
+
+    VERSION = 2
+    # 版本1的统计只是没有updated字段，仍然可以读取
+    COMPATIBLE_VERSIONS = (1, 2)
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        autosave_every: int = 50,
+        decay: float = 0.9,
+        half_life: float = 7 * 86400.0
+    ):
+        self.path = path
+        self.autosave_every = autosave_every
+        # 每次尝试时旧统计的保留比例，相当于只看最近约 1/(1-decay) 次尝试
+        self.decay = decay
+        # 读取文件时，统计每过half_life秒减半
+        self.half_life = half_life
+        self._stats: Dict[Tuple[str, str], Dict[str, SelectorStats]] = {}
+        self._dirty = 0
+        if path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def stats(self, page_type: str, field: str) -> Dict[str, SelectorStats]:
+        return self._stats.get((page_type, field), {})
+
+    # ---------- 排序 ----------
+
+    def order(self, page_type: str, field: str, selectors: Sequence[str]) -> List[str]:
+        """候选选择器按 命中率降序、期望耗时升序 排列，统计相同的保持原顺序"""
+        table = self._stats.get((page_type, field))
+        if not table:
+            return list(selectors)
+
+        def key(item: Tuple[int, str]):
+            position, selector = item
+            stats = table.get(selector)
+            if stats is None:
+                return (-0.5, 0.0, position)
+            return (-stats.hit_rate, stats.expected_cost(), position)
+
+        return [selector for _, selector in sorted(enumerate(selectors), key=key)]
+
+    def best(self, page_type: str, field: str) -> Optional[str]:
+        """历史上表现最好的已命中过的选择器"""
+        table = self._stats.get((page_type, field), {})
+        hit = [selector for selector, stats in table.items() if stats.hits]
+        return self.order(page_type, field, hit)[0] if hit else None
+
+    # ---------- 记录 ----------
+
+    def record(self, page_type: str, field: str, selector: str, hit: bool, elapsed: float = 0.0):
+        """记录一次尝试"""
+        table = self._stats.setdefault((page_type, field), {})
+        stats = table.get(selector)
+        if stats is None:
+            stats = table[selector] = SelectorStats()
+        stats.observe(hit, elapsed, self.decay)
+
+        self._dirty += 1
+        if self.path and self.autosave_every and self._dirty >= self.autosave_every:
+            self.save()
+
+    def record_batch(self, page_type: str, field: str, tried: Sequence[str], matched: Optional[str], elapsed: float = 0.0):
+        """记录一次按顺序的批量尝试：matched之前的都未命中，耗时计给命中的选择器"""
+        for selector in tried:
+            if selector == matched:
+                self.record(page_type, field, selector, True, elapsed)
+                return
+            self.record(page_type, field, selector, False)
+
+    # ---------- 探测 ----------
+
+    def find(
+        self,
+        tab,
+        page_type: str,
+        field: str,
+        selectors: Sequence[str],
+        timeout: float = 1.0,
+        check: Optional[Callable[[Any], bool]] = None
+    ) -> Tuple[Optional[str], Any]:
+        """按学到的顺序逐个 tab.ele() 探测，返回 (命中的选择器, 元素)；check返回False的元素视为未命中"""
+        for selector in self.order(page_type, field, selectors):
+            start = time.monotonic()
+            try:
+                element = tab.ele(selector, timeout=timeout)
+                if element and check is not None and not check(element):
+                    element = None
+            except Exception:
+                element = None
+            self.record(page_type, field, selector, bool(element), time.monotonic() - start)
+            if element:
+                return selector, element
+        return None, None
+
+    # ---------- 持久化 ----------
+
+    def to_dict(self) -> Dict[str, Any]:
+        pages: Dict[str, Dict[str, Dict[str, List]]] = {}
+        for (page_type, field), table in self._stats.items():
+            pages.setdefault(page_type, {})[field] = {selector: stats.to_list() for selector, stats in table.items()}
+        return {"version": self.VERSION, "pages": pages}
+
+    def merge_dict(self, data: Dict[str, Any], now: Optional[float] = None):
+        """合并已保存的统计：按距上次更新的时间衰减；当前表里已有的选择器以更新的一份为准，不重复累加"""
+        if data.get("version") not in self.COMPATIBLE_VERSIONS:
+            print(f"选择器统计版本不匹配: {data.get('version')}")
+            return
+        now = time.time() if now is None else now
+        for page_type, fields in data.get("pages", {}).items():
+            for field, table in fields.items():
+                target = self._stats.setdefault((page_type, field), {})
+                for selector, values in table.items():
+                    loaded = SelectorStats.from_list(values)
+                    stats = target.get(selector)
+                    if stats is not None and stats.updated >= loaded.updated:
+                        continue
+                    if self.half_life > 0 and now > loaded.updated:
+                        loaded.scale(0.5 ** ((now - loaded.updated) / self.half_life))
+                    target[selector] = loaded
+
+    def load(self, path: Optional[str] = None) -> bool:
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                data = json_codec.load(f)
+        except (OSError,) + json_codec.DECODE_ERRORS as e:
+            print(f"读取选择器统计失败: {e}")
+            return False
+        self.merge_dict(data)
+        return True
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """写入统计文件（先写临时文件再替换）"""
+        path = path or self.path
+        if not path:
+            return False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            json_codec.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+        self._dirty = 0
+        return True
+
+
+# 进程内共享的默认统计表（不落盘），需要持久化时自行创建带路径的实例
+default_registry = SelectorRegistry()
+
+
+__all__ = ['SelectorRegistry', 'SelectorStats', 'default_registry']
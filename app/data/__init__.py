@@ -0,0 +1,28 @@
+"""
+数据存储与缓存
+"""
+
+from .note_cache import NoteCache, NoteCacheEntry, NoteStatus
+from .interaction_series import InteractionSeries, InteractionSeriesStore
+from .comment_store import CommentStore
+from .search_index import SearchIndex, SearchHit, ngram_tokenize
+from .topic_index import TopicIndex
+from .near_duplicate import NearDuplicateIndex, DuplicateMatch
+from .author_index import AuthorIndex, AuthorProfile
+
+__all__ = [
+    'NoteCache',
+    'NoteCacheEntry',
+    'NoteStatus',
+    'InteractionSeries',
+    'InteractionSeriesStore',
+    'CommentStore',
+    'SearchIndex',
+    'SearchHit',
+    'ngram_tokenize',
+    'TopicIndex',
+    'NearDuplicateIndex',
+    'DuplicateMatch',
+    'AuthorIndex',
+    'AuthorProfile'
+]
@@ -0,0 +1,247 @@
+"""
+作者索引
+从列表页、详情页和评论事件增量汇总每个用户：发布的笔记数、笔记互动总量、最近出现时间、
+昵称/头像历史和评论活跃度；按任意指标用堆取Top-N，不需要扫描已保存的笔记
+"""
+
+import heapq
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.state_types import EventType
+from .note_cache import INTERACTION_FIELDS
+
+
+_NO_COUNTS = (0,) * len(INTERACTION_FIELDS)
+
+
+class AuthorProfile:
+    """单个用户的汇总数据"""
+
+    __slots__ = (
+        'user_id', 'names', 'avatars', 'note_ids', 'totals',
+        'comment_count', 'comment_likes', 'commented_notes', 'first_seen', 'last_seen'
+    )
+
+    def __init__(self, user_id: str, ts: float):
+        self.user_id = user_id
+        self.names: List[str] = []
+        self.avatars: List[str] = []
+        self.note_ids: Set[str] = set()
+        self.totals = [0] * len(INTERACTION_FIELDS)
+        self.comment_count = 0
+        self.comment_likes = 0
+        self.commented_notes: Set[str] = set()
+        self.first_seen = ts
+        self.last_seen = ts
+
+    @property
+    def name(self) -> str:
+        """最新昵称"""
+        return self.names[-1] if self.names else ''
+
+    @property
+    def avatar(self) -> str:
+        """最新头像"""
+        return self.avatars[-1] if self.avatars else ''
+
+    @property
+    def note_count(self) -> int:
+        return len(self.note_ids)
+
+    @property
+    def total_interactions(self) -> int:
+        return sum(self.totals)
+
+    def interactions(self) -> Dict[str, int]:
+        return dict(zip(INTERACTION_FIELDS, self.totals))
+
+    def seen(self, ts: float, name: str = '', avatar: str = ''):
+        """记录一次出现，昵称/头像变化时追加到历史"""
+        self.first_seen = min(self.first_seen, ts)
+        self.last_seen = max(self.last_seen, ts)
+        if name and (not self.names or self.names[-1] != name):
+            self.names.append(name)
+        if avatar:
+            # 同一头像的不同尺寸参数（?imageView2/...）视为同一个
+            base = avatar.split('?', 1)[0]
+            if not self.avatars or self.avatars[-1].split('?', 1)[0] != base:
+                self.avatars.append(avatar)
+
+    def to_dict(self) -> Dict:
+        return {
+            "user_id": self.user_id,
+            "name": self.name,
+            "avatar": self.avatar,
+            "names": list(self.names),
+            "avatars": list(self.avatars),
+            "note_count": self.note_count,
+            "interactions": self.interactions(),
+            "comment_count": self.comment_count,
+            "comment_likes": self.comment_likes,
+            "commented_notes": len(self.commented_notes),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+        }
+
+    def __repr__(self):
+        return f"AuthorProfile({self.user_id}, {self.name!r}, notes={self.note_count}, comments={self.comment_count})"
+
+
+# Top-N排序指标
+METRICS: Dict[str, Callable[[AuthorProfile], float]] = {
+    'interactions': lambda profile: profile.total_interactions,
+    'notes': lambda profile: profile.note_count,
+    'comments': lambda profile: profile.comment_count,
+    'comment_likes': lambda profile: profile.comment_likes,
+    'last_seen': lambda profile: profile.last_seen,
+}
+
+
+class AuthorIndex:
+    """按user_id增量维护的作者/评论者汇总"""
+
+    def __init__(self):
+        self._profiles: Dict[str, AuthorProfile] = {}
+        # 笔记 -> (作者ID, 最近一次计入汇总的互动快照)
+        self._note_authors: Dict[str, Tuple[str, Tuple[int, ...]]] = {}
+        self._seen_comments: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._profiles
+
+    def get(self, user_id: str) -> Optional[AuthorProfile]:
+        return self._profiles.get(user_id)
+
+    def author_of(self, note_id: str) -> Optional[str]:
+        entry = self._note_authors.get(note_id)
+        return entry[0] if entry else None
+
+    def _profile(self, user_id: str, ts: float) -> AuthorProfile:
+        profile = self._profiles.get(user_id)
+        if profile is None:
+            profile = self._profiles[user_id] = AuthorProfile(user_id, ts)
+        return profile
+
+    # ---------- 写入 ----------
+
+    def add_note(self, note, ts: Optional[float] = None):
+        """记录一篇笔记（列表预览或详情），重复出现时按互动快照的差值更新汇总"""
+        author_id = getattr(note, 'author_id', '') or ''
+        note_id = note.note_id
+        if not author_id or not note_id:
+            return
+        ts = time.time() if ts is None else ts
+
+        interaction = getattr(note, 'interaction', None)
+        counts = tuple(getattr(interaction, field, 0) for field in INTERACTION_FIELDS) if interaction else _NO_COUNTS
+
+        previous = self._note_authors.get(note_id)
+        if previous is not None and previous[0] != author_id:
+            self._remove_note(note_id)
+            previous = None
+        old_counts = previous[1] if previous else _NO_COUNTS
+
+        profile = self._profile(author_id, ts)
+        profile.seen(ts, getattr(note, 'author_name', '') or '', getattr(note, 'author_avatar', '') or '')
+        profile.note_ids.add(note_id)
+        for i, (new, old) in enumerate(zip(counts, old_counts)):
+            profile.totals[i] += new - old
+        self._note_authors[note_id] = (author_id, counts)
+
+    def add_comment(self, comment, note_id: str = '', ts: Optional[float] = None):
+        """记录一条评论的作者活跃度，同一评论只计一次"""
+        user_id = comment.user_id
+        if not user_id:
+            return
+        ts = time.time() if ts is None else ts
+
+        profile = self._profile(user_id, ts)
+        profile.seen(ts, comment.user_name, comment.user_avatar)
+        if comment.comment_id and comment.comment_id in self._seen_comments:
+            return
+        if comment.comment_id:
+            self._seen_comments.add(comment.comment_id)
+        profile.comment_count += 1
+        profile.comment_likes += comment.like_count or 0
+        if note_id:
+            profile.commented_notes.add(note_id)
+
+    def add_comments(self, comments: Iterable, note_id: str = '', ts: Optional[float] = None):
+        for comment in comments:
+            self.add_comment(comment, note_id, ts)
+
+    def apply_delta(self, note_id: str, delta: Dict[str, int]):
+        """叠加笔记的互动变化量（NOTE_DELTA）"""
+        entry = self._note_authors.get(note_id)
+        if entry is None:
+            return
+        author_id, counts = entry
+        profile = self._profiles[author_id]
+        changes = [delta.get(field, 0) for field in INTERACTION_FIELDS]
+        for i, change in enumerate(changes):
+            profile.totals[i] += change
+        profile.last_seen = max(profile.last_seen, time.time())
+        self._note_authors[note_id] = (author_id, tuple(c + d for c, d in zip(counts, changes)))
+
+    def _remove_note(self, note_id: str):
+        author_id, counts = self._note_authors.pop(note_id)
+        profile = self._profiles.get(author_id)
+        if profile is not None:
+            profile.note_ids.discard(note_id)
+            for i, count in enumerate(counts):
+                profile.totals[i] -= count
+
+    # ---------- 事件 ----------
+
+    def handle_notes_page_event(self, event):
+        """NOTES_PAGE事件处理器"""
+        for note in event.data.get('notes', []):
+            self.add_note(note)
+
+    def handle_detail_event(self, event):
+        """DETAIL_LOADED事件处理器：笔记作者 + 评论者"""
+        detail = event.data.get('detail')
+        if detail is None:
+            return
+        self.add_note(detail)
+        self.add_comments(getattr(detail, 'comments', None) or [], detail.note_id)
+
+    def handle_delta_event(self, event):
+        """NOTE_DELTA事件处理器"""
+        self.apply_delta(event.data.get('note_id', ''), event.data.get('delta', {}))
+
+    def attach(self, event_bus):
+        """订阅到EventBus，随采集自动更新"""
+        event_bus.subscribe(EventType.NOTES_PAGE, self.handle_notes_page_event)
+        event_bus.subscribe(EventType.DETAIL_LOADED, self.handle_detail_event)
+        event_bus.subscribe(EventType.NOTE_DELTA, self.handle_delta_event)
+
+    def detach(self, event_bus):
+        event_bus.unsubscribe(EventType.NOTES_PAGE, self.handle_notes_page_event)
+        event_bus.unsubscribe(EventType.DETAIL_LOADED, self.handle_detail_event)
+        event_bus.unsubscribe(EventType.NOTE_DELTA, self.handle_delta_event)
+
+    # ---------- 查询 ----------
+
+    def top(self, limit: int = 20, metric: str = 'interactions', since: Optional[float] = None) -> List[AuthorProfile]:
+        """按指标取Top-N（interactions/notes/comments/comment_likes/last_seen），since只统计之后出现过的用户"""
+        key = METRICS[metric]
+        profiles = self._profiles.values()
+        if since is not None:
+            profiles = (profile for profile in profiles if profile.last_seen >= since)
+        return heapq.nlargest(limit, profiles, key=key)
+
+    def top_authors(self, limit: int = 20, metric: str = 'interactions') -> List[AuthorProfile]:
+        """发布过笔记的用户中的Top-N"""
+        return heapq.nlargest(limit, (p for p in self._profiles.values() if p.note_ids), key=METRICS[metric])
+
+    def top_commenters(self, limit: int = 20, metric: str = 'comments') -> List[AuthorProfile]:
+        """评论过的用户中的Top-N"""
+        return heapq.nlargest(limit, (p for p in self._profiles.values() if p.comment_count), key=METRICS[metric])
+
+
+__all__ = ['AuthorIndex', 'AuthorProfile', 'METRICS']
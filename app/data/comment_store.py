@@ -0,0 +1,225 @@
+"""
+评论紧凑存储
+用户信息（ID、昵称、头像）去重后放进共享用户表，评论只记录用户下标；
+头像URL拆成 主体 + 后缀（如?imageView2/...）分别去重；
+其余标量字段按列存放在array中，遍历时再还原成RedNoteComment
+"""
+
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..models.rednote import RedNoteComment, _parse_count
+
+
+ID_BYTES = 12                # 评论ID是24位十六进制字符串，压缩成12字节
+_NO_TIME = -1                # create_time为None
+_OVERFLOW_TIME = -2          # create_time不是纯数字，原文存在溢出表里
+
+UserRecord = Tuple[str, str, str, int]   # (用户ID, 昵称, 头像主体, 头像后缀下标)
+
+
+class CommentStore:
+    """按列存储的评论容器，对外表现为RedNoteComment序列"""
+
+    def __init__(self, comments: Optional[Iterable] = None):
+        # 共享表
+        self._strings: Dict[str, str] = {}
+        self._suffixes: List[str] = ['']
+        self._suffix_index: Dict[str, int] = {'': 0}
+        self._users: List[UserRecord] = []
+        self._user_index: Dict[UserRecord, int] = {}
+
+        # 列
+        self._ids = bytearray()
+        self._id_overflow: Dict[int, str] = {}
+        self._contents: List[str] = []
+        self._user_refs = array('I')
+        self._create_times = array('q')
+        self._time_overflow: Dict[int, str] = {}
+        self._like_counts = array('q')
+        self._sub_counts = array('q')
+
+        if comments is not None:
+            self.extend(comments)
+
+    # ---------- 用户表 ----------
+
+    def _intern(self, text: str) -> str:
+        return self._strings.setdefault(text, text)
+
+    def intern_user(self, user_id: str = "", user_name: str = "", user_avatar: str = "") -> int:
+        """登记用户并返回用户表下标；笔记作者可以预先登记，与其评论共用一条记录"""
+        base, sep, query = (user_avatar or "").partition('?')
+        suffix = sep + query
+        suffix_index = self._suffix_index.get(suffix)
+        if suffix_index is None:
+            suffix_index = len(self._suffixes)
+            self._suffixes.append(suffix)
+            self._suffix_index[suffix] = suffix_index
+
+        record = (self._intern(user_id or ""), self._intern(user_name or ""), self._intern(base), suffix_index)
+        index = self._user_index.get(record)
+        if index is None:
+            index = len(self._users)
+            self._users.append(record)
+            self._user_index[record] = index
+        return index
+
+    def user(self, index: int) -> Tuple[str, str, str]:
+        """按下标取用户 (用户ID, 昵称, 头像URL)"""
+        user_id, user_name, base, suffix_index = self._users[index]
+        return user_id, user_name, base + self._suffixes[suffix_index]
+
+    @property
+    def user_count(self) -> int:
+        return len(self._users)
+
+    # ---------- 写入 ----------
+
+    def append(
+        self,
+        comment_id: str,
+        content: str,
+        user_id: str = "",
+        user_name: str = "",
+        user_avatar: str = "",
+        create_time: Optional[str] = None,
+        like_count: int = 0,
+        sub_comment_count: int = 0
+    ) -> int:
+        """追加一条评论，返回它的下标"""
+        index = len(self._contents)
+
+        packed = None
+        if len(comment_id) == ID_BYTES * 2:
+            try:
+                packed = bytes.fromhex(comment_id)
+            except ValueError:
+                packed = None
+            if packed is not None and packed.hex() != comment_id:
+                packed = None   # 大写等无法原样还原的ID
+        if packed is None:
+            self._id_overflow[index] = comment_id
+            packed = bytes(ID_BYTES)
+        self._ids += packed
+
+        if create_time is None:
+            stamp = _NO_TIME
+        elif create_time.isascii() and create_time.isdigit() and len(create_time) <= 18 \
+                and str(int(create_time)) == create_time:
+            stamp = int(create_time)
+        else:
+            stamp = _OVERFLOW_TIME
+            self._time_overflow[index] = create_time
+
+        self._contents.append(content)
+        self._user_refs.append(self.intern_user(user_id, user_name, user_avatar))
+        self._create_times.append(stamp)
+        self._like_counts.append(like_count)
+        self._sub_counts.append(sub_comment_count)
+        return index
+
+    def add(self, comment) -> int:
+        """追加一条RedNoteComment（或字段相同的CompactComment）"""
+        return self.append(
+            comment.comment_id, comment.content, comment.user_id, comment.user_name, comment.user_avatar,
+            comment.create_time, comment.like_count, comment.sub_comment_count
+        )
+
+    def extend(self, comments: Iterable):
+        for comment in comments:
+            self.add(comment)
+
+    def add_api_item(self, item: dict, is_sub: bool = False) -> int:
+        """直接从评论API的单条评论追加，字段转换与RedNoteDetail.from_comment_response一致"""
+        user_info = item.get('user_info', {})
+        return self.append(
+            item.get('id', ''),
+            item.get('content', ''),
+            user_info.get('user_id', ''),
+            user_info.get('nickname', ''),
+            user_info.get('image', ''),
+            str(item.get('create_time', '')),
+            _parse_count(item.get('like_count', 0)),
+            0 if is_sub else _parse_count(item.get('sub_comment_count', 0))
+        )
+
+    def add_comment_response(self, comment_data: dict) -> int:
+        """追加一页评论API响应（主评论后紧跟其子评论），返回本页评论数"""
+        added = 0
+        for item in comment_data.get('data', {}).get('comments', []):
+            self.add_api_item(item)
+            added += 1
+            for sub_item in item.get('sub_comments', []):
+                self.add_api_item(sub_item, is_sub=True)
+                added += 1
+        return added
+
+    # ---------- 读取 ----------
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def comment_id(self, index: int) -> str:
+        overflow = self._id_overflow.get(index)
+        if overflow is not None:
+            return overflow
+        start = index * ID_BYTES
+        return self._ids[start:start + ID_BYTES].hex()
+
+    def create_time(self, index: int) -> Optional[str]:
+        stamp = self._create_times[index]
+        if stamp == _NO_TIME:
+            return None
+        if stamp == _OVERFLOW_TIME:
+            return self._time_overflow[index]
+        return str(stamp)
+
+    def user_of(self, index: int) -> int:
+        """评论对应的用户表下标"""
+        return self._user_refs[index]
+
+    def __getitem__(self, index: int) -> RedNoteComment:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        user_id, user_name, user_avatar = self.user(self._user_refs[index])
+        # 字段已经是目标类型，跳过校验直接构造
+        return RedNoteComment.model_construct(
+            comment_id=self.comment_id(index),
+            content=self._contents[index],
+            user_id=user_id,
+            user_name=user_name,
+            user_avatar=user_avatar,
+            create_time=self.create_time(index),
+            like_count=self._like_counts[index],
+            sub_comment_count=self._sub_counts[index]
+        )
+
+    def __iter__(self) -> Iterator[RedNoteComment]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def to_list(self) -> List[RedNoteComment]:
+        """全部还原为RedNoteComment列表（例如赋值给RedNoteDetail.comments）"""
+        return list(self)
+
+    def memory_usage(self) -> int:
+        """估算的内存占用（字节），包含各列、共享表和其中的字符串"""
+        size = sum(sys.getsizeof(column) for column in (
+            self._ids, self._contents, self._user_refs, self._create_times, self._like_counts, self._sub_counts,
+            self._users, self._user_index, self._strings, self._suffixes, self._suffix_index,
+            self._id_overflow, self._time_overflow
+        ))
+        size += sum(sys.getsizeof(text) for text in self._contents)
+        size += sum(sys.getsizeof(text) for text in self._strings)
+        size += sum(sys.getsizeof(text) for text in self._suffixes)
+        size += sum(sys.getsizeof(record) for record in self._users)
+        size += sum(sys.getsizeof(text) for text in self._id_overflow.values())
+        size += sum(sys.getsizeof(text) for text in self._time_overflow.values())
+        return size
+
+
+__all__ = ['CommentStore']
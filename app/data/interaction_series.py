@@ -0,0 +1,252 @@
+"""
+互动数据时间序列
+每个笔记一段array缓冲区，按 (时间差, 各计数差) 做zigzag + varint编码，
+旧数据可降采样，支持区间查询和增长速率计算
+"""
+
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .note_cache import INTERACTION_FIELDS
+
+
+Point = Tuple[int, Tuple[int, ...]]
+
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+
+def _unzigzag(value: int) -> int:
+    return (value >> 1) ^ -(value & 1)
+
+
+def _write_varint(buf: array, value: int):
+    """写入无符号varint"""
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+
+def _read_varint(buf: array, pos: int) -> Tuple[int, int]:
+    """读取无符号varint，返回 (值, 新位置)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+class InteractionSeries:
+    """单个笔记的压缩时间序列"""
+
+    __slots__ = ('_buf', '_length', '_last_ts', '_last_counts')
+
+    def __init__(self):
+        self._buf = array('B')
+        self._length = 0
+        self._last_ts = 0
+        self._last_counts: Tuple[int, ...] = (0,) * len(INTERACTION_FIELDS)
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def nbytes(self) -> int:
+        """编码后占用的字节数"""
+        return len(self._buf)
+
+    @property
+    def last(self) -> Optional[Point]:
+        """最近一次观测"""
+        if not self._length:
+            return None
+        return self._last_ts, self._last_counts
+
+    def append(self, ts: int, counts: Sequence[int]) -> bool:
+        """追加一次观测，时间早于最后一个点时忽略"""
+        ts = int(ts)
+        counts = tuple(int(c) for c in counts)
+        if self._length and ts < self._last_ts:
+            return False
+
+        _write_varint(self._buf, _zigzag(ts - self._last_ts))
+        for new, old in zip(counts, self._last_counts):
+            _write_varint(self._buf, _zigzag(new - old))
+
+        self._length += 1
+        self._last_ts = ts
+        self._last_counts = counts
+        return True
+
+    def __iter__(self) -> Iterator[Point]:
+        buf = self._buf
+        pos = 0
+        ts = 0
+        counts = [0] * len(INTERACTION_FIELDS)
+        for _ in range(self._length):
+            value, pos = _read_varint(buf, pos)
+            ts += _unzigzag(value)
+            for i in range(len(counts)):
+                value, pos = _read_varint(buf, pos)
+                counts[i] += _unzigzag(value)
+            yield ts, tuple(counts)
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> List[Point]:
+        """查询 [start, end] 区间内的观测"""
+        points = []
+        for ts, counts in self:
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts > end:
+                break
+            points.append((ts, counts))
+        return points
+
+    def downsample(self, before: int, interval: int) -> int:
+        """把早于before的观测按interval分桶，每桶只保留最后一个点，返回删除的点数"""
+        kept: List[Point] = []
+        bucket = None
+        for ts, counts in self:
+            if ts < before:
+                current = ts // interval
+                if kept and bucket == current:
+                    kept[-1] = (ts, counts)
+                    continue
+                bucket = current
+            kept.append((ts, counts))
+
+        removed = self._length - len(kept)
+        if removed:
+            self._rebuild(kept)
+        return removed
+
+    def _rebuild(self, points: List[Point]):
+        self._buf = array('B')
+        self._length = 0
+        self._last_ts = 0
+        self._last_counts = (0,) * len(INTERACTION_FIELDS)
+        for ts, counts in points:
+            self.append(ts, counts)
+
+
+class InteractionSeriesStore:
+    """按note_id管理互动时间序列"""
+
+    def __init__(self, downsample_age: int = 24 * 3600, downsample_interval: int = 3600, compact_every: int = 64):
+        self.downsample_age = downsample_age
+        self.downsample_interval = downsample_interval
+        self.compact_every = compact_every
+        self._series: Dict[str, InteractionSeries] = {}
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self._series
+
+    @property
+    def memory_usage(self) -> int:
+        """所有序列编码后的字节数"""
+        return sum(series.nbytes for series in self._series.values())
+
+    def record(self, note_id: str, interaction, ts: Optional[float] = None) -> bool:
+        """记录一次观测，interaction可以是RedNoteInteraction或计数元组"""
+        if hasattr(interaction, 'like_count'):
+            counts = tuple(getattr(interaction, field) for field in INTERACTION_FIELDS)
+        else:
+            counts = tuple(interaction)
+
+        series = self._series.get(note_id)
+        if series is None:
+            series = self._series[note_id] = InteractionSeries()
+
+        now = int(time.time() if ts is None else ts)
+        appended = series.append(now, counts)
+
+        if appended and len(series) % self.compact_every == 0:
+            series.downsample(now - self.downsample_age, self.downsample_interval)
+        return appended
+
+    def record_delta(self, note_id: str, delta: Dict[str, int], ts: Optional[float] = None) -> bool:
+        """在最近一次观测基础上叠加变化量，没有历史时忽略"""
+        series = self._series.get(note_id)
+        if series is None or series.last is None:
+            return False
+
+        _, last_counts = series.last
+        counts = tuple(
+            count + delta.get(field, 0)
+            for field, count in zip(INTERACTION_FIELDS, last_counts)
+        )
+        return self.record(note_id, counts, ts)
+
+    def latest(self, note_id: str) -> Optional[Dict[str, int]]:
+        """最近一次观测"""
+        series = self._series.get(note_id)
+        if series is None or series.last is None:
+            return None
+        ts, counts = series.last
+        return {'timestamp': ts, **dict(zip(INTERACTION_FIELDS, counts))}
+
+    def range(self, note_id: str, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, int]]:
+        """区间查询，返回按时间排序的观测列表"""
+        series = self._series.get(note_id)
+        if series is None:
+            return []
+        start = int(start) if start is not None else None
+        end = int(end) if end is not None else None
+        return [
+            {'timestamp': ts, **dict(zip(INTERACTION_FIELDS, counts))}
+            for ts, counts in series.range(start, end)
+        ]
+
+    def rate(self, note_id: str, field: str = 'like_count', window: float = 3600, now: Optional[float] = None) -> Optional[float]:
+        """最近window秒内某个计数的每小时增长速率，观测不足两个时返回None"""
+        series = self._series.get(note_id)
+        if series is None or field not in INTERACTION_FIELDS:
+            return None
+
+        index = INTERACTION_FIELDS.index(field)
+        now = time.time() if now is None else now
+        points = series.range(int(now - window), None)
+        if len(points) < 2:
+            return None
+
+        (first_ts, first_counts), (last_ts, last_counts) = points[0], points[-1]
+        if last_ts == first_ts:
+            return None
+        return (last_counts[index] - first_counts[index]) * 3600 / (last_ts - first_ts)
+
+    def top_growing(self, field: str = 'like_count', window: float = 3600, limit: int = 20) -> List[Tuple[str, float]]:
+        """增长最快的笔记"""
+        now = time.time()
+        rates = []
+        for note_id in self._series:
+            value = self.rate(note_id, field, window, now)
+            if value is not None:
+                rates.append((note_id, value))
+        rates.sort(key=lambda item: item[1], reverse=True)
+        return rates[:limit]
+
+    def downsample_all(self, now: Optional[float] = None) -> int:
+        """对所有序列执行降采样，返回删除的点数"""
+        before = int((time.time() if now is None else now) - self.downsample_age)
+        return sum(series.downsample(before, self.downsample_interval) for series in self._series.values())
+
+    def discard(self, note_id: str):
+        """删除某个笔记的序列"""
+        self._series.pop(note_id, None)
+
+    def handle_delta_event(self, event):
+        """NOTE_DELTA事件处理器，可直接订阅到EventBus"""
+        self.record_delta(event.data.get('note_id', ''), event.data.get('delta', {}), event.data.get('timestamp'))
+
+
+__all__ = ['InteractionSeries', 'InteractionSeriesStore']
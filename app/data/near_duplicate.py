@@ -0,0 +1,283 @@
+"""
+近似重复笔记检测
+标题+正文按字符二元组做MinHash签名，LSH分段索引：只有至少一段签名完全相同的笔记才会成为候选，
+再用签名估计Jaccard相似度；每个笔记只保存每个哈希值的最低8位（b-bit MinHash），拼成一个整数。
+另外按媒体文件ID做精确匹配。列表页只有标题，单独维护一份标题签名；
+文字太短（少于min_tokens个词）时只接受完全相同，并且还要求作者或封面一致，避免短标题误判
+"""
+
+import hashlib
+import random
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from ..utils.text_extract import strip_entities
+from .search_index import ngram_tokenize
+
+
+NUM_PERM = 64
+BANDS = 16
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20251118)
+_PERMUTATIONS = tuple((_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM))
+
+REASON_MEDIA = 'media'
+REASON_TEXT = 'text'
+REASON_TITLE = 'title'
+
+
+class DuplicateMatch(NamedTuple):
+    """命中的已有笔记"""
+    note_id: str
+    similarity: float
+    reason: str
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little') % _PRIME
+
+
+def minhash(tokens: Sequence[str]) -> List[int]:
+    """MinHash签名（NUM_PERM个哈希最小值）"""
+    hashes = [_token_hash(token) for token in set(tokens)]
+    return [min([(a * x + b) % _PRIME for x in hashes]) for a, b in _PERMUTATIONS]
+
+
+def media_file_id(url: str) -> str:
+    """从图片/视频URL中取出文件ID（路径最后一段，去掉!后面的样式参数）"""
+    path = url.split('?', 1)[0]
+    return path.rsplit('/', 1)[-1].split('!', 1)[0]
+
+
+class _MinHashLSH:
+    """MinHash签名的LSH分段索引"""
+
+    def __init__(self, bands: int = BANDS):
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self.signatures: Dict[str, int] = {}
+        self._band_keys_of: Dict[str, Tuple[int, ...]] = {}
+        self._tables: List[Dict[int, List[str]]] = [{} for _ in range(bands)]
+
+    def _band_keys(self, signature: List[int]) -> Tuple[int, ...]:
+        rows = self.rows
+        return tuple(hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands))
+
+    def add(self, note_id: str, signature: List[int]):
+        self.remove(note_id)
+        keys = self._band_keys(signature)
+        self.signatures[note_id] = _pack(signature)
+        self._band_keys_of[note_id] = keys
+        for table, key in zip(self._tables, keys):
+            table.setdefault(key, []).append(note_id)
+
+    def remove(self, note_id: str):
+        keys = self._band_keys_of.pop(note_id, None)
+        if keys is None:
+            return
+        del self.signatures[note_id]
+        for table, key in zip(self._tables, keys):
+            bucket = table.get(key)
+            if bucket and note_id in bucket:
+                bucket.remove(note_id)
+                if not bucket:
+                    del table[key]
+
+    def nearest(
+        self,
+        signature: List[int],
+        threshold: float,
+        exclude: str = '',
+        accept: Optional[Callable[[str], bool]] = None
+    ) -> Optional[Tuple[str, float]]:
+        """相似度不低于threshold的最相似笔记，传入accept时只考虑它接受的笔记"""
+        packed = _pack(signature)
+        best = None
+        seen: Set[str] = set()
+        for table, key in zip(self._tables, self._band_keys(signature)):
+            for note_id in table.get(key, ()):
+                if note_id == exclude or note_id in seen:
+                    continue
+                seen.add(note_id)
+                if accept is not None and not accept(note_id):
+                    continue
+                similarity = _estimate_jaccard(packed, self.signatures[note_id])
+                if similarity >= threshold and (best is None or similarity > best[1]):
+                    best = (note_id, similarity)
+        return best
+
+
+def _pack(signature: List[int]) -> int:
+    """每个哈希值只保留最低8位，拼成一个整数"""
+    return int.from_bytes(bytes(value & 0xFF for value in signature), 'little')
+
+
+def _estimate_jaccard(left: int, right: int) -> float:
+    """由8位截断签名估计Jaccard相似度（相同的字节异或后为0，扣除1/256的随机碰撞）"""
+    matches = (left ^ right).to_bytes(NUM_PERM, 'little').count(0) / NUM_PERM
+    return max(0.0, (matches - 1 / 256) / (1 - 1 / 256))
+
+
+class NearDuplicateIndex:
+    """近似重复笔记索引"""
+
+    def __init__(
+        self,
+        threshold: float = 0.7,
+        title_threshold: float = 0.9,
+        min_tokens: int = 8,
+        use_media: bool = True
+    ):
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self.min_tokens = min_tokens
+        self.use_media = use_media
+
+        self._text = _MinHashLSH()
+        self._title = _MinHashLSH()
+        self._media: Dict[str, str] = {}
+        self._note_media: Dict[str, Tuple[str, ...]] = {}
+        # 所有登记过的笔记 -> (作者ID, 封面文件ID)，短文字匹配时用来佐证
+        self._notes: Dict[str, Tuple[str, str]] = {}
+        # 被判定为重复的笔记 -> 原笔记
+        self.duplicates: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self._notes
+
+    # ---------- 签名 ----------
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return ngram_tokenize(strip_entities(text))
+
+    def _signature(self, text: str) -> Tuple[Optional[List[int]], bool]:
+        """返回 (签名, 是否太短)；没有文字时签名为None"""
+        tokens = self._tokens(text)
+        if not tokens:
+            return None, False
+        return minhash(tokens), len(tokens) < self.min_tokens
+
+    def _media_ids(self, note) -> Tuple[str, ...]:
+        if not self.use_media:
+            return ()
+        ids = (media_file_id(media.url) for media in (getattr(note, 'media_list', None) or []) if media.url)
+        return tuple(dict.fromkeys(file_id for file_id in ids if file_id))
+
+    # ---------- 查询与登记 ----------
+
+    def _note_signatures(self, note) -> Tuple[Optional[List[int]], bool, Optional[List[int]], bool]:
+        """(标题签名, 标题太短, 正文签名, 正文太短)，没有正文时正文签名为None"""
+        title = getattr(note, 'title', '') or ''
+        content = getattr(note, 'content', '') or ''
+        title_signature, title_short = self._signature(title)
+        text_signature, text_short = None, False
+        if content:
+            text_signature, text_short = self._signature(f"{title}\n{content}")
+        return title_signature, title_short, text_signature, text_short
+
+    def _identity(self, note, media_ids: Tuple[str, ...]) -> Tuple[str, str]:
+        """(作者ID, 封面文件ID)"""
+        cover = media_ids[0] if media_ids else ''
+        if not cover:
+            media_list = getattr(note, 'media_list', None) or []
+            cover = media_file_id(media_list[0].url) if media_list and media_list[0].url else ''
+        return getattr(note, 'author_id', '') or '', cover
+
+    def _corroborated_by(self, identity: Tuple[str, str]) -> Callable[[str], bool]:
+        """短文字匹配的佐证：候选笔记与当前笔记作者相同或封面相同"""
+        author, cover = identity
+
+        def accept(note_id: str) -> bool:
+            other_author, other_cover = self._notes.get(note_id, ('', ''))
+            return bool((author and author == other_author) or (cover and cover == other_cover))
+        return accept
+
+    def _match(
+        self,
+        note_id: str,
+        media_ids: Tuple[str, ...],
+        signatures,
+        has_content: bool,
+        identity: Tuple[str, str]
+    ) -> Optional[DuplicateMatch]:
+        for file_id in media_ids:
+            owner = self._media.get(file_id)
+            if owner is not None and owner != note_id:
+                return DuplicateMatch(owner, 1.0, REASON_MEDIA)
+
+        title_signature, title_short, text_signature, text_short = signatures
+        if has_content:
+            signature, short, threshold, index, reason = text_signature, text_short, self.threshold, self._text, REASON_TEXT
+        else:
+            # 列表预览只有标题，要求几乎完全相同
+            signature, short, threshold, index, reason = title_signature, title_short, self.title_threshold, self._title, REASON_TITLE
+        if signature is None:
+            return None
+
+        if short:
+            found = index.nearest(signature, 1.0, note_id, self._corroborated_by(identity))
+        else:
+            found = index.nearest(signature, threshold, note_id)
+        return DuplicateMatch(found[0], found[1], reason) if found else None
+
+    def find(self, note) -> Optional[DuplicateMatch]:
+        """查找与笔记（详情或列表预览）重复的已有笔记，不修改索引"""
+        media_ids = self._media_ids(note)
+        return self._match(
+            note.note_id or '', media_ids, self._note_signatures(note), bool(getattr(note, 'content', '')),
+            self._identity(note, media_ids)
+        )
+
+    def is_duplicate(self, note) -> bool:
+        return self.find(note) is not None
+
+    def add(self, note) -> Optional[DuplicateMatch]:
+        """登记笔记并返回它重复的已有笔记（没有时返回None）；重复的笔记同样会被登记"""
+        note_id = note.note_id
+        if not note_id:
+            return None
+
+        media_ids = self._media_ids(note)
+        signatures = self._note_signatures(note)
+        identity = self._identity(note, media_ids)
+        match = self._match(note_id, media_ids, signatures, bool(getattr(note, 'content', '')), identity)
+        if match is not None:
+            self.duplicates[note_id] = match.note_id
+
+        self._notes[note_id] = identity
+        title_signature, _, text_signature, _ = signatures
+        if title_signature is not None:
+            self._title.add(note_id, title_signature)
+        if text_signature is not None:
+            self._text.add(note_id, text_signature)
+
+        if media_ids:
+            self._note_media[note_id] = media_ids
+            for file_id in media_ids:
+                self._media.setdefault(file_id, note_id)
+        return match
+
+    def remove(self, note_id: str):
+        self._notes.pop(note_id, None)
+        self._title.remove(note_id)
+        self._text.remove(note_id)
+        self.duplicates.pop(note_id, None)
+        for file_id in self._note_media.pop(note_id, ()):
+            if self._media.get(file_id) == note_id:
+                del self._media[file_id]
+
+    def handle_detail_event(self, event):
+        """DETAIL_LOADED事件处理器，可直接订阅到EventBus"""
+        detail = event.data.get('detail')
+        if detail is not None:
+            match = self.add(detail)
+            if match is not None:
+                print(f"笔记 {detail.note_id} 与 {match.note_id} 重复 ({match.reason}, 相似度{match.similarity:.2f})")
+
+
+__all__ = ['NearDuplicateIndex', 'DuplicateMatch', 'minhash', 'media_file_id']
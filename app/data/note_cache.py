@@ -0,0 +1,157 @@
+"""
+笔记去重与新鲜度缓存
+按note_id记录最近一次的互动快照和捕获时间，LRU + TTL淘汰，并受内存预算约束；
+多个采集线程（asyncio.to_thread）会共用同一个缓存，读写都在锁内进行
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+# 互动快照字段顺序，与RedNoteInteraction保持一致
+INTERACTION_FIELDS = ('like_count', 'comment_count', 'collect_count', 'share_count')
+
+# 单条缓存的估算开销（字节）：条目对象 + 快照元组 + OrderedDict节点
+_ENTRY_OVERHEAD = 240
+
+
+class NoteStatus:
+    """缓存比对结果"""
+    NEW = "new"              # 第一次见到或已过期
+    UNCHANGED = "unchanged"  # 互动数据未变化
+    CHANGED = "changed"      # 互动数据有变化
+
+
+class NoteCacheEntry:
+    """单条缓存：互动快照 + 捕获时间"""
+
+    __slots__ = ('note_id', 'counts', 'capture_time', 'size')
+
+    def __init__(self, note_id: str, counts: Tuple[int, ...], capture_time: float):
+        self.note_id = note_id
+        self.counts = counts
+        self.capture_time = capture_time
+        self.size = _ENTRY_OVERHEAD + len(note_id)
+
+
+class NoteCache:
+    """note_id -> 最近互动快照的LRU/TTL缓存"""
+
+    def __init__(self, max_entries: int = 100_000, ttl: float = 6 * 3600, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, NoteCacheEntry]' = OrderedDict()
+        self._bytes = 0
+        # check()内部会调用get()/put()，用可重入锁
+        self._lock = threading.RLock()
+
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.changes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, note_id: str) -> bool:
+        return self.get(note_id) is not None
+
+    @property
+    def memory_usage(self) -> int:
+        """估算的内存占用（字节）"""
+        return self._bytes
+
+    def get(self, note_id: str, now: Optional[float] = None) -> Optional[NoteCacheEntry]:
+        """获取未过期的缓存条目，并刷新LRU位置"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(note_id)
+            if entry is None:
+                return None
+
+            if now - entry.capture_time > self.ttl:
+                self._remove(note_id)
+                return None
+
+            self._entries.move_to_end(note_id)
+            return entry
+
+    def check(self, note_id: str, counts: Tuple[int, ...], now: Optional[float] = None) -> Tuple[str, Dict[str, int]]:
+        """比对互动快照并更新缓存，返回 (状态, 变化量)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self.get(note_id, now)
+
+            if entry is None:
+                self.misses += 1
+                self.put(note_id, counts, now)
+                return NoteStatus.NEW, {}
+
+            if entry.counts == counts:
+                # 未变化的笔记不刷新捕获时间，让TTL决定多久后重新完整解析
+                self.hits += 1
+                return NoteStatus.UNCHANGED, {}
+
+            delta = {
+                field: new - old
+                for field, old, new in zip(INTERACTION_FIELDS, entry.counts, counts)
+                if new != old
+            }
+            entry.counts = counts
+            entry.capture_time = now
+            self.changes += 1
+            return NoteStatus.CHANGED, delta
+
+    def put(self, note_id: str, counts: Tuple[int, ...], capture_time: Optional[float] = None):
+        """写入或覆盖缓存条目"""
+        capture_time = time.time() if capture_time is None else capture_time
+        entry = NoteCacheEntry(note_id, counts, capture_time)
+
+        with self._lock:
+            if note_id in self._entries:
+                self._remove(note_id)
+
+            self._entries[note_id] = entry
+            self._bytes += entry.size
+            self._enforce_budget()
+
+    def discard(self, note_id: str):
+        """移除缓存条目"""
+        with self._lock:
+            if note_id in self._entries:
+                self._remove(note_id)
+
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """清理所有过期条目，返回清理数量"""
+        now = time.time() if now is None else now
+        with self._lock:
+            expired = [nid for nid, entry in self._entries.items() if now - entry.capture_time > self.ttl]
+            for note_id in expired:
+                self._remove(note_id)
+            self.evictions += len(expired)
+        return len(expired)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, note_id: str):
+        """调用方需持有锁"""
+        entry = self._entries.pop(note_id)
+        self._bytes -= entry.size
+
+    def _enforce_budget(self):
+        """超出条目数或内存预算时按LRU淘汰（调用方需持有锁）"""
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+
+__all__ = ['NoteCache', 'NoteCacheEntry', 'NoteStatus', 'INTERACTION_FIELDS']
@@ -0,0 +1,494 @@
+"""
+本地全文检索
+笔记（标题、正文、标签、话题）和评论文本的倒排索引，BM25打分。
+中文默认按字符二元组切分，也可以传入自定义分词函数；
+新文档先写入内存缓冲段，攒够后封存成不可变段，段数过多时合并，删除/更新的文档在合并时清理
+"""
+
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from ..utils import json_codec
+
+
+Tokenizer = Callable[[str], List[str]]
+TimeValue = Union[int, float, str, datetime, None]
+
+KIND_NOTE = 'note'
+KIND_COMMENT = 'comment'
+_KINDS = (KIND_NOTE, KIND_COMMENT)
+
+# CJK字符连续段 / 字母数字单词
+_TOKEN_PATTERN = re.compile(r'[㐀-鿿豈-﫿]+|[0-9a-z]+(?:[._\'-][0-9a-z]+)*')
+_CJK_PATTERN = re.compile(r'[㐀-鿿豈-﫿]')
+_MAX_TF = 0xFFFF
+
+
+def ngram_tokenize(text: str, n: int = 2) -> List[str]:
+    """默认分词：中文按字符n元组切分（不足n个字时保留整段），英文和数字按单词"""
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if not _CJK_PATTERN.match(run):
+            tokens.append(run)
+        elif len(run) <= n:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return tokens
+
+
+def to_seconds(value: TimeValue) -> int:
+    """把时间（秒/毫秒时间戳、数字字符串、datetime）统一成秒级时间戳，无法识别时返回0"""
+    if value is None or value == '':
+        return 0
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return 0
+    # 13位的是毫秒时间戳
+    return int(number / 1000 if number > 1e11 else number)
+
+
+class SearchHit(NamedTuple):
+    """检索结果"""
+    note_id: str
+    score: float
+    kind: str
+    key: str             # 笔记为note_id，评论为comment_id
+
+
+class _Segment:
+    """一个索引段：词 -> (文档号数组, 词频数组)，文档号递增"""
+
+    __slots__ = ('postings', 'doc_count')
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.doc_count = 0
+
+    @classmethod
+    def merge(cls, segments: List['_Segment'], remap: Optional[Dict[int, int]] = None) -> '_Segment':
+        """按顺序合并相邻段（文档号区间不重叠）；remap给出保留文档的新文档号，不在其中的已删除文档被丢弃"""
+        merged = cls()
+        for segment in segments:
+            for term, (docs, tfs) in segment.postings.items():
+                entry = merged.postings.get(term)
+                if entry is None:
+                    entry = merged.postings[term] = (array('I'), array('H'))
+                if remap is not None:
+                    for doc, tf in zip(docs, tfs):
+                        new_doc = remap.get(doc)
+                        if new_doc is not None:
+                            entry[0].append(new_doc)
+                            entry[1].append(tf)
+                else:
+                    entry[0].extend(docs)
+                    entry[1].extend(tfs)
+        merged.doc_count = len(remap) if remap is not None else sum(segment.doc_count for segment in segments)
+        merged.postings = {term: entry for term, entry in merged.postings.items() if entry[0]}
+        return merged
+
+
+class _BufferSegment:
+    """内存缓冲段：词 -> [文档号, 词频, 文档号, 词频, ...]，写入比array快，封存时再转成紧凑数组"""
+
+    __slots__ = ('postings', 'doc_count')
+
+    def __init__(self):
+        self.postings: Dict[str, List[int]] = {}
+        self.doc_count = 0
+
+    def add(self, doc: int, term_freqs: Dict[str, int]):
+        postings = self.postings
+        for term, tf in term_freqs.items():
+            entry = postings.get(term)
+            if entry is None:
+                postings[term] = [doc, tf if tf < _MAX_TF else _MAX_TF]
+            else:
+                entry += (doc, tf if tf < _MAX_TF else _MAX_TF)
+        self.doc_count += 1
+
+    def get(self, term: str) -> Optional[Tuple[List[int], List[int]]]:
+        entry = self.postings.get(term)
+        return None if entry is None else (entry[0::2], entry[1::2])
+
+    def freeze(self) -> _Segment:
+        segment = _Segment()
+        segment.doc_count = self.doc_count
+        segment.postings = {
+            term: (array('I', entry[0::2]), array('H', entry[1::2]))
+            for term, entry in self.postings.items()
+        }
+        return segment
+
+
+class SearchIndex:
+    """笔记与评论的倒排索引"""
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer = ngram_tokenize,
+        segment_docs: int = 50000,
+        merge_factor: int = 8,
+        title_weight: int = 2,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.tokenizer = tokenizer
+        self.segment_docs = segment_docs
+        self.merge_factor = merge_factor
+        self.title_weight = title_weight
+        self.k1 = k1
+        self.b = b
+
+        self._segments: List[_Segment] = []
+        self._buffer = _BufferSegment()
+        self._deleted: Set[int] = set()
+
+        # 文档元数据，按文档号存放
+        self._doc_len = array('I')
+        self._doc_time = array('q')
+        self._doc_kind = array('B')
+        self._doc_author = array('I')
+        self._doc_note = array('I')
+        self._doc_key: List[str] = []
+        self._total_len = 0
+
+        # 共享表
+        self._note_ids: List[str] = []
+        self._note_index: Dict[str, int] = {}
+        self._authors: List[str] = []
+        self._author_index: Dict[str, int] = {}
+        self._key_to_doc: Dict[Tuple[int, str], int] = {}
+        # 笔记号 -> 该笔记下的评论ID，重新索引或删除笔记时找到它的评论
+        self._note_comments: Dict[int, Set[str]] = {}
+
+    # ---------- 统计 ----------
+
+    def __len__(self) -> int:
+        """有效文档数"""
+        return len(self._doc_len) - len(self._deleted)
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._segments) + (1 if self._buffer.doc_count else 0)
+
+    def __contains__(self, note_id: str) -> bool:
+        return (0, note_id) in self._key_to_doc
+
+    # ---------- 写入 ----------
+
+    def add_note(self, note, include_comments: bool = True) -> int:
+        """索引一个笔记（RedNoteDetail/LazyRedNoteDetail/RedNotePreview），已存在时替换；返回索引的文档数
+
+        带评论的笔记（详情）重新索引时，旧评论整体换成新评论；预览没有评论，保留已索引的评论
+        """
+        note_id = note.note_id or ''
+        added = 0
+        if note_id:
+            added += self._add_note_doc(note)
+        comments = getattr(note, 'comments', None) if include_comments else None
+        if comments is not None:
+            self._remove_comments(note_id)
+            added += self.add_comments(note_id, comments)
+        return added
+
+    def _add_note_doc(self, note) -> int:
+        title = getattr(note, 'title', '') or ''
+        parts = [title] * self.title_weight
+        parts.append(getattr(note, 'content', '') or '')
+        parts.extend(getattr(note, 'tags', None) or [])
+        parts.extend(getattr(note, 'topic_list', None) or [])
+
+        self._add_doc(
+            KIND_NOTE, note.note_id, note.note_id, '\n'.join(parts),
+            getattr(note, 'author_id', '') or '', to_seconds(getattr(note, 'publish_time', None))
+        )
+        return 1
+
+    def add_comments(self, note_id: str, comments: Iterable) -> int:
+        """索引笔记下的评论（RedNoteComment/CompactComment或CommentStore），已存在的评论会被替换"""
+        added = 0
+        for comment in comments:
+            if not comment.comment_id:
+                continue
+            self._add_doc(
+                KIND_COMMENT, comment.comment_id, note_id, comment.content or '',
+                comment.user_id or '', to_seconds(comment.create_time)
+            )
+            added += 1
+        return added
+
+    def remove_note(self, note_id: str, include_comments: bool = True) -> bool:
+        """删除笔记（以及它的评论）"""
+        doc = self._key_to_doc.pop((0, note_id), None)
+        if doc is None:
+            return False
+        self._delete(doc)
+
+        if include_comments:
+            self._remove_comments(note_id)
+        return True
+
+    def _remove_comments(self, note_id: str) -> int:
+        """删除笔记下已索引的全部评论，返回删除数量"""
+        note_index = self._note_index.get(note_id)
+        keys = self._note_comments.pop(note_index, None) if note_index is not None else None
+        removed = 0
+        for key in keys or ():
+            doc = self._key_to_doc.get((1, key))
+            if doc is not None and self._doc_note[doc] == note_index:
+                del self._key_to_doc[(1, key)]
+                self._delete(doc)
+                removed += 1
+        return removed
+
+    def handle_detail_event(self, event):
+        """DETAIL_LOADED事件处理器，可直接订阅到EventBus"""
+        detail = event.data.get('detail')
+        if detail is not None:
+            self.add_note(detail)
+
+    def add_dump_file(self, path: str) -> int:
+        """索引采集脚本保存的JSON文件（list_previews/detail_previews），返回索引的文档数"""
+        from ..models.rednote import RedNoteDetail, RedNotePreview
+
+        with open(path, 'rb') as f:
+            data = json_codec.load(f)
+
+        added = 0
+        for item in data.get('list_previews', []):
+            added += self.add_note(RedNotePreview(**item))
+        for item in data.get('detail_previews', []):
+            added += self.add_note(RedNoteDetail(**item))
+        return added
+
+    def _add_doc(self, kind: str, key: str, note_id: str, text: str, author_id: str, ts: int):
+        kind_code = _KINDS.index(kind)
+        old = self._key_to_doc.get((kind_code, key))
+        if old is not None:
+            self._delete(old)
+
+        tokens = self.tokenizer(text)
+        doc = len(self._doc_len)
+        self._key_to_doc[(kind_code, key)] = doc
+        self._doc_len.append(len(tokens))
+        self._doc_time.append(ts)
+        self._doc_kind.append(kind_code)
+        note_index = self._intern(note_id, self._note_ids, self._note_index)
+        self._doc_author.append(self._intern(author_id, self._authors, self._author_index))
+        self._doc_note.append(note_index)
+        self._doc_key.append(key)
+        if kind_code == 1:
+            self._note_comments.setdefault(note_index, set()).add(key)
+        self._total_len += len(tokens)
+
+        self._buffer.add(doc, Counter(tokens))
+        if self._buffer.doc_count >= self.segment_docs:
+            self.flush()
+
+    def _delete(self, doc: int):
+        if doc not in self._deleted:
+            self._deleted.add(doc)
+            self._total_len -= self._doc_len[doc]
+
+    @staticmethod
+    def _intern(value: str, table: List[str], index: Dict[str, int]) -> int:
+        position = index.get(value)
+        if position is None:
+            position = index[value] = len(table)
+            table.append(value)
+        return position
+
+    # ---------- 段管理 ----------
+
+    def flush(self):
+        """封存内存缓冲段，段数超过merge_factor时触发合并"""
+        if not self._buffer.doc_count:
+            return
+        self._segments.append(self._buffer.freeze())
+        self._buffer = _BufferSegment()
+        self._maybe_merge()
+
+    def _maybe_merge(self):
+        """分层合并：末尾merge_factor个段大小相近时合并成一个"""
+        while len(self._segments) >= self.merge_factor:
+            tail = self._segments[-self.merge_factor:]
+            if tail[0].doc_count > 2 * sum(segment.doc_count for segment in tail[1:]):
+                break
+            self._merge_tail(self.merge_factor)
+
+    def merge(self):
+        """把所有段合并成一个，并清理已删除的文档"""
+        self.flush()
+        if self._segments:
+            self._merge_tail(len(self._segments))
+
+    def _merge_tail(self, count: int):
+        """合并末尾count个段并压缩文档号
+
+        只在缓冲段为空时调用：每个段覆盖连续的doc_count个文档号，末尾的段正好是文档号的最后一段区间，
+        区间内删除的文档从倒排、元数据和_deleted里一起清掉，保留的文档依次前移
+        """
+        tail = self._segments[-count:]
+        first = len(self._doc_len) - sum(segment.doc_count for segment in tail)
+        remap = self._compact(first)
+        self._segments[-count:] = [_Segment.merge(tail, remap)]
+
+    def _compact(self, first: int) -> Optional[Dict[int, int]]:
+        """压缩文档号first及之后的元数据，返回 {旧文档号: 新文档号}；区间内没有删除的文档时返回None"""
+        deleted = self._deleted
+        if not any(doc >= first for doc in deleted):
+            return None
+
+        remap: Dict[int, int] = {}
+        for doc in range(first, len(self._doc_len)):
+            if doc not in deleted:
+                remap[doc] = first + len(remap)
+
+        for name in ('_doc_len', '_doc_time', '_doc_kind', '_doc_author', '_doc_note'):
+            column = getattr(self, name)
+            kept = array(column.typecode, (column[doc] for doc in remap))
+            del column[first:]
+            column.extend(kept)
+        keys = [self._doc_key[doc] for doc in remap]
+        del self._doc_key[first:]
+        self._doc_key.extend(keys)
+
+        for new_doc in remap.values():
+            self._key_to_doc[(self._doc_kind[new_doc], self._doc_key[new_doc])] = new_doc
+        self._deleted = {doc for doc in deleted if doc < first}
+        return remap
+
+    # ---------- 查询 ----------
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        author_id: Union[str, Iterable[str], None] = None,
+        since: TimeValue = None,
+        until: TimeValue = None,
+        kind: Optional[str] = None,
+        match_all: bool = True
+    ) -> List[SearchHit]:
+        """BM25检索
+
+        author_id可以是单个或多个作者ID（评论按评论者过滤），since/until按发布或评论时间过滤，
+        kind限定'note'或'comment'；match_all为True时要求命中全部查询词
+        """
+        terms = list(dict.fromkeys(self.tokenizer(query)))
+        live = len(self)
+        if not terms or not live:
+            return []
+
+        postings = {term: self._postings(term) for term in terms}
+        if match_all and any(not lists for lists in postings.values()):
+            return []
+
+        accept = self._filter(author_id, since, until, kind)
+        avg_len = self._total_len / live if live else 1.0
+        k1, b = self.k1, self.b
+        doc_len = self._doc_len
+        deleted = self._deleted
+        scores: Dict[int, float] = {}
+
+        idfs = {}
+        for term in terms:
+            df = sum(len(docs) for docs, _ in postings[term])
+            if df:
+                idfs[term] = math.log(1 + (live - df + 0.5) / (df + 0.5))
+
+        def bm25(doc: int, term: str, tf: int) -> float:
+            norm = k1 * (1 - b + b * doc_len[doc] / avg_len)
+            return idfs[term] * tf * (k1 + 1) / (tf + norm)
+
+        if match_all:
+            # 从文档频率最低的词的倒排开始，其余词只按候选文档二分查找，不展开整条倒排
+            ordered = sorted(terms, key=lambda t: sum(len(docs) for docs, _ in postings[t]))
+            rarest = ordered[0]
+            for docs, tfs in postings[rarest]:
+                for doc, tf in zip(docs, tfs):
+                    if doc in deleted or (accept is not None and not accept(doc)):
+                        continue
+                    scores[doc] = bm25(doc, rarest, tf)
+            for term in ordered[1:]:
+                lists = postings[term]
+                next_scores = {}
+                for doc, score in scores.items():
+                    tf = self._lookup(lists, doc)
+                    if tf:
+                        next_scores[doc] = score + bm25(doc, term, tf)
+                scores = next_scores
+                if not scores:
+                    return []
+        else:
+            for term in idfs:
+                for docs, tfs in postings[term]:
+                    for doc, tf in zip(docs, tfs):
+                        if doc in deleted or (accept is not None and not accept(doc)):
+                            continue
+                        scores[doc] = scores.get(doc, 0.0) + bm25(doc, term, tf)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            SearchHit(self._note_ids[self._doc_note[doc]], score, _KINDS[self._doc_kind[doc]], self._doc_key[doc])
+            for doc, score in best
+        ]
+
+    @staticmethod
+    def _lookup(lists: List[Tuple[Sequence[int], Sequence[int]]], doc: int) -> int:
+        """在按文档号递增的倒排里二分查找文档的词频，没有时返回0"""
+        for docs, tfs in lists:
+            if docs and docs[0] <= doc <= docs[-1]:
+                position = bisect_left(docs, doc)
+                if docs[position] == doc:
+                    return tfs[position]
+        return 0
+
+    def _postings(self, term: str) -> List[Tuple[array, array]]:
+        lists = []
+        for segment in self._segments:
+            entry = segment.postings.get(term)
+            if entry is not None:
+                lists.append(entry)
+        entry = self._buffer.get(term)
+        if entry is not None:
+            lists.append(entry)
+        return lists
+
+    def _filter(self, author_id, since: TimeValue, until: TimeValue, kind: Optional[str]):
+        """把过滤条件编译成按文档号判断的函数，没有条件时返回None"""
+        checks = []
+        if author_id is not None:
+            authors = [author_id] if isinstance(author_id, str) else list(author_id)
+            codes = {self._author_index[a] for a in authors if a in self._author_index}
+            doc_author = self._doc_author
+            checks.append(lambda doc: doc_author[doc] in codes)
+        if since is not None or until is not None:
+            start = to_seconds(since) if since is not None else None
+            end = to_seconds(until) if until is not None else None
+            doc_time = self._doc_time
+            checks.append(lambda doc: (start is None or doc_time[doc] >= start) and (end is None or doc_time[doc] <= end))
+        if kind is not None:
+            kind_code = _KINDS.index(kind)
+            doc_kind = self._doc_kind
+            checks.append(lambda doc: doc_kind[doc] == kind_code)
+
+        if not checks:
+            return None
+        if len(checks) == 1:
+            return checks[0]
+        return lambda doc: all(check(doc) for check in checks)
+
+
+__all__ = ['SearchIndex', 'SearchHit', 'ngram_tokenize', 'to_seconds', 'KIND_NOTE', 'KIND_COMMENT']
@@ -0,0 +1,163 @@
+"""
+话题倒排索引
+话题 -> 按时间排序的 (时间, 笔记ID) 列表；话题来自topic_list、tag_list和正文内嵌的#话题[话题]#，
+可以直接回答"最近24小时话题X下的笔记"，并按时间窗口统计上升最快的话题
+"""
+
+import heapq
+import time
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils.text_extract import extract_topics
+from .search_index import TimeValue, to_seconds
+
+
+def normalize_topic(topic: str) -> str:
+    """统一话题写法：去掉首尾空白和#，英文小写"""
+    return topic.strip().strip('#').strip().lower()
+
+
+class TopicIndex:
+    """话题到笔记的索引"""
+
+    def __init__(self):
+        self._postings: Dict[str, List[Tuple[int, str]]] = {}
+        self._note_topics: Dict[str, Tuple[int, Set[str]]] = {}
+
+    def __len__(self) -> int:
+        """话题数量"""
+        return len(self._postings)
+
+    def __contains__(self, topic: str) -> bool:
+        return normalize_topic(topic) in self._postings
+
+    # ---------- 写入 ----------
+
+    def note_topics(self, note) -> Set[str]:
+        """笔记的全部话题：topic_list + tags + 标题和正文中的内嵌话题"""
+        topics = list(getattr(note, 'topic_list', None) or [])
+        topics.extend(getattr(note, 'tags', None) or [])
+        topics.extend(extract_topics(getattr(note, 'title', '') or ''))
+        topics.extend(extract_topics(getattr(note, 'content', '') or ''))
+        return {name for name in (normalize_topic(topic) for topic in topics) if name}
+
+    def add_note(self, note, ts: TimeValue = None) -> int:
+        """登记笔记的话题，时间默认取发布时间，没有时取捕获时间；已登记的笔记会被更新。返回话题数"""
+        note_id = note.note_id
+        if not note_id:
+            return 0
+
+        stamp = to_seconds(ts) or to_seconds(getattr(note, 'publish_time', None)) \
+            or to_seconds(getattr(note, 'capture_time', None)) or int(time.time())
+        return self.add(note_id, self.note_topics(note), stamp)
+
+    def add(self, note_id: str, topics: Iterable[str], ts: int) -> int:
+        """直接登记 笔记ID + 话题 + 时间"""
+        topics = {name for name in (normalize_topic(topic) for topic in topics) if name}
+        self.remove_note(note_id)
+        for topic in topics:
+            insort(self._postings.setdefault(topic, []), (ts, note_id))
+        self._note_topics[note_id] = (ts, topics)
+        return len(topics)
+
+    def remove_note(self, note_id: str) -> bool:
+        entry = self._note_topics.pop(note_id, None)
+        if entry is None:
+            return False
+        ts, topics = entry
+        for topic in topics:
+            postings = self._postings.get(topic)
+            if not postings:
+                continue
+            position = bisect_left(postings, (ts, note_id))
+            if position < len(postings) and postings[position] == (ts, note_id):
+                del postings[position]
+            if not postings:
+                del self._postings[topic]
+        return True
+
+    def handle_detail_event(self, event):
+        """DETAIL_LOADED事件处理器，可直接订阅到EventBus"""
+        detail = event.data.get('detail')
+        if detail is not None:
+            self.add_note(detail)
+
+    # ---------- 查询 ----------
+
+    def count(self, topic: str, since: TimeValue = None, until: TimeValue = None) -> int:
+        """话题下（时间范围内）的笔记数"""
+        postings = self._postings.get(normalize_topic(topic), [])
+        start, end = self._bounds(postings, since, until)
+        return end - start
+
+    def notes(
+        self,
+        topic: str,
+        since: TimeValue = None,
+        until: TimeValue = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """话题下（时间范围内）的笔记ID，最新的在前"""
+        postings = self._postings.get(normalize_topic(topic), [])
+        start, end = self._bounds(postings, since, until)
+        if limit is not None:
+            start = max(start, end - limit)
+        return [note_id for _, note_id in reversed(postings[start:end])]
+
+    def recent(
+        self,
+        topic: str,
+        window: float = 24 * 3600,
+        now: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> List[str]:
+        """最近window秒内话题下的笔记"""
+        now = time.time() if now is None else now
+        return self.notes(topic, since=now - window, until=now, limit=limit)
+
+    def topics_of(self, note_id: str) -> Set[str]:
+        entry = self._note_topics.get(note_id)
+        return set(entry[1]) if entry else set()
+
+    def top_topics(self, limit: int = 20, since: TimeValue = None, until: TimeValue = None) -> List[Tuple[str, int]]:
+        """（时间范围内）笔记数最多的话题"""
+        counts = (
+            (topic, self._count(postings, since, until))
+            for topic, postings in self._postings.items()
+        )
+        return heapq.nlargest(limit, ((topic, n) for topic, n in counts if n), key=lambda item: item[1])
+
+    def trending(
+        self,
+        window: float = 24 * 3600,
+        limit: int = 20,
+        min_count: int = 3,
+        now: Optional[float] = None
+    ) -> List[Tuple[str, int, float]]:
+        """上升最快的话题：比较最近一个窗口和前一个窗口的笔记数，返回 (话题, 本窗口笔记数, 增长倍数)"""
+        now = time.time() if now is None else now
+        current_start = now - window
+        previous_start = now - 2 * window
+
+        scored = []
+        for topic, postings in self._postings.items():
+            current = self._count(postings, current_start, now)
+            if current < min_count:
+                continue
+            previous = self._count(postings, previous_start, current_start - 1)
+            scored.append((topic, current, (current + 1) / (previous + 1)))
+        return heapq.nlargest(limit, scored, key=lambda item: (item[2], item[1]))
+
+    @staticmethod
+    def _bounds(postings: List[Tuple[int, str]], since: TimeValue, until: TimeValue) -> Tuple[int, int]:
+        start = 0 if since is None else bisect_left(postings, (to_seconds(since),))
+        end = len(postings) if until is None else bisect_right(postings, (to_seconds(until), '\U0010ffff'))
+        return start, max(start, end)
+
+    def _count(self, postings: List[Tuple[int, str]], since: TimeValue, until: TimeValue) -> int:
+        start, end = self._bounds(postings, since, until)
+        return end - start
+
+
+__all__ = ['TopicIndex', 'normalize_topic']
@@ -9,11 +9,23 @@ from .rednote import (
     RedNoteComment,
     RedNoteDetail
 )
+from .lazy_detail import LazyRedNoteDetail
+from .compact import (
+    CompactMedia,
+    CompactComment,
+    CompactPreview,
+    CompactDetail
+)
 
 __all__ = [
     'RedNotePreview',
     'RedNoteMedia',
     'RedNoteInteraction',
     'RedNoteComment',
-    'RedNoteDetail'
+    'RedNoteDetail',
+    'LazyRedNoteDetail',
+    'CompactMedia',
+    'CompactComment',
+    'CompactPreview',
+    'CompactDetail'
 ]
\ No newline at end of file
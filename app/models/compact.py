@@ -0,0 +1,396 @@
+"""
+紧凑笔记模型
+热路径（尤其是评论）使用的__slots__轻量对象：直接从API JSON构建并做类型转换，
+不经过pydantic校验；需要时可以无损转换为rednote中的pydantic模型
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .rednote import (
+    RedNoteComment,
+    RedNoteDetail,
+    RedNoteInteraction,
+    RedNoteMedia,
+    RedNotePreview,
+    _parse_count,
+    interaction_counts,
+)
+
+
+def _as_str(value) -> str:
+    return value if isinstance(value, str) else ('' if value is None else str(value))
+
+
+def _as_optional_int(value) -> Optional[int]:
+    return None if value is None else _parse_count(value)
+
+
+class _Compact:
+    """紧凑模型基类：按__slots__提供比较、repr和字典导出"""
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class CompactMedia(_Compact):
+    """多媒体信息"""
+    __slots__ = ('url', 'media_type', 'width', 'height')
+
+    def __init__(self, url: str, media_type: str, width: Optional[int] = None, height: Optional[int] = None):
+        self.url = url
+        self.media_type = media_type
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_model(cls, media: RedNoteMedia) -> 'CompactMedia':
+        return cls(media.url, media.media_type, media.width, media.height)
+
+    def to_model(self) -> RedNoteMedia:
+        return RedNoteMedia(url=self.url, media_type=self.media_type, width=self.width, height=self.height)
+
+
+class CompactComment(_Compact):
+    """评论数据"""
+    __slots__ = (
+        'comment_id', 'content', 'user_id', 'user_name', 'user_avatar',
+        'create_time', 'like_count', 'sub_comment_count'
+    )
+
+    def __init__(
+        self,
+        comment_id: str,
+        content: str,
+        user_id: str = "",
+        user_name: str = "",
+        user_avatar: str = "",
+        create_time: Optional[str] = None,
+        like_count: int = 0,
+        sub_comment_count: int = 0
+    ):
+        self.comment_id = comment_id
+        self.content = content
+        self.user_id = user_id
+        self.user_name = user_name
+        self.user_avatar = user_avatar
+        self.create_time = create_time
+        self.like_count = like_count
+        self.sub_comment_count = sub_comment_count
+
+    @classmethod
+    def from_api(cls, item: dict, is_sub: bool = False) -> 'CompactComment':
+        """从评论API的单条评论创建，字段转换与RedNoteDetail.from_comment_response一致"""
+        user_info = item.get('user_info', {})
+        return cls(
+            _as_str(item.get('id', '')),
+            _as_str(item.get('content', '')),
+            _as_str(user_info.get('user_id', '')),
+            _as_str(user_info.get('nickname', '')),
+            _as_str(user_info.get('image', '')),
+            str(item.get('create_time', '')),
+            _parse_count(item.get('like_count', 0)),
+            0 if is_sub else _parse_count(item.get('sub_comment_count', 0))
+        )
+
+    @classmethod
+    def from_model(cls, comment: RedNoteComment) -> 'CompactComment':
+        return cls(
+            comment.comment_id, comment.content, comment.user_id, comment.user_name,
+            comment.user_avatar, comment.create_time, comment.like_count, comment.sub_comment_count
+        )
+
+    def to_model(self) -> RedNoteComment:
+        return RedNoteComment.model_construct(**self.to_dict())
+
+
+class CompactPreview(_Compact):
+    """列表页笔记数据，互动数据直接展开为四个整数"""
+    __slots__ = (
+        'note_id', 'title', 'media_list', 'like_count', 'comment_count', 'collect_count', 'share_count',
+        'author_name', 'author_id', 'publish_time', 'capture_time', 'source_type'
+    )
+
+    def __init__(
+        self,
+        note_id: str,
+        title: str,
+        media_list: Tuple[CompactMedia, ...] = (),
+        counts: Tuple[int, int, int, int] = (0, 0, 0, 0),
+        author_name: str = "",
+        author_id: str = "",
+        publish_time: Optional[str] = None,
+        capture_time: Optional[datetime] = None,
+        source_type: str = "api"
+    ):
+        self.note_id = note_id
+        self.title = title
+        self.media_list = media_list
+        self.like_count, self.comment_count, self.collect_count, self.share_count = counts
+        self.author_name = author_name
+        self.author_id = author_id
+        self.publish_time = publish_time
+        self.capture_time = capture_time or datetime.now()
+        self.source_type = source_type
+
+    @property
+    def counts(self) -> Tuple[int, int, int, int]:
+        """互动快照 (点赞, 评论, 收藏, 分享)"""
+        return self.like_count, self.comment_count, self.collect_count, self.share_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['media_list'] = [media.to_dict() for media in self.media_list]
+        return data
+
+    @classmethod
+    def from_api(cls, api_item: dict) -> 'CompactPreview':
+        """从搜索/推荐API的单个item创建，字段取值与RedNotePreview.from_api_response一致"""
+        note_card = api_item.get('note_card', {})
+
+        media_list = []
+        cover = note_card.get('cover', {})
+        if cover and cover.get('url_default'):
+            media_list.append(CompactMedia(
+                cover['url_default'], 'image',
+                _as_optional_int(cover.get('height', 0)), _as_optional_int(cover.get('width', 0))
+            ))
+        for img in note_card.get('image_list', []):
+            for img_info in img.get('info_list', []):
+                if img_info.get('image_scene') == 'WB_DFT':
+                    media_list.append(CompactMedia(
+                        _as_str(img_info.get('url', '')), 'image',
+                        _as_optional_int(img.get('height', 0)), _as_optional_int(img.get('width', 0))
+                    ))
+
+        publish_time = None
+        for tag in note_card.get('corner_tag_info', []):
+            if tag.get('type') == 'publish_time':
+                publish_time = tag.get('text', '')
+                break
+
+        user_info = note_card.get('user', {})
+        return cls(
+            _as_str(api_item.get('id', '')),
+            _as_str(note_card.get('display_title', '')),
+            tuple(media_list),
+            interaction_counts(note_card.get('interact_info', {})),
+            _as_str(user_info.get('nickname', '')),
+            _as_str(user_info.get('user_id', '')),
+            publish_time
+        )
+
+    @classmethod
+    def from_model(cls, preview: RedNotePreview) -> 'CompactPreview':
+        interaction = preview.interaction
+        return cls(
+            preview.note_id,
+            preview.title,
+            tuple(CompactMedia.from_model(media) for media in preview.media_list),
+            (interaction.like_count, interaction.comment_count, interaction.collect_count, interaction.share_count),
+            preview.author_name,
+            preview.author_id,
+            preview.publish_time,
+            preview.capture_time,
+            preview.source_type
+        )
+
+    def to_model(self) -> RedNotePreview:
+        return RedNotePreview(
+            note_id=self.note_id,
+            title=self.title,
+            media_list=[media.to_model() for media in self.media_list],
+            interaction=RedNoteInteraction(
+                like_count=self.like_count,
+                comment_count=self.comment_count,
+                collect_count=self.collect_count,
+                share_count=self.share_count
+            ),
+            author_name=self.author_name,
+            author_id=self.author_id,
+            publish_time=self.publish_time,
+            capture_time=self.capture_time,
+            source_type=self.source_type
+        )
+
+
+class CompactDetail(_Compact):
+    """详情页笔记数据，评论保存为CompactComment列表"""
+    __slots__ = (
+        'note_id', 'title', 'content', 'media_list', 'like_count', 'comment_count', 'collect_count', 'share_count',
+        'author_id', 'author_name', 'author_avatar', 'publish_time', 'last_update_time', 'comments',
+        'tags', 'topic_list', 'location', 'capture_time', 'source_type', 'url'
+    )
+
+    def __init__(
+        self,
+        note_id: str,
+        title: str = "",
+        content: str = "",
+        media_list: Tuple[CompactMedia, ...] = (),
+        counts: Tuple[int, int, int, int] = (0, 0, 0, 0),
+        author_id: str = "",
+        author_name: str = "",
+        author_avatar: str = "",
+        publish_time: Optional[str] = None,
+        last_update_time: Optional[str] = None,
+        comments: Optional[List[CompactComment]] = None,
+        tags: Tuple[str, ...] = (),
+        topic_list: Tuple[str, ...] = (),
+        location: Optional[str] = None,
+        capture_time: Optional[datetime] = None,
+        source_type: str = "detail_page",
+        url: str = ""
+    ):
+        self.note_id = note_id
+        self.title = title
+        self.content = content
+        self.media_list = media_list
+        self.like_count, self.comment_count, self.collect_count, self.share_count = counts
+        self.author_id = author_id
+        self.author_name = author_name
+        self.author_avatar = author_avatar
+        self.publish_time = publish_time
+        self.last_update_time = last_update_time
+        self.comments = comments if comments is not None else []
+        self.tags = tags
+        self.topic_list = topic_list
+        self.location = location
+        self.capture_time = capture_time or datetime.now()
+        self.source_type = source_type
+        self.url = url
+
+    @property
+    def counts(self) -> Tuple[int, int, int, int]:
+        """互动快照 (点赞, 评论, 收藏, 分享)"""
+        return self.like_count, self.comment_count, self.collect_count, self.share_count
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['media_list'] = [media.to_dict() for media in self.media_list]
+        data['comments'] = [comment.to_dict() for comment in self.comments]
+        data['tags'] = list(self.tags)
+        data['topic_list'] = list(self.topic_list)
+        return data
+
+    @classmethod
+    def from_feed_response(cls, feed_data: dict) -> Optional['CompactDetail']:
+        """从feed API响应创建，字段取值与RedNoteDetail.from_feed_response一致"""
+        items = feed_data.get('data', {}).get('items', [])
+        if not items:
+            return None
+        note_card = items[0].get('note_card', {})
+
+        media_list = []
+        for img in note_card.get('image_list', []):
+            for img_info in img.get('info_list', []):
+                if img_info.get('image_scene') == 'WB_DFT':
+                    media_list.append(CompactMedia(
+                        _as_str(img_info.get('url', '')), 'image',
+                        _as_optional_int(img_info.get('width', 0)), _as_optional_int(img_info.get('height', 0))
+                    ))
+
+        video = note_card.get('video', {})
+        if video and video.get('media', {}).get('stream'):
+            stream_info = video['media']['stream']
+            if isinstance(stream_info, dict) and 'h264' in stream_info:
+                h264_info = stream_info['h264']
+                if isinstance(h264_info, dict) and h264_info.get('master_url'):
+                    media_list.append(CompactMedia(
+                        h264_info['master_url'], 'video',
+                        _as_optional_int(video.get('width', 0)), _as_optional_int(video.get('height', 0))
+                    ))
+
+        user_info = note_card.get('user', {})
+        publish_time = note_card.get('time', '')
+        last_update_time = note_card.get('last_update_time', '')
+
+        return cls(
+            _as_str(note_card.get('id', '')),
+            _as_str(note_card.get('title', '')),
+            _as_str(note_card.get('desc', '')),
+            tuple(media_list),
+            interaction_counts(note_card.get('interact_info', {})),
+            _as_str(user_info.get('user_id', '')),
+            _as_str(user_info.get('nickname', '')),
+            _as_str(user_info.get('avatar', '')),
+            str(publish_time) if publish_time else None,
+            str(last_update_time) if last_update_time else None,
+            tags=tuple(tag['tag_name'] for tag in note_card.get('tag_list', []) if tag.get('tag_name')),
+            topic_list=tuple(topic['name'] for topic in note_card.get('topic_list', []) if topic.get('name')),
+            source_type="feed_api"
+        )
+
+    def add_comment_response(self, comment_data: dict) -> int:
+        """追加一页评论API响应（主评论后紧跟其子评论），返回本页评论数"""
+        added = 0
+        for item in comment_data.get('data', {}).get('comments', []):
+            self.comments.append(CompactComment.from_api(item))
+            added += 1
+            for sub_item in item.get('sub_comments', []):
+                self.comments.append(CompactComment.from_api(sub_item, is_sub=True))
+                added += 1
+        self.comment_count = len(self.comments)
+        return added
+
+    @classmethod
+    def from_model(cls, detail: RedNoteDetail) -> 'CompactDetail':
+        interaction = detail.interaction
+        return cls(
+            detail.note_id,
+            detail.title,
+            detail.content,
+            tuple(CompactMedia.from_model(media) for media in detail.media_list),
+            (interaction.like_count, interaction.comment_count, interaction.collect_count, interaction.share_count),
+            detail.author_id,
+            detail.author_name,
+            detail.author_avatar,
+            detail.publish_time,
+            detail.last_update_time,
+            [CompactComment.from_model(comment) for comment in detail.comments],
+            tuple(detail.tags),
+            tuple(detail.topic_list),
+            detail.location,
+            detail.capture_time,
+            detail.source_type,
+            detail.url
+        )
+
+    def to_model(self) -> RedNoteDetail:
+        return RedNoteDetail(
+            note_id=self.note_id,
+            title=self.title,
+            content=self.content,
+            media_list=[media.to_model() for media in self.media_list],
+            interaction=RedNoteInteraction(
+                like_count=self.like_count,
+                comment_count=self.comment_count,
+                collect_count=self.collect_count,
+                share_count=self.share_count
+            ),
+            author_id=self.author_id,
+            author_name=self.author_name,
+            author_avatar=self.author_avatar,
+            publish_time=self.publish_time,
+            last_update_time=self.last_update_time,
+            comments=[comment.to_model() for comment in self.comments],
+            tags=list(self.tags),
+            topic_list=list(self.topic_list),
+            location=self.location,
+            capture_time=self.capture_time,
+            source_type=self.source_type,
+            url=self.url
+        )
+
+
+__all__ = ['CompactMedia', 'CompactComment', 'CompactPreview', 'CompactDetail']
@@ -0,0 +1,136 @@
+"""
+惰性笔记详情
+包装feed API的原始note_card，各字段在第一次访问时才解析并缓存；
+只看note_id、互动数据就丢弃的笔记几乎不产生解析开销。
+对外接口与RedNoteDetail一致（字段读写、model_dump、辅助方法），需要真正的模型时用to_detail()
+"""
+
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .rednote import (
+    RedNoteDetail,
+    feed_interaction,
+    feed_media_list,
+    feed_tags,
+    feed_topics,
+    interaction_counts,
+)
+
+
+def _timestamp(key: str) -> Callable[[dict], Optional[str]]:
+    def parse(note_card: dict) -> Optional[str]:
+        value = note_card.get(key, '')
+        return str(value) if value else None
+    return parse
+
+
+# 字段名 -> 从note_card解析该字段的函数，与RedNoteDetail.from_feed_response保持一致
+_SECTIONS: Dict[str, Callable[[dict], Any]] = {
+    'note_id': lambda card: card.get('id', ''),
+    'title': lambda card: card.get('title', ''),
+    'content': lambda card: card.get('desc', ''),
+    'media_list': feed_media_list,
+    'interaction': feed_interaction,
+    'author_id': lambda card: card.get('user', {}).get('user_id', ''),
+    'author_name': lambda card: card.get('user', {}).get('nickname', ''),
+    'author_avatar': lambda card: card.get('user', {}).get('avatar', ''),
+    'publish_time': _timestamp('time'),
+    'last_update_time': _timestamp('last_update_time'),
+    'comments': lambda card: [],
+    'tags': feed_tags,
+    'topic_list': feed_topics,
+    'location': lambda card: None,
+}
+
+
+class LazyRedNoteDetail:
+    """按需解析的RedNoteDetail视图"""
+
+    __slots__ = ('_note_card', '_values')
+
+    model_fields = RedNoteDetail.model_fields
+
+    def __init__(
+        self,
+        note_card: dict,
+        capture_time: Optional[datetime] = None,
+        source_type: str = "feed_api",
+        url: str = ""
+    ):
+        object.__setattr__(self, '_note_card', note_card)
+        object.__setattr__(self, '_values', {
+            'capture_time': capture_time or datetime.now(),
+            'source_type': source_type,
+            'url': url,
+        })
+
+    @classmethod
+    def from_feed_response(cls, feed_data: dict, note_cache=None) -> Optional['LazyRedNoteDetail']:
+        """从feed API响应创建，参数和返回值与RedNoteDetail.from_feed_response一致"""
+        items = feed_data.get('data', {}).get('items', [])
+        if not items:
+            return None
+
+        note_card = items[0].get('note_card', {})
+        if note_cache is not None and note_card.get('id'):
+            note_cache.put(note_card['id'], interaction_counts(note_card.get('interact_info', {})))
+        return cls(note_card)
+
+    def __getattr__(self, name: str):
+        # 只有在实例上找不到属性时才会进入这里
+        if name.startswith('_'):
+            raise AttributeError(name)
+        values = self._values
+        if name in values:
+            return values[name]
+        section = _SECTIONS.get(name)
+        if section is None:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = values[name] = section(self._note_card)
+        return value
+
+    def __setattr__(self, name: str, value):
+        if name not in self.model_fields:
+            raise AttributeError(f"'{type(self).__name__}' object has no field '{name}'")
+        self._values[name] = value
+
+    def __getstate__(self):
+        return self._note_card, dict(self._values)
+
+    def __setstate__(self, state):
+        # 支持copy/pickle，绕过只允许写字段的__setattr__
+        object.__setattr__(self, '_note_card', state[0])
+        object.__setattr__(self, '_values', state[1])
+
+    @property
+    def note_card(self) -> dict:
+        """原始note_card"""
+        return self._note_card
+
+    @property
+    def parsed_fields(self) -> Tuple[str, ...]:
+        """已经解析（或被赋值）的字段"""
+        return tuple(name for name in self.model_fields if name in self._values)
+
+    def to_detail(self) -> RedNoteDetail:
+        """解析全部字段，转换为RedNoteDetail"""
+        return RedNoteDetail(**{name: getattr(self, name) for name in self.model_fields})
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return self.to_detail().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        return self.to_detail().model_dump_json(**kwargs)
+
+    # 辅助方法只依赖字段，直接复用RedNoteDetail的实现
+    get_primary_image_url = RedNoteDetail.get_primary_image_url
+    has_video = RedNoteDetail.has_video
+    get_media_count = RedNoteDetail.get_media_count
+    get_comment_count = RedNoteDetail.get_comment_count
+
+    def __repr__(self):
+        return f"LazyRedNoteDetail(note_id={self.note_id!r}, parsed={list(self.parsed_fields)})"
+
+
+__all__ = ['LazyRedNoteDetail']
@@ -4,10 +4,35 @@
 """
 
 from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 from datetime import datetime
 
 
+def _parse_count(value) -> int:
+    """把API里的计数（数字、数字字符串、"1.2万"）转换为整数"""
+    if isinstance(value, int):
+        return value
+    if not value:
+        return 0
+    text = str(value).strip()
+    try:
+        if text.endswith('万'):
+            return int(float(text[:-1]) * 10000)
+        return int(float(text))
+    except ValueError:
+        return 0
+
+
+def interaction_counts(interact_info: dict) -> Tuple[int, int, int, int]:
+    """从interact_info提取互动快照 (点赞, 评论, 收藏, 分享)，不创建模型对象"""
+    return (
+        _parse_count(interact_info.get('liked_count', 0)),
+        _parse_count(interact_info.get('comment_count', 0)),
+        _parse_count(interact_info.get('collected_count', 0)),
+        _parse_count(interact_info.get('shared_count', interact_info.get('share_count', 0)))
+    )
+
+
 class RedNoteMedia(BaseModel):
     """多媒体信息"""
     url: str = Field(..., description="多媒体链接")
@@ -65,6 +90,62 @@ class RedNoteInteraction(BaseModel):
         use_enum_values = True
 
 
+# ---------- feed API的note_card分段解析（RedNoteDetail和LazyRedNoteDetail共用） ----------
+
+def feed_media_list(note_card: dict) -> List[RedNoteMedia]:
+    """解析图片和视频"""
+    media_list = []
+    image_list = note_card.get('image_list', [])
+    for img in image_list:
+        info_list = img.get('info_list', [])
+        for img_info in info_list:
+            if img_info.get('image_scene') == 'WB_DFT':
+                media_list.append(RedNoteMedia(
+                    url=img_info.get('url', ''),
+                    media_type='image',
+                    width=img_info.get('width', 0),
+                    height=img_info.get('height', 0)
+                ))
+
+    # 视频信息
+    video = note_card.get('video', {})
+    if video and video.get('media', {}).get('stream'):
+        stream_info = video['media']['stream']
+        if isinstance(stream_info, dict) and 'h264' in stream_info:
+            h264_info = stream_info['h264']
+            if isinstance(h264_info, dict) and h264_info.get('master_url'):
+                media_list.append(RedNoteMedia(
+                    url=h264_info['master_url'],
+                    media_type='video',
+                    width=video.get('width', 0),
+                    height=video.get('height', 0)
+                ))
+    return media_list
+
+
+def feed_interaction(note_card: dict) -> RedNoteInteraction:
+    """解析互动数据"""
+    interact_info = note_card.get('interact_info', {})
+    return RedNoteInteraction(
+        like_count=interact_info.get('liked_count', 0),
+        comment_count=interact_info.get('comment_count', 0),
+        collect_count=interact_info.get('collected_count', 0),
+        share_count=interact_info.get('share_count', 0)
+    )
+
+
+def feed_tags(note_card: dict) -> List[str]:
+    """解析标签"""
+    tag_list = note_card.get('tag_list', [])
+    return [tag.get('tag_name', '') for tag in tag_list if tag.get('tag_name')]
+
+
+def feed_topics(note_card: dict) -> List[str]:
+    """解析话题"""
+    topic_list_items = note_card.get('topic_list', [])
+    return [topic.get('name', '') for topic in topic_list_items if topic.get('name')]
+
+
 class RedNotePreview(BaseModel):
     """笔记核心数据模型"""
 
@@ -223,86 +304,37 @@ class RedNoteDetail(BaseModel):
         }
 
     @classmethod
-    def from_feed_response(cls, feed_data: dict) -> Optional['RedNoteDetail']:
-        """从feed API响应创建详情对象"""
+    def from_feed_response(cls, feed_data: dict, note_cache=None) -> Optional['RedNoteDetail']:
+        """从feed API响应创建详情对象
+
+        传入note_cache时顺便记录互动快照，后续列表页中的同一笔记可以跳过解析
+        """
         items = feed_data.get('data', {}).get('items', [])
         if not items:
             return None
 
         note_card = items[0].get('note_card', {})
 
-        # 基本信息
-        note_id = note_card.get('id', '')
-        title = note_card.get('title', '')
-        content = note_card.get('desc', '')
-
-        # 媒体信息
-        media_list = []
-        image_list = note_card.get('image_list', [])
-        for img in image_list:
-            info_list = img.get('info_list', [])
-            for img_info in info_list:
-                if img_info.get('image_scene') == 'WB_DFT':
-                    media_list.append(RedNoteMedia(
-                        url=img_info.get('url', ''),
-                        media_type='image',
-                        width=img_info.get('width', 0),
-                        height=img_info.get('height', 0)
-                    ))
-
-        # 视频信息
-        video = note_card.get('video', {})
-        if video and video.get('media', {}).get('stream'):
-            stream_info = video['media']['stream']
-            if isinstance(stream_info, dict) and 'h264' in stream_info:
-                h264_info = stream_info['h264']
-                if isinstance(h264_info, dict) and h264_info.get('master_url'):
-                    media_list.append(RedNoteMedia(
-                        url=h264_info['master_url'],
-                        media_type='video',
-                        width=video.get('width', 0),
-                        height=video.get('height', 0)
-                    ))
-
-        # 互动数据
-        interact_info = note_card.get('interact_info', {})
-        interaction = RedNoteInteraction(
-            like_count=interact_info.get('liked_count', 0),
-            comment_count=interact_info.get('comment_count', 0),
-            collect_count=interact_info.get('collected_count', 0),
-            share_count=interact_info.get('share_count', 0)
-        )
-
-        # 作者信息
-        user_info = note_card.get('user', {})
-        author_name = user_info.get('nickname', '')
-        author_id = user_info.get('user_id', '')
-        author_avatar = user_info.get('avatar', '')
-
-        # 标签信息
-        tag_list = note_card.get('tag_list', [])
-        tags = [tag.get('tag_name', '') for tag in tag_list if tag.get('tag_name')]
+        if note_cache is not None and note_card.get('id'):
+            note_cache.put(note_card['id'], interaction_counts(note_card.get('interact_info', {})))
 
-        topic_list_items = note_card.get('topic_list', [])
-        topics = [topic.get('name', '') for topic in topic_list_items if topic.get('name')]
-
-        # 发布时间
         publish_time = note_card.get('time', '')
         last_update_time = note_card.get('last_update_time', '')
+        user_info = note_card.get('user', {})
 
         return cls(
-            note_id=note_id,
-            title=title,
-            content=content,
-            media_list=media_list,
-            interaction=interaction,
-            author_id=author_id,
-            author_name=author_name,
-            author_avatar=author_avatar,
+            note_id=note_card.get('id', ''),
+            title=note_card.get('title', ''),
+            content=note_card.get('desc', ''),
+            media_list=feed_media_list(note_card),
+            interaction=feed_interaction(note_card),
+            author_id=user_info.get('user_id', ''),
+            author_name=user_info.get('nickname', ''),
+            author_avatar=user_info.get('avatar', ''),
             publish_time=str(publish_time) if publish_time else None,
             last_update_time=str(last_update_time) if last_update_time else None,
-            tags=tags,
-            topic_list=topics,
+            tags=feed_tags(note_card),
+            topic_list=feed_topics(note_card),
             location=None,
             source_type="feed_api"
         )
@@ -382,8 +414,21 @@ class RedNoteDetail(BaseModel):
         return existing_detail
 
 
-def create_rednote_previews_from_api_response(api_data: dict) -> list[RedNotePreview]:
-    """从API响应创建RedNotePreview列表"""
+def create_rednote_previews_from_api_response(
+    api_data: dict,
+    note_cache=None,
+    on_delta: Optional[Callable[[str, Dict[str, int]], None]] = None
+) -> list[RedNotePreview]:
+    """从API响应创建RedNotePreview列表
+
+    传入note_cache（app.data.note_cache.NoteCache）时先比对互动快照：
+    未变化的笔记直接跳过，互动有变化的笔记只通过on_delta回调上报变化量，
+    只有新笔记才会完整解析成RedNotePreview
+    """
+    if note_cache is not None:
+        # app.data 依赖本模块，延迟导入
+        from ..data.note_cache import NoteStatus
+
     previews = []
 
     # 解析标准API响应结构
@@ -399,10 +444,23 @@ def create_rednote_previews_from_api_response(api_data: dict) -> list[RedNotePre
 
     for item in items:
         try:
+            if note_cache is not None and item.get('id'):
+                interact_info = item.get('note_card', {}).get('interact_info', {})
+                status, delta = note_cache.check(item['id'], interaction_counts(interact_info))
+                if status == NoteStatus.UNCHANGED:
+                    continue
+                if status == NoteStatus.CHANGED:
+                    if on_delta:
+                        on_delta(item['id'], delta)
+                    continue
+
             preview = RedNotePreview.from_api_response(item)
             previews.append(preview)
         except Exception as e:
             print(f"解析RedNotePreview失败: {str(e)}")
+            if note_cache is not None and item.get('id'):
+                # 解析失败的笔记不能被当作已见过
+                note_cache.discard(item['id'])
             continue
 
     return previews
\ No newline at end of file
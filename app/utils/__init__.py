@@ -0,0 +1,21 @@
+"""
+通用工具
+"""
+
+from . import json_codec
+from .packet_body import PacketBody
+from .text_extract import TextEntities, extract_entities, extract_topics
+from .id_extract import extract_ids, extract_note_ids, extract_user_ids, note_id_from_url, is_detail_url
+
+__all__ = [
+    'json_codec',
+    'PacketBody',
+    'TextEntities',
+    'extract_entities',
+    'extract_topics',
+    'extract_ids',
+    'extract_note_ids',
+    'extract_user_ids',
+    'note_id_from_url',
+    'is_detail_url'
+]
@@ -0,0 +1,92 @@
+"""
+笔记/用户ID提取
+一个预编译的组合正则覆盖 /explore/、/discovery/item/、/user/profile/ 路径和
+noteId / note_id / userId / user_id 形式的JSON或查询参数；URL这类短文本的结果放进LRU缓存，
+每个请求、每个链接都会调用
+"""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+
+# 小红书的笔记ID和用户ID都是24位十六进制
+_ID = r'[0-9a-f]{24}(?![0-9a-f])'
+
+_ID_PATTERN = re.compile(
+    r'(?:/explore/|/discovery/item/|\bnote_?[iI]d["\'\s]*[:=]["\'\s]*)(?P<note>' + _ID + r')'
+    r'|(?:/user/profile/|\buser_?[iI]d["\'\s]*[:=]["\'\s]*)(?P<user>' + _ID + r')'
+)
+_DETAIL_PATTERN = re.compile(r'/(?:explore|discovery/item)/(' + _ID + r')')
+
+# 超过这个长度的文本（响应体片段等）不进缓存
+_CACHE_MAX_LENGTH = 2048
+
+
+class ExtractedIds(NamedTuple):
+    """按出现顺序去重后的ID"""
+    note_ids: Tuple[str, ...]
+    user_ids: Tuple[str, ...]
+
+
+def _scan(text: str) -> ExtractedIds:
+    note_ids = {}
+    user_ids = {}
+    for match in _ID_PATTERN.finditer(text):
+        if match.lastgroup == 'note':
+            note_ids[match.group('note')] = None
+        else:
+            user_ids[match.group('user')] = None
+    return ExtractedIds(tuple(note_ids), tuple(user_ids))
+
+
+_scan_cached = lru_cache(maxsize=4096)(_scan)
+
+
+def extract_ids(text: Optional[str]) -> ExtractedIds:
+    """提取文本（URL、JSON片段）中的笔记ID和用户ID"""
+    if not text:
+        return ExtractedIds((), ())
+    if len(text) <= _CACHE_MAX_LENGTH:
+        return _scan_cached(text)
+    return _scan(text)
+
+
+def extract_note_ids(text: Optional[str]) -> Tuple[str, ...]:
+    """提取笔记ID"""
+    return extract_ids(text).note_ids
+
+
+def extract_user_ids(text: Optional[str]) -> Tuple[str, ...]:
+    """提取用户ID"""
+    return extract_ids(text).user_ids
+
+
+@lru_cache(maxsize=4096)
+def note_id_from_url(url: Optional[str]) -> Optional[str]:
+    """详情页链接（/explore/<id> 或 /discovery/item/<id>）中的笔记ID，不是详情页时返回None"""
+    if not url:
+        return None
+    match = _DETAIL_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def is_detail_url(url: Optional[str]) -> bool:
+    """是否是笔记详情页URL"""
+    return note_id_from_url(url) is not None
+
+
+def url_has_note_id(url: Optional[str], note_id: str) -> bool:
+    """URL（路径或查询参数）是否指向指定笔记"""
+    return note_id in extract_note_ids(url)
+
+
+__all__ = [
+    'ExtractedIds',
+    'extract_ids',
+    'extract_note_ids',
+    'extract_user_ids',
+    'note_id_from_url',
+    'is_detail_url',
+    'url_has_note_id',
+]
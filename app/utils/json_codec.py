@@ -0,0 +1,101 @@
+"""
+JSON编解码
+安装了orjson或msgspec时使用它们，否则回退到标准库json；所有采集、解析和保存路径统一走这里
+"""
+
+import json
+from typing import Any, Callable, IO, Optional, Union
+
+
+try:
+    import orjson
+    BACKEND = 'orjson'
+except ImportError:
+    orjson = None
+    try:
+        import msgspec
+        BACKEND = 'msgspec'
+    except ImportError:
+        msgspec = None
+        BACKEND = 'json'
+
+
+Buffer = Union[bytes, bytearray, memoryview, str]
+
+# 各后端解码失败时抛出的异常
+DECODE_ERRORS = (ValueError, UnicodeDecodeError) + ((msgspec.DecodeError,) if BACKEND == 'msgspec' else ())
+
+
+def default(value: Any) -> Any:
+    """兜底序列化：pydantic模型转字典，集合转列表，日期转ISO格式，其余转字符串"""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+if BACKEND == 'orjson':
+    _OPT_INDENT = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    _OPT_COMPACT = orjson.OPT_NON_STR_KEYS
+
+    def loads(data: Buffer) -> Any:
+        """解码JSON（memoryview直接解析，不拷贝）"""
+        return orjson.loads(data)
+
+    def dumps(obj: Any, indent: bool = False, default: Optional[Callable] = default) -> bytes:
+        """编码为UTF-8字节"""
+        return orjson.dumps(obj, default=default, option=_OPT_INDENT if indent else _OPT_COMPACT)
+
+elif BACKEND == 'msgspec':
+    _decoder = msgspec.json.Decoder()
+
+    def loads(data: Buffer) -> Any:
+        """解码JSON（memoryview直接解析，不拷贝）"""
+        return _decoder.decode(data)
+
+    def dumps(obj: Any, indent: bool = False, default: Optional[Callable] = default) -> bytes:
+        """编码为UTF-8字节"""
+        encoded = msgspec.json.encode(obj, enc_hook=default)
+        return msgspec.json.format(encoded, indent=2) if indent else encoded
+
+else:
+    def loads(data: Buffer) -> Any:
+        """解码JSON"""
+        if isinstance(data, memoryview):
+            # 标准库不接受memoryview，完整视图时直接取出背后的bytes
+            obj = data.obj
+            data = obj if isinstance(obj, bytes) and data.nbytes == len(obj) else data.tobytes()
+        return json.loads(data)
+
+    def dumps(obj: Any, indent: bool = False, default: Optional[Callable] = default) -> bytes:
+        """编码为UTF-8字节"""
+        if indent:
+            text = json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+        return text.encode('utf-8')
+
+
+def dumps_str(obj: Any, indent: bool = False, default: Optional[Callable] = default) -> str:
+    """编码为字符串"""
+    return dumps(obj, indent, default).decode('utf-8')
+
+
+def dump(obj: Any, fp: IO, indent: bool = True, default: Optional[Callable] = default):
+    """写入文件，二进制和文本模式的文件对象都可以"""
+    data = dumps(obj, indent, default)
+    if 'b' in getattr(fp, 'mode', 'b'):
+        fp.write(data)
+    else:
+        fp.write(data.decode('utf-8'))
+
+
+def load(fp: IO) -> Any:
+    """从文件读取"""
+    return loads(fp.read())
+
+
+__all__ = ['BACKEND', 'DECODE_ERRORS', 'loads', 'dumps', 'dumps_str', 'dump', 'load', 'default']
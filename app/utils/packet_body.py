@@ -0,0 +1,133 @@
+"""
+数据包响应体封装
+原始字节以memoryview保存，JSON只在首次读取时解码一次，所有订阅者共享解码结果
+"""
+
+import threading
+from typing import Any, Optional, Union
+
+from . import json_codec
+
+
+RawBody = Union[bytes, bytearray, memoryview, str, dict, list, None]
+
+# 挂在DrissionPage数据包对象上的缓存属性名
+_PACKET_ATTR = '_mss_packet_body'
+
+
+class PacketBody:
+    """响应体：零拷贝持有原始字节，惰性解码并缓存"""
+
+    __slots__ = ('_raw', '_decoded', '_decoded_ready', '_error', '_lock')
+
+    def __init__(self, body: RawBody):
+        self._raw: Optional[memoryview] = None
+        self._decoded: Any = None
+        self._decoded_ready = False
+        self._error: Optional[Exception] = None
+        self._lock = threading.Lock()
+
+        if isinstance(body, (dict, list)):
+            # DrissionPage已经把JSON解析成了对象，直接作为解码结果
+            self._decoded = body
+            self._decoded_ready = True
+        elif isinstance(body, memoryview):
+            self._raw = body
+        elif isinstance(body, (bytes, bytearray)):
+            self._raw = memoryview(body)
+        elif isinstance(body, str):
+            self._raw = memoryview(body.encode('utf-8'))
+
+    @classmethod
+    def from_packet(cls, packet) -> 'PacketBody':
+        """从数据包获取响应体，同一个数据包只创建一次"""
+        cached = getattr(packet, _PACKET_ATTR, None)
+        if cached is not None:
+            return cached
+
+        body = None
+        response = getattr(packet, 'response', None)
+        if response is not None:
+            # 优先使用未解析的原始文本，避免DrissionPage预解析后再序列化
+            body = getattr(response, 'raw_body', None) or getattr(response, 'body', None)
+
+        instance = cls(body)
+        try:
+            setattr(packet, _PACKET_ATTR, instance)
+        except AttributeError:
+            pass
+        return instance
+
+    @classmethod
+    def wrap(cls, body: Union['PacketBody', RawBody]) -> 'PacketBody':
+        """把任意响应体统一成PacketBody"""
+        return body if isinstance(body, cls) else cls(body)
+
+    @property
+    def raw(self) -> memoryview:
+        """原始字节视图（不拷贝）"""
+        if self._raw is None:
+            if self._decoded_ready and self._decoded is not None:
+                # 只有预解析对象时才按需序列化一次
+                self._raw = memoryview(json_codec.dumps(self._decoded))
+            else:
+                self._raw = memoryview(b'')
+        return self._raw
+
+    @property
+    def is_decoded(self) -> bool:
+        """是否已经解码"""
+        return self._decoded_ready
+
+    @property
+    def error(self) -> Optional[Exception]:
+        """解码失败时的异常"""
+        return self._error
+
+    def __len__(self) -> int:
+        """已持有的原始字节数，不触发解码；只有预解析对象时为0，不会为此序列化"""
+        return self._raw.nbytes if self._raw is not None else 0
+
+    def __bool__(self) -> bool:
+        if self._decoded_ready:
+            return self._decoded is not None
+        return self._raw is not None and self._raw.nbytes > 0
+
+    def text(self) -> str:
+        """按UTF-8解码为文本"""
+        return str(self.raw, 'utf-8', errors='replace')
+
+    def json(self) -> Any:
+        """解码JSON，只在第一次调用时真正解析"""
+        if self._decoded_ready:
+            return self._decoded
+
+        with self._lock:
+            if not self._decoded_ready:
+                try:
+                    raw = self._raw
+                    self._decoded = json_codec.loads(raw) if raw is not None and raw.nbytes else None
+                except json_codec.DECODE_ERRORS as e:
+                    self._error = e
+                    self._decoded = None
+                self._decoded_ready = True
+        return self._decoded
+
+    def json_dict(self) -> dict:
+        """解码为字典，非字典结果返回空字典"""
+        data = self.json()
+        return data if isinstance(data, dict) else {}
+
+    def release(self):
+        """释放原始字节，只保留解码结果"""
+        if self._decoded_ready and self._raw is not None:
+            self._raw.release()
+            self._raw = None
+
+    def __repr__(self):
+        state = 'decoded' if self._decoded_ready else 'raw'
+        size = self._raw.nbytes if self._raw is not None else 0
+        return f"PacketBody({state}, {size} bytes)"
+
+
+__all__ = ['PacketBody']
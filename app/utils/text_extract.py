@@ -0,0 +1,64 @@
+"""
+正文实体提取
+一个预编译正则单遍扫描笔记正文/评论，提取内嵌话题（#黄金[话题]#）、@提及和表情代码（[笑哭R]）
+"""
+
+import re
+from typing import List, NamedTuple
+
+
+_ENTITY_PATTERN = re.compile(
+    r'#(?P<topic>[^#\[\]\r\n]{1,40}?)\[话题\]#'
+    r'|\[(?P<emoji>(?!话题\])[^\[\]\s#@]{1,12})\]'
+    r'|(?<![0-9A-Za-z._%+-])@(?P<mention>[^\s@#\[\]，,。.!！?？:：;；]{1,30})'
+)
+
+
+class TextEntities(NamedTuple):
+    """提取结果，按出现顺序保留重复项"""
+    topics: List[str]
+    mentions: List[str]
+    emojis: List[str]
+
+
+def extract_entities(text: str) -> TextEntities:
+    """提取话题、@提及和表情代码"""
+    topics, mentions, emojis = [], [], []
+    if not text:
+        return TextEntities(topics, mentions, emojis)
+
+    for match in _ENTITY_PATTERN.finditer(text):
+        kind = match.lastgroup
+        value = match.group(kind).strip()
+        if not value:
+            continue
+        if kind == 'topic':
+            topics.append(value)
+        elif kind == 'emoji':
+            emojis.append(value)
+        else:
+            mentions.append(value)
+    return TextEntities(topics, mentions, emojis)
+
+
+def extract_topics(text: str) -> List[str]:
+    """只提取内嵌话题（去重，保持顺序）"""
+    return list(dict.fromkeys(extract_entities(text).topics))
+
+
+def strip_entities(text: str) -> str:
+    """去掉话题标记和表情代码，话题保留文字本身，用于检索或展示"""
+    if not text:
+        return ''
+
+    def replace(match) -> str:
+        if match.lastgroup == 'topic':
+            return match.group('topic')
+        if match.lastgroup == 'emoji':
+            return ''
+        return match.group(0)
+
+    return _ENTITY_PATTERN.sub(replace, text)
+
+
+__all__ = ['TextEntities', 'extract_entities', 'extract_topics', 'strip_entities']
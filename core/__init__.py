@@ -4,8 +4,10 @@
 from .state_types import BusinessState, EventType, Event, EventFactory
 from .event_bus import EventBus
 from .state_machine import BaseStateHandler, StateMachine
+from .checkpoint import CheckpointManager
+from .event_log import EventLog
 
-__all__ = ['BusinessState', 'EventType', 'Event', 'EventFactory', 'EventBus', 'BaseStateHandler', 'StateMachine']
+__all__ = ['BusinessState', 'EventType', 'Event', 'EventFactory', 'EventBus', 'BaseStateHandler', 'StateMachine', 'CheckpointManager', 'EventLog']
 
 
 async def create_system(name: str = "default"):
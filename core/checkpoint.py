@@ -0,0 +1,189 @@
+"""
+状态机检查点
+快照文件保存当前状态、队列中未处理的事件和体量小的采集进度（游标），内容有变化时才重写；
+已完成关键词、已采集笔记这类只增不减的进度写进追加式日志，每次保存只追加新增的条目；
+进程重启后从快照和日志恢复
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .event_log import json_default, truncate_torn_tail
+from .state_types import BusinessState, Event
+
+
+class CheckpointManager:
+    """快照保存与恢复"""
+
+    VERSION = 2
+
+    def __init__(self, path: str, interval: float = 30.0):
+        self.path = path
+        self.journal_path = f"{path}.log"
+        self.interval = interval
+        self._cursors: Dict[str, Tuple[Callable[[], Any], Optional[Callable[[Any], None]]]] = {}
+        self._journals: Dict[str, Callable[[Any], None]] = {}
+        # 已编码、还没追加到日志的条目
+        self._pending: List[str] = []
+        self._journal_checked = False
+        self._last_payload: Optional[str] = None
+        self.saves = 0
+        self.journal_entries = 0
+
+    def register_cursor(self, name: str, getter: Callable[[], Any], setter: Optional[Callable[[Any], None]] = None):
+        """注册体量小的采集进度：getter返回可JSON序列化的进度，每次保存整体写入快照，setter在恢复时接收它"""
+        self._cursors[name] = (getter, setter)
+
+    def register_journal(self, name: str, replay: Callable[[Any], None]):
+        """注册只增不减的采集进度：append()记录的条目追加到日志，恢复时按顺序交给replay"""
+        self._journals[name] = replay
+
+    def append(self, name: str, item: Any):
+        """记录一条增量进度，下一次save()时追加落盘"""
+        record = {"name": name, "item": item}
+        self._pending.append(json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=json_default))
+
+    def snapshot(self, state_machine=None) -> Dict[str, Any]:
+        """生成快照（不会取走队列中的事件）；不传状态机时只保存采集进度"""
+        snapshot = {
+            "version": self.VERSION,
+            "state": None,
+            "previous_state": None,
+            "pending_events": [],
+            "cursors": {name: getter() for name, (getter, _) in self._cursors.items()},
+        }
+        if state_machine is not None:
+            snapshot["state"] = state_machine.current_state.name
+            snapshot["previous_state"] = state_machine.previous_state.name if state_machine.previous_state else None
+            snapshot["pending_events"] = [
+                {"type": event.type, "data": event.data} for event in state_machine.pending_events()
+            ]
+        return snapshot
+
+    def save(self, state_machine=None) -> bool:
+        """追加新增的日志条目，快照内容有变化时才重写快照文件；返回是否写入"""
+        written = self._flush_journal()
+
+        payload = json.dumps(self.snapshot(state_machine), ensure_ascii=False, default=json_default, sort_keys=True)
+        if payload != self._last_payload:
+            # 先写临时文件再替换，避免进程在写到一半时崩溃导致快照损坏
+            self._ensure_directory()
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(f'{{"saved_at": {time.time()}, "snapshot": {payload}}}')
+            os.replace(tmp_path, self.path)
+            self._last_payload = payload
+            written = True
+
+        if written:
+            self.saves += 1
+        return written
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取最近一次快照"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取检查点失败: {e}")
+            return None
+
+        snapshot = record.get("snapshot", {})
+        if snapshot.get("version") != self.VERSION:
+            print(f"检查点版本不匹配: {snapshot.get('version')}")
+            return None
+        return snapshot
+
+    def read_journal(self) -> Iterator[Tuple[str, Any]]:
+        """按顺序读取日志条目 (name, item)"""
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                yield record.get("name"), record.get("item")
+
+    async def restore(self, state_machine=None) -> bool:
+        """从快照恢复状态、未处理事件和采集进度，再回放日志；两者都没有时返回False"""
+        snapshot = self.load()
+
+        if snapshot is not None:
+            if state_machine is not None and snapshot.get("state"):
+                state_machine.current_state = BusinessState[snapshot["state"]]
+                previous = snapshot.get("previous_state")
+                state_machine.previous_state = BusinessState[previous] if previous else None
+
+                for item in snapshot.get("pending_events", []):
+                    await state_machine.event_queue.put(Event(type=item["type"], data=item.get("data", {})))
+
+            for name, value in snapshot.get("cursors", {}).items():
+                entry = self._cursors.get(name)
+                if entry and entry[1]:
+                    try:
+                        entry[1](value)
+                    except Exception as e:
+                        print(f"恢复进度 {name} 失败: {e}")
+
+        replayed = 0
+        for name, item in self.read_journal():
+            replay = self._journals.get(name)
+            if replay is None:
+                continue
+            try:
+                replay(item)
+                replayed += 1
+            except Exception as e:
+                print(f"回放进度 {name} 失败: {e}")
+
+        if snapshot is None and not replayed:
+            return False
+
+        state = state_machine.current_state.display_name if state_machine is not None else "-"
+        pending = len(snapshot.get('pending_events', [])) if snapshot else 0
+        print(f"已从检查点恢复: 状态={state}, 待处理事件={pending}, 回放进度={replayed} 条")
+        return True
+
+    async def run_periodic(self, state_machine=None):
+        """后台定期保存快照，取消时再保存一次"""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                try:
+                    self.save(state_machine)
+                except Exception as e:
+                    print(f"保存检查点失败: {e}")
+        finally:
+            try:
+                self.save(state_machine)
+            except Exception as e:
+                print(f"保存检查点失败: {e}")
+
+    def _flush_journal(self) -> bool:
+        if not self._pending:
+            return False
+        self._ensure_directory()
+        if not self._journal_checked:
+            # 上次崩溃留下的半行要先截掉，否则新条目会接在它后面
+            if os.path.exists(self.journal_path):
+                truncate_torn_tail(self.journal_path)
+            self._journal_checked = True
+
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(self._pending) + '\n')
+        self.journal_entries += len(self._pending)
+        self._pending.clear()
+        return True
+
+    def _ensure_directory(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+
+__all__ = ['CheckpointManager']
@@ -10,9 +10,12 @@ from .state_types import Event
 class EventBus:
     """事件订阅管理器"""
 
-    def __init__(self, name: str = "default"):
+    def __init__(self, name: str = "default", event_log=None, log_before_dispatch: bool = True):
         self.name = name
         self._handlers: Dict[str, List[Callable]] = {}
+        # 可选的事件预写日志（core.event_log.EventLog）
+        self.event_log = event_log
+        self.log_before_dispatch = log_before_dispatch
 
     def subscribe(self, event_type: str, handler: Callable):
         """订阅事件"""
@@ -27,8 +30,14 @@ class EventBus:
 
     async def publish(self, event: Event):
         """立即分发事件给订阅者"""
+        if self.event_log and self.log_before_dispatch:
+            self.event_log.append(event)
+
         await self._handle_event(event)
 
+        if self.event_log and not self.log_before_dispatch:
+            self.event_log.append(event)
+
     async def _handle_event(self, event: Event):
         """处理单个事件"""
         handlers = self._handlers.get(event.type, [])
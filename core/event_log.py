@@ -0,0 +1,244 @@
+"""
+事件预写日志
+EventBus可选的追加式日志：每个事件一行NDJSON，按批组提交（group commit），
+按大小滚动分段，支持回放重建下游状态以及分段压缩
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+from .state_types import Event
+
+
+SEGMENT_PREFIX = 'events-'
+SEGMENT_SUFFIX = '.ndjson'
+
+
+def json_default(value: Any) -> Any:
+    """JSON兜底序列化：pydantic模型转字典，集合转列表，日期转ISO格式，其余转字符串（core不依赖app的编解码器）"""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json')
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def _json_dumps(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=json_default).encode('utf-8')
+
+
+def truncate_torn_tail(path: str, chunk_size: int = 64 * 1024) -> int:
+    """截掉文件末尾没有以换行结束的半行（崩溃时只写了一半的记录），返回截掉的字节数
+
+    不截掉的话，之后追加的记录会接在半行后面，回放时整行解码失败被跳过
+    """
+    with open(path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        keep = 0
+        end = size
+        while end > 0:
+            start = max(0, end - chunk_size)
+            f.seek(start)
+            index = f.read(end - start).rfind(b'\n')
+            if index >= 0:
+                keep = start + index + 1
+                break
+            end = start
+        if keep < size:
+            f.truncate(keep)
+        return size - keep
+
+
+class EventLog:
+    """追加式事件日志"""
+
+    def __init__(
+        self,
+        directory: str,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        segment_bytes: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+        encoder: Callable[[dict], bytes] = _json_dumps,
+        decoder: Callable[[bytes], dict] = json.loads
+    ):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.encoder = encoder
+        self.decoder = decoder
+
+        os.makedirs(directory, exist_ok=True)
+        self._buffer: List[bytes] = []
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._segment_index = 0
+        self._segment_size = 0
+        self.seq = 0
+        self._open_tail_segment()
+
+    # ---------- 写入 ----------
+
+    def append(self, event: Event) -> int:
+        """追加一个事件，返回序号；攒够一批或超过刷新间隔时组提交"""
+        self.seq += 1
+        record = {"seq": self.seq, "type": event.type, "data": event.data}
+        self._buffer.append(self.encoder(record) + b'\n')
+
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+        return self.seq
+
+    def flush(self):
+        """把缓冲区一次性写入当前分段"""
+        if not self._buffer:
+            return
+        chunk = b''.join(self._buffer)
+        self._buffer.clear()
+
+        self._file.write(chunk)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._segment_size += len(chunk)
+        self._last_flush = time.monotonic()
+
+        if self._segment_size >= self.segment_bytes:
+            self._roll_segment()
+
+    async def run_flusher(self):
+        """后台定时刷新，保证低流量时事件也能及时落盘"""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                self.flush()
+        finally:
+            self.flush()
+
+    def close(self):
+        """刷新并关闭日志"""
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ---------- 读取与回放 ----------
+
+    def segments(self) -> List[str]:
+        """按顺序列出所有分段文件"""
+        names = [
+            name for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        ]
+        names.sort()
+        return [os.path.join(self.directory, name) for name in names]
+
+    def read(self, from_seq: int = 0, event_types: Optional[set] = None) -> Iterator[dict]:
+        """按序读取日志记录（会先刷新缓冲区）"""
+        self.flush()
+        for path in self.segments():
+            with open(path, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        record = self.decoder(line)
+                    except ValueError:
+                        # 崩溃时最后一行可能只写了一半
+                        continue
+                    if record.get("seq", 0) <= from_seq:
+                        continue
+                    if event_types and record.get("type") not in event_types:
+                        continue
+                    yield record
+
+    def events(self, from_seq: int = 0, event_types: Optional[set] = None) -> Iterator[Event]:
+        """按序读取事件对象"""
+        for record in self.read(from_seq, event_types):
+            yield Event(type=record["type"], data=record.get("data", {}))
+
+    async def replay(self, handler: Callable, from_seq: int = 0, event_types: Optional[set] = None) -> int:
+        """把历史事件依次交给handler（可以是EventBus.publish或普通回调），返回回放数量"""
+        count = 0
+        for event in self.events(from_seq, event_types):
+            result = handler(event)
+            if asyncio.iscoroutine(result):
+                await result
+            count += 1
+        return count
+
+    # ---------- 压缩 ----------
+
+    def compact(self, keep: Callable[[dict], bool]) -> int:
+        """压缩已封存的分段：只保留keep返回True的记录，合并成一个分段，返回删除的记录数"""
+        self.flush()
+        sealed = self.segments()[:-1]
+        if not sealed:
+            return 0
+
+        removed = 0
+        merged_path = sealed[0] + '.compact'
+        with open(merged_path, 'wb') as out:
+            for path in sealed:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        try:
+                            record = self.decoder(line)
+                        except ValueError:
+                            removed += 1
+                            continue
+                        if keep(record):
+                            out.write(line if line.endswith(b'\n') else line + b'\n')
+                        else:
+                            removed += 1
+
+        for path in sealed[1:]:
+            os.remove(path)
+        os.replace(merged_path, sealed[0])
+        return removed
+
+    # ---------- 分段管理 ----------
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{index:08d}{SEGMENT_SUFFIX}")
+
+    def _open_tail_segment(self):
+        """接着最后一个分段写，并恢复最大序号"""
+        segments = self.segments()
+        if segments:
+            tail = segments[-1]
+            self._segment_index = int(os.path.basename(tail)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            removed = truncate_torn_tail(tail)
+            if removed:
+                print(f"事件日志 {os.path.basename(tail)} 末尾有写了一半的记录，已截掉 {removed} 字节")
+            self._segment_size = os.path.getsize(tail)
+            # 从后往前找到最近一个有记录的分段（刚滚动出来的分段可能是空的）
+            for path in reversed(segments):
+                for record in self._scan(path):
+                    self.seq = max(self.seq, record.get("seq", 0))
+                if self.seq:
+                    break
+        self._file = open(self._segment_path(self._segment_index), 'ab')
+
+    def _scan(self, path: str) -> Iterator[dict]:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    yield self.decoder(line)
+                except ValueError:
+                    continue
+
+    def _roll_segment(self):
+        self._file.close()
+        self._segment_index += 1
+        self._segment_size = 0
+        self._file = open(self._segment_path(self._segment_index), 'ab')
+
+
+__all__ = ['EventLog', 'truncate_torn_tail', 'json_default']
@@ -4,7 +4,7 @@
 """
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from .state_types import BusinessState, Event
 from .event_bus import EventBus
 
@@ -98,6 +98,19 @@ class EventDrivenStateMachine:
         event = Event(type=event_type, data=data or {}, source="state_machine")
         await self.event_queue.put(event)
 
+    def pending_events(self) -> List[Event]:
+        """队列中尚未处理的事件；取出后按原顺序放回，中间没有await，不影响事件循环的消费"""
+        events = []
+        while True:
+            try:
+                events.append(self.event_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+            self.event_queue.task_done()
+        for event in events:
+            self.event_queue.put_nowait(event)
+        return events
+
     async def run(self):
         """启动事件驱动状态机"""
         if self.running:
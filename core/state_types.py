@@ -62,7 +62,8 @@ class BusinessState(Enum):
             # 登录等待
             BusinessState.LOGIN_WAIT: {
                 BusinessState.LIST_STATE,      # LOGIN_SUCCESS: 登录成功
-                BusinessState.CHECKING_LOGIN   # LOGIN_RETRY: 重新检查登录状态
+                BusinessState.CHECKING_LOGIN,  # LOGIN_RETRY: 重新检查登录状态
+                BusinessState.STOP             # LOGIN_TIMEOUT / USER_STOP: 登录超时或用户停止
             },
 
             # 列表状态
@@ -126,10 +127,14 @@ class EventType:
     DETAIL_LOADED = "detail_loaded"        # 详情页面加载完成
     BACK_TO_LIST = "back_to_list"          # 触发: DETAIL_STATE → LIST_STATE
 
+    # 数据事件（不触发状态转换）
+    NOTE_DELTA = "note_delta"              # 已知笔记的互动数据发生变化
+    NOTES_PAGE = "notes_page"              # 列表滚动加载到一页新笔记
+
     # 系统
     LOGIN_EXPIRED = "login_expired"        # 触发: LIST_STATE/DETAIL_STATE → CHECKING_LOGIN
     ERROR = "error"                        # 触发: 任意状态 → ERROR
-    STOP = "stop"                          # 触发: 任意状态 → STOP
+    STOP = "stop"                          # 触发: LIST_STATE / LOGIN_WAIT / ERROR → STOP
 
 
 class Event(BaseModel):
@@ -188,15 +193,33 @@ class EventFactory:
         return Event(type=EventType.CANCEL_SELECT)
 
     @staticmethod
-    def detail_loaded(note_id: str):
+    def detail_loaded(note_id: str, detail: Any = None):
         """详情加载完成"""
-        return Event(type=EventType.DETAIL_LOADED, data={"note_id": note_id})
+        data = {"note_id": note_id}
+        if detail is not None:
+            data["detail"] = detail
+        return Event(type=EventType.DETAIL_LOADED, data=data)
 
     @staticmethod
     def back_to_list():
         """返回列表 - 触发: DETAIL_STATE → LIST_STATE"""
         return Event(type=EventType.BACK_TO_LIST)
 
+    @staticmethod
+    def note_delta(note_id: str, delta: dict):
+        """互动数据变化量 - 不触发状态转换"""
+        return Event(type=EventType.NOTE_DELTA, data={"note_id": note_id, "delta": delta})
+
+    @staticmethod
+    def notes_page(notes: list, page: int, keyword: str = None, has_more: bool = True):
+        """一页笔记预览 - 不触发状态转换"""
+        return Event(type=EventType.NOTES_PAGE, data={
+            "notes": notes,
+            "page": page,
+            "keyword": keyword,
+            "has_more": has_more
+        })
+
     @staticmethod
     def login_expired():
         """登录过期 - 触发: LIST_STATE/DETAIL_STATE → CHECKING_LOGIN"""
@@ -209,7 +232,7 @@ class EventFactory:
 
     @staticmethod
     def stop():
-        """停止事件 - 触发: 任意状态 → STOP"""
+        """停止事件 - 触发: LIST_STATE / LOGIN_WAIT / ERROR → STOP"""
         return Event(type=EventType.STOP)
 
 
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+实验脚本：对比pydantic模型、紧凑模型和列式评论存储解析评论的耗时和内存
+每页评论先编码成JSON字节，在计时和内存统计内逐页解码，保证每条评论的字符串都是独立的对象
+（直接复用录制数据里的字符串时，紧凑模型只保存引用，tracemalloc统计不到，内存对比会被夸大）
+用法: python scripts/benchmark_compact_models.py [录制的详情JSON] [评论数]
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+# 添加项目根目录路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from app.models.rednote import RedNoteDetail
+from app.models.compact import CompactDetail
+from app.data.comment_store import CommentStore
+from app.utils import json_codec
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(__file__), 'note_detail_test_20251118_074140.json')
+
+
+def build_comment_pages(detail: dict, total: int, page_size: int = 20) -> list:
+    """把录制的评论还原成评论API的分页响应（JSON字节），循环复制到total条
+
+    评论ID和用户ID保持24位十六进制：前8位（时间戳）按序号递增，保证唯一；
+    每轮复制都换一批评论者，和真实笔记一样大多数评论来自不同用户
+    """
+    source = detail.get('comments', [])
+    if not source:
+        return []
+
+    items = []
+    for i in range(total):
+        comment = source[i % len(source)]
+        comment_id = comment['comment_id']
+        user_id = comment['user_id']
+        items.append({
+            "id": f"{(int(comment_id[:8], 16) + i) & 0xFFFFFFFF:08x}{comment_id[8:]}",
+            "content": comment['content'],
+            "create_time": int(comment['create_time']) if comment.get('create_time') else 0,
+            "like_count": str(comment['like_count']),
+            "sub_comment_count": str(comment['sub_comment_count']),
+            "user_info": {
+                "user_id": f"{(int(user_id[:8], 16) + i // len(source)) & 0xFFFFFFFF:08x}{user_id[8:]}",
+                "nickname": comment['user_name'],
+                "image": comment['user_avatar']
+            },
+            "sub_comments": []
+        })
+    return [json_codec.dumps({"data": {"comments": items[i:i + page_size]}}) for i in range(0, len(items), page_size)]
+
+
+def measure(label: str, build):
+    """返回 (结果, 耗时秒, 常驻内存字节)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} 耗时 {elapsed * 1000:8.1f} ms   内存 {current / 1024 / 1024:7.2f} MB")
+    return result, elapsed, current
+
+
+def build_pydantic(pages: list) -> RedNoteDetail:
+    detail = RedNoteDetail(note_id="")
+    comments = []
+    for page in pages:
+        # from_comment_response每次都会替换评论列表，这里逐页累加
+        comments.extend(RedNoteDetail.from_comment_response(json_codec.loads(page)).comments)
+    detail.comments = comments
+    return detail
+
+
+def build_compact(pages: list) -> CompactDetail:
+    detail = CompactDetail(note_id="")
+    for page in pages:
+        detail.add_comment_response(json_codec.loads(page))
+    return detail
+
+
+def build_store(pages: list, author: dict) -> CommentStore:
+    store = CommentStore()
+    # 笔记作者也会出现在评论里，预先登记到用户表
+    store.intern_user(author.get('author_id', ''), author.get('author_name', ''), author.get('author_avatar', ''))
+    for page in pages:
+        store.add_comment_response(json_codec.loads(page))
+    return store
+
+
+def main():
+    fixture = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_FIXTURE
+    total = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    with open(fixture, 'rb') as f:
+        data = json_codec.load(f)
+    details = data.get('detail_previews', [])
+    if not details:
+        print("❌ 录制文件中没有详情数据")
+        return
+
+    pages = build_comment_pages(details[0], total)
+    print(f"📊 {os.path.basename(fixture)}: {total} 条评论, {len(pages)} 页, JSON后端 {json_codec.BACKEND}")
+
+    pydantic_detail, pydantic_time, pydantic_mem = measure("pydantic", lambda: build_pydantic(pages))
+    compact_detail, compact_time, compact_mem = measure("compact", lambda: build_compact(pages))
+
+    store, store_time, store_mem = measure("store", lambda: build_store(pages, details[0]))
+
+    print(f"⚡ compact: 速度 {pydantic_time / compact_time:.1f}x, 内存 {pydantic_mem / compact_mem:.1f}x")
+    print(f"⚡ store:   速度 {pydantic_time / store_time:.1f}x, 内存 {pydantic_mem / store_mem:.1f}x, "
+          f"{store.user_count} 个用户")
+
+    # 无损校验：紧凑模型转换回pydantic后与直接解析的结果一致
+    expected = [comment.model_dump() for comment in pydantic_detail.comments]
+    converted = [comment.model_dump() for comment in compact_detail.to_model().comments]
+    print("✅ 转换无损" if expected == converted else "❌ 转换结果不一致")
+    stored = [comment.model_dump() for comment in store]
+    print("✅ 存储无损" if expected == stored else "❌ 存储结果不一致")
+
+
+if __name__ == "__main__":
+    main()
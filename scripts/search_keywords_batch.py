@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+关键词批量搜索
+用法: python scripts/search_keywords_batch.py keywords.txt [会话数]
+"""
+
+import sys
+import os
+import asyncio
+
+# 添加项目根目录路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from app.core.browser_pool import BrowserPool
+from app.core.search_runner import SearchBatchRunner
+from app.data.note_cache import NoteCache
+from core.checkpoint import CheckpointManager
+
+
+async def run_with_checkpoint(runner, snapshot_path):
+    """从上次的检查点恢复进度，运行期间定期保存
+
+    每个关键词的会话状态机只在搜索期间存在，重启后重新搜索未完成的关键词即可，
+    所以这里不保存状态机，只保存失败记录和已完成关键词的采集结果
+    """
+    manager = CheckpointManager(snapshot_path, interval=30)
+    runner.attach_checkpoint(manager)
+    await manager.restore()
+
+    saver = asyncio.create_task(manager.run_periodic())
+    try:
+        return await runner.run()
+    finally:
+        saver.cancel()
+        await asyncio.gather(saver, return_exceptions=True)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return
+
+    keyword_file = sys.argv[1]
+    sessions = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+
+    with BrowserPool(ports=(9933,), tabs_per_browser=sessions) as pool:
+        runner = SearchBatchRunner.from_file(
+            keyword_file,
+            pool=pool,
+            sessions=sessions,
+            note_cache=NoteCache()
+        )
+        results = asyncio.run(run_with_checkpoint(runner, keyword_file + '.ckpt.json'))
+
+    total = sum(len(result.note_ids) for result in results.values())
+    print(f"🎉 完成 {len(results)} 个关键词, 共 {total} 个笔记, 失败 {len(runner.failed)} 个")
+
+
+if __name__ == "__main__":
+    main()
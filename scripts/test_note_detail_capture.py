@@ -7,14 +7,26 @@
 import sys
 import os
 import time
-import json
+import asyncio
 from datetime import datetime
 
-# 添加数据结构路径
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
-from models.rednote import RedNotePreview, RedNoteDetail, RedNoteComment, RedNoteMedia, RedNoteInteraction
+# 添加项目根目录路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from app.models.rednote import RedNotePreview, RedNoteDetail, RedNoteComment, RedNoteMedia, RedNoteInteraction
+from app.utils.packet_body import PacketBody
+from app.utils import json_codec
+from app.utils.id_extract import is_detail_url, note_id_from_url
+from app.core.detail_scheduler import DetailScheduler
+from app.core.multi_tab_capture import MultiTabDetailCapture, FEED_API, COMMENT_API
+from app.core.dom_extract import extract_detail, extract_note_cards
+from app.core.selector_registry import SelectorRegistry
+from app.core.browser_wait import wait_until, wait_for_packet, wait_for_packets, wait_for_selector, wait_for_url
 from DrissionPage import Chromium
 
+SEARCH_API = '/api/sns/web/v1/search/notes'
+# 选择器命中统计，跨运行保留，候选选择器按历史表现排序
+SELECTORS = SelectorRegistry(os.path.join(os.path.dirname(__file__), 'selector_stats.json'))
+
 
 def test_note_detail_workflow():
     """测试笔记详情工作流程"""
@@ -41,7 +53,7 @@ def test_note_detail_workflow():
         if 'xiaohongshu.com' not in tab.url:
             print("📍 步骤2: 导航到小红书...")
             tab.get('https://www.xiaohongshu.com/')
-            time.sleep(3)
+            wait_for_selector(tab, 'a[href*="/explore/"]', timeout=5)
             print("✅ 已打开小红书")
 
         # 3. 捕获当前页面的笔记列表
@@ -52,7 +64,7 @@ def test_note_detail_workflow():
         if not list_previews:
             print("⚠️ 未找到笔记，尝试导航到探索页面...")
             tab.get('https://www.xiaohongshu.com/explore')
-            time.sleep(5)  # 增加等待时间
+            wait_for_selector(tab, 'a[href*="/explore/"]', timeout=8)
             list_previews = capture_list_previews(tab)
             print(f"✅ 探索页面捕获到 {len(list_previews)} 个笔记预览")
 
@@ -69,7 +81,8 @@ def test_note_detail_workflow():
                         search_input.clear()
                         search_input.input(keyword)
                         search_input.run_js('this.form.submit();')
-                        time.sleep(5)
+                        wait_for_url(tab, 'search_result', timeout=5)
+                        wait_for_selector(tab, 'a[href*="/explore/"]', timeout=5)
 
                         list_previews = capture_list_previews(tab)
                         if list_previews:
@@ -84,7 +97,7 @@ def test_note_detail_workflow():
             # 即使没有找到笔记，也继续测试详情页功能
             # 直接导航到小红书首页
             tab.get('https://www.xiaohongshu.com/')
-            time.sleep(3)
+            wait_for_selector(tab, 'a[href*="/explore/"]', timeout=5)
             print("💡 自动导航到首页，继续测试DOM解析功能...")
 
         # 4. 启动网络监听，然后点击进入笔记详情页
@@ -95,11 +108,11 @@ def test_note_detail_workflow():
         print("   🌐 启动网络监听...")
         tab.listen.start('edith.xiaohongshu.com')
 
-        # 先滚动页面加载更多笔记
+        # 先滚动页面加载更多笔记，新一页数据到达就继续滚动
         print("   📜 滚动页面加载更多笔记...")
         for _ in range(3):
             tab.scroll.down(3)
-            time.sleep(1)
+            wait_for_packet(tab, SEARCH_API, timeout=1)
 
         # 查找可点击的笔记元素
         note_elements = find_clickable_notes(tab)
@@ -115,7 +128,11 @@ def test_note_detail_workflow():
         print("💡 按 Ctrl+C 停止测试")
         print("=" * 50)
 
-        for i, note_element in enumerate(note_elements[:3]):  # 测试前3个
+        # 按评分挑选最值得访问的3个笔记
+        scheduler = DetailScheduler(max_per_session=3)
+        scheduled_notes = schedule_note_elements(note_elements, list_previews, scheduler)
+
+        for i, (note_id, note_element) in enumerate(scheduled_notes):
             print(f"\n📝 测试笔记 {i+1}...")
 
             # 记录点击前的URL
@@ -129,61 +146,58 @@ def test_note_detail_workflow():
             try:
                 # 尝试点击笔记元素本身
                 note_element.click()
-                time.sleep(5)  # 增加等待时间让API请求完成
             except:
                 # 如果点击失败，尝试点击链接
                 try:
                     link = note_element.ele('a', timeout=1)
                     if link:
                         link.click()
-                        time.sleep(5)
                 except:
                     print("   ⚠️ 点击失败，跳过此笔记")
                     continue
 
             # 检查是否成功进入详情页
-            if '/explore/' in tab.url and tab.url != before_url:
+            entered = wait_until(lambda: is_detail_url(tab.url) and tab.url != before_url, timeout=5, name="进入详情页")
+            if entered:
                 print(f"   ✅ 成功进入详情页: {tab.url}")
 
                 # 初始化详情数据
                 detail_data = None
 
-                # 捕获网络请求
-                time.sleep(3)
+                # 等待详情和评论接口返回，数据包一到就继续
+                packets = wait_for_packets(tab, [FEED_API, COMMENT_API], timeout=8)
+                print(f"   ⏱️ 等待API {packets.waited:.1f}秒")
                 captured_requests = []
                 try:
-                    for packet in tab.listen.steps(timeout=2):
-                        if hasattr(packet, 'url'):
-                            url = packet.url
-                            if '/api/sns/web/v2/comment/page' in url:
-                                print(f"   💬 捕获到评论接口: {url}")
-
-                                # 尝试获取响应数据
-                                if hasattr(packet, 'response') and packet.response:
-                                    try:
-                                        response_data = packet.response.body
-                                        if response_data:
-                                            comments = parse_comment_response(response_data)
-                                            if comments and detail_data:
-                                                detail_data.comments = comments
-                                                print(f"   💬 解析到 {len(comments)} 条评论")
-                                    except Exception as e:
-                                        print(f"   ⚠️ 评论数据解析失败: {str(e)}")
-                            elif '/api/sns/web/v1/feed' in url:
-                                print(f"   📄 捕获到详情接口: {url}")
-
-                                # 尝试获取响应数据
-                                if hasattr(packet, 'response') and packet.response:
-                                    try:
-                                        response_data = packet.response.body
-                                        if response_data:
-                                            feed_detail = parse_feed_response(response_data)
-                                            if feed_detail:
-                                                detail_data = feed_detail
-                                                print(f"   📄 更新详情信息: 标题={detail_data.title[:30]}...")
-                                    except Exception as e:
-                                        print(f"   ⚠️ 详情数据解析失败: {str(e)}")
-                        captured_requests.append(packet.url)
+                    # 先处理详情再处理评论，评论需要挂到详情上
+                    for api in (FEED_API, COMMENT_API):
+                        packet = packets.value.get(api)
+                        if packet is None:
+                            continue
+                        url = packet.url
+                        if api == COMMENT_API:
+                            print(f"   💬 捕获到评论接口: {url}")
+                            try:
+                                response_data = PacketBody.from_packet(packet)
+                                if response_data:
+                                    comments = parse_comment_response(response_data)
+                                    if comments and detail_data:
+                                        detail_data.comments = comments
+                                        print(f"   💬 解析到 {len(comments)} 条评论")
+                            except Exception as e:
+                                print(f"   ⚠️ 评论数据解析失败: {str(e)}")
+                        else:
+                            print(f"   📄 捕获到详情接口: {url}")
+                            try:
+                                response_data = PacketBody.from_packet(packet)
+                                if response_data:
+                                    feed_detail = parse_feed_response(response_data)
+                                    if feed_detail:
+                                        detail_data = feed_detail
+                                        print(f"   📄 更新详情信息: 标题={detail_data.title[:30]}...")
+                            except Exception as e:
+                                print(f"   ⚠️ 详情数据解析失败: {str(e)}")
+                        captured_requests.append(url)
                 except Exception as e:
                     print(f"   ⚠️ 网络监听异常: {str(e)}")
 
@@ -191,6 +205,8 @@ def test_note_detail_workflow():
                 if not detail_data:
                     detail_data = capture_note_detail(tab)
 
+                scheduler.mark_visited(note_id)
+
                 if detail_data:
                     detail_data_list.append(detail_data)
                     print(f"   ✅ 详情捕获成功: 标题={detail_data.title[:30]}, 评论={detail_data.get_comment_count()}条")
@@ -202,14 +218,13 @@ def test_note_detail_workflow():
                 # 退出详情页
                 print(f"   🔙 退出详情页...")
                 exit_note_detail(tab)
-                time.sleep(2)
             else:
                 print(f"   ⚠️ 点击后未进入详情页")
 
             # 确保回到列表页
-            if '/explore/' in tab.url:
+            if is_detail_url(tab.url):
                 tab.back()
-                time.sleep(2)
+                wait_until(lambda: not is_detail_url(tab.url), timeout=3, name="返回列表")
 
         # 5. 保存结果
         if detail_data_list:
@@ -221,78 +236,89 @@ def test_note_detail_workflow():
         print(f"❌ 测试失败: {str(e)}")
         import traceback
         traceback.print_exc()
+    finally:
+        SELECTORS.save()
 
 def find_clickable_notes(tab):
     """查找页面上可点击的笔记元素"""
     note_elements = []
 
     try:
-        # 等待页面加载
-        time.sleep(2)
-
-        # 常见的笔记卡片选择器
-        note_selectors = [
-            '.note-item',
-            '.note-card',
-            '.feeds-container .note-item',
-            '.note-list .note',
-            '[data-testid="note-item"]',
-            '.feed-item',
-            '.explore-feed .note'
-        ]
+        # 等待笔记链接出现
+        wait_for_selector(tab, 'a[href*="/explore/"]', timeout=3)
 
-        for selector in note_selectors:
-            try:
-                elements = tab.eles(selector, timeout=2)
-                for element in elements:
-                    # 检查元素是否可见且可点击
-                    if element.states.is_displayed:
-                        note_elements.append(element)
-                        print(f"   🎯 找到笔记元素: {selector}")
-                if note_elements:
-                    break
-            except:
-                continue
-
-        # 如果没找到，尝试查找包含链接的元素
-        if not note_elements:
-            print("   🔍 尝试查找包含链接的元素...")
-            links = tab.eles('a[href*="/explore/"]')
-            for link in links[:10]:
-                if link.states.is_displayed:
-                    note_elements.append(link)
+        # 一次JS调用试完所有卡片选择器，再按命中的选择器取一次元素
+        selector, cards = extract_note_cards(tab, SELECTORS)
+        if selector:
+            print(f"   🎯 找到笔记元素: {selector}")
+            # 位置来自querySelectorAll，必须按CSS取元素
+            elements = tab.eles(f'css:{selector}', timeout=0)
+            note_elements = [elements[position] for position, _ in cards if position < len(elements)]
 
     except Exception as e:
         print(f"   ⚠️ 查找笔记元素失败: {str(e)}")
 
     return note_elements
 
+def get_element_note_id(element):
+    """从笔记元素（或其内部链接）获取笔记ID"""
+    try:
+        href = element.attr('href')
+        if not is_detail_url(href):
+            link = element.ele('a[href*="/explore/"]', timeout=0.5)
+            href = link.attr('href') if link else None
+        return note_id_from_url(href)
+    except Exception:
+        return None
+
+def schedule_note_elements(note_elements, list_previews, scheduler):
+    """用调度器给页面上的笔记元素排序，返回 [(note_id, element)]"""
+    previews = {preview.note_id: preview for preview in list_previews}
+    elements = {}
+    for element in note_elements:
+        note_id = get_element_note_id(element)
+        if note_id and note_id not in elements:
+            elements[note_id] = element
+            scheduler.add(previews.get(note_id) or RedNotePreview(
+                note_id=note_id,
+                title="",
+                source_type="dom_list"
+            ))
+
+    scheduled = []
+    while True:
+        preview = scheduler.pop()
+        if preview is None:
+            break
+        scheduled.append((preview.note_id, elements[preview.note_id]))
+        if scheduler.max_per_session is not None and len(scheduled) >= scheduler.max_per_session:
+            break
+    return scheduled
+
 def capture_list_previews(tab):
     """捕获当前页面的笔记预览列表"""
     previews = []
 
     try:
-        # 等待页面加载
-        time.sleep(2)
+        # 等待笔记链接出现
+        wait_for_selector(tab, 'a[href*="/explore/"]', timeout=3)
 
         # 查找笔记链接
         note_links = tab.eles('a[href*="/explore/"]')
 
         for link in note_links[:10]:  # 限制数量
             try:
-                href = link.attr('href')
-                if href and '/explore/' in href:
-                    note_id = href.split('/explore/')[-1].split('?')[0]
-                    if note_id:
-                        preview = RedNotePreview(
-                            note_id=note_id,
-                            title=f"笔记 {note_id[:8]}",  # 后续可通过API获取真实标题
-                            source_type="dom_list",
-                            interaction=RedNoteInteraction(),  # 提供默认互动数据
-                            author_name="",  # 提供默认作者名
-                            author_id=""  # 提供默认作者ID
-                        )
-                        previews.append(preview)
+                note_id = note_id_from_url(link.attr('href'))
+                if note_id:
+                    preview = RedNotePreview(
+                        note_id=note_id,
+                        title=f"笔记 {note_id[:8]}",  # 后续可通过API获取真实标题
+                        source_type="dom_list",
+                        interaction=RedNoteInteraction(),  # 提供默认互动数据
+                        author_name="",  # 提供默认作者名
+                        author_id=""  # 提供默认作者ID
+                    )
+                    previews.append(preview)
             except Exception:
                 continue
 
@@ -304,124 +330,18 @@ def capture_list_previews(tab):
 def capture_note_detail(tab):
     """捕获笔记详情页数据"""
     try:
-        # 等待详情页加载
-        time.sleep(3)
+        # 等待详情内容渲染
+        wait_for_selector(tab, '.note-content', timeout=3)
 
         # 验证是否在详情页
         current_url = tab.url
-        if '/explore/' not in current_url:
+        note_id = note_id_from_url(current_url)
+        if note_id is None:
             print("   ⚠️ 当前不在笔记详情页")
             return None
 
-        note_id = current_url.split('/explore/')[-1].split('?')[0]
-
-        # 创建RedNoteDetail对象
-        detail = RedNoteDetail(
-            note_id=note_id,
-            url=current_url,
-            publish_time=None,
-            last_update_time=None,
-            location=None
-        )
-
-        # 解析标题
-        title_selectors = [
-            '.note-title',
-            '.note-detail-title',
-            'h1',
-            '.title'
-        ]
-        for selector in title_selectors:
-            try:
-                title_ele = tab.ele(selector, timeout=1)
-                if title_ele:
-                    detail.title = title_ele.text.strip()
-                    break
-            except:
-                continue
-
-        # 解析作者
-        author_selectors = [
-            '.author-name',
-            '.user-name',
-            '.username',
-            '.user-info .name'
-        ]
-        for selector in author_selectors:
-            try:
-                author_ele = tab.ele(selector, timeout=1)
-                if author_ele:
-                    detail.author_name = author_ele.text.strip()
-                    break
-            except:
-                continue
-
-        # 解析内容
-        content_selectors = [
-            '.note-content .content',
-            '.desc-text',
-            '.note-text .content-text',
-            '[data-testid="note-content"]'
-        ]
-        for selector in content_selectors:
-            try:
-                content_ele = tab.ele(selector, timeout=1)
-                if content_ele:
-                    detail.content = content_ele.text.strip()
-                    break
-            except:
-                continue
-
-        # 解析媒体URL
-        media_selectors = [
-            '.note-content img',
-            '.image-item img',
-            '.photo img',
-            '.video video'
-        ]
-        media_list = []
-        for selector in media_selectors:
-            try:
-                media_eles = tab.eles(selector, timeout=1)
-                for media_ele in media_eles:
-                    url = media_ele.attr('src')
-                    if url and url not in [m.url for m in media_list]:
-                        media_type = 'video' if 'video' in selector else 'image'
-                        media_list.append(RedNoteMedia(
-                            url=url,
-                            media_type=media_type,
-                            width=None,
-                            height=None
-                        ))
-            except:
-                continue
-
-        if media_list:
-            detail.media_list = media_list
-
-        # 解析互动数据
-        interaction_selectors = {
-            'like_count': ['.like-count', '.liked-count', '[data-testid="like-count"]'],
-            'comment_count': ['.comment-count', '[data-testid="comment-count"]'],
-            'collect_count': ['.collect-count', '[data-testid="collect-count"]']
-        }
-
-        interaction = RedNoteInteraction()
-        for key, selectors in interaction_selectors.items():
-            for selector in selectors:
-                try:
-                    ele = tab.ele(selector, timeout=1)
-                    if ele:
-                        count = ele.text.strip()
-                        try:
-                            setattr(interaction, key, int(count))
-                        except ValueError:
-                            setattr(interaction, key, 0)
-                        break
-                except:
-                    continue
-
-        detail.interaction = interaction
+        # 一次JS调用解析标题、作者、正文、媒体和互动数据
+        detail = extract_detail(tab, note_id, current_url, SELECTORS)
 
         print(f"   📄 标题: {detail.title[:30]}")
         print(f"   👤 作者: {detail.author_name}")
@@ -448,37 +368,38 @@ def exit_note_detail(tab):
             'button[aria-label="关闭"]'
         ]
 
-        for selector in back_selectors:
+        selector, back_btn = SELECTORS.find(
+            tab, 'detail', 'back_button', back_selectors, timeout=1,
+            check=lambda element: element.states.is_displayed
+        )
+        if back_btn:
             try:
-                back_btn = tab.ele(selector, timeout=1)
-                if back_btn and back_btn.states.is_displayed:
-                    print(f"   🔙 点击返回按钮: {selector}")
-                    back_btn.click()
-                    time.sleep(2)
-                    return
+                print(f"   🔙 点击返回按钮: {selector}")
+                back_btn.click()
+                wait_until(lambda: not is_detail_url(tab.url), timeout=3, name="关闭详情")
+                return
             except:
-                continue
+                pass
 
         # 方法2: 使用浏览器后退
         print("   🔙 使用浏览器后退...")
         tab.back()
-        time.sleep(2)
+        wait_until(lambda: not is_detail_url(tab.url), timeout=3, name="后退")
 
         # 方法3: 如果还在详情页，手势滑动返回（模拟移动端）
-        if '/explore/' in tab.url:
+        if is_detail_url(tab.url):
             print("   👆 尝试手势返回...")
             # 在页面左侧向右滑动模拟返回手势
             try:
                 tab.actions.move(100, 300).move(400, 300).release()
-                time.sleep(2)
+                wait_until(lambda: not is_detail_url(tab.url), timeout=2, name="手势返回")
             except:
                 pass
 
         # 方法4: 最后备选：跳转到首页
-        if '/explore/' in tab.url:
+        if is_detail_url(tab.url):
             print("   🏠 跳转到首页...")
             tab.get('https://www.xiaohongshu.com/')
-            time.sleep(2)
 
     except Exception as e:
         print(f"   ⚠️ 退出失败: {str(e)}")
@@ -499,8 +420,8 @@ def save_detail_results(list_previews, detail_previews):
             'total_count': len(list_previews)
         }
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        with open(filename, 'wb') as f:
+            json_codec.dump(data, f, indent=True)
 
         print(f"💾 结果已保存: {filename}")
 
@@ -510,11 +431,8 @@ def save_detail_results(list_previews, detail_previews):
 def parse_comment_response(response_data):
     """解析评论API响应"""
     try:
-        # 如果响应数据是字符串，先解析为字典
-        if isinstance(response_data, str):
-            data = json.loads(response_data)
-        else:
-            data = response_data
+        # 统一成PacketBody，同一数据包只解码一次
+        data = PacketBody.wrap(response_data).json_dict()
 
         # 使用模型解析评论数据
         comments = []
@@ -561,11 +479,8 @@ def parse_comment_response(response_data):
 def parse_feed_response(response_data):
     """解析feed API响应"""
     try:
-        # 如果响应数据是字符串，先解析为字典
-        if isinstance(response_data, str):
-            data = json.loads(response_data)
-        else:
-            data = response_data
+        # 统一成PacketBody，同一数据包只解码一次
+        data = PacketBody.wrap(response_data).json_dict()
 
         # 使用模型解析详情数据
         detail = RedNoteDetail.from_feed_response(data)
@@ -575,5 +490,25 @@ def parse_feed_response(response_data):
         print(f"解析feed响应失败: {str(e)}")
         return None
 
+def test_multi_tab_detail_capture(note_ids, tab_count=3):
+    """多标签页并发捕获笔记详情"""
+    print(f"🔍 多标签页详情捕获: {len(note_ids)} 个笔记, {tab_count} 个标签页")
+    browser = Chromium(9933)
+
+    async def run():
+        async with MultiTabDetailCapture(browser, size=tab_count) as capture:
+            return await capture.capture(note_ids)
+
+    start = time.time()
+    details = asyncio.run(run())
+    print(f"✅ 捕获 {len(details)}/{len(note_ids)} 个详情, 用时 {time.time() - start:.1f}秒")
+
+    if details:
+        save_detail_results([], details)
+
 if __name__ == "__main__":
-    test_note_detail_workflow()
\ No newline at end of file
+    # 用法: python test_note_detail_capture.py [--tabs N note_id ...]
+    if len(sys.argv) > 2 and sys.argv[1] == '--tabs':
+        test_multi_tab_detail_capture(sys.argv[3:], int(sys.argv[2]))
+    else:
+        test_note_detail_workflow()
\ No newline at end of file
@@ -5,14 +5,24 @@
 
 from DrissionPage import Chromium
 import time
-import json
 from datetime import datetime
 import sys
 import os
 
-# 添加数据结构路径
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'app'))
-from models.rednote import RedNote, create_rednotes_from_api_response
+# 添加项目根目录路径
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from app.models.rednote import create_rednote_previews_from_api_response
+from app.utils.packet_body import PacketBody
+from app.utils import json_codec
+from app.utils.id_extract import extract_note_ids
+from app.data.note_cache import NoteCache
+from app.data.interaction_series import InteractionSeriesStore
+from app.core.browser_wait import wait_for_selector
+
+# 跨页面、跨关键词共享的笔记缓存
+note_cache = NoteCache()
+# 互动数据时间序列
+interaction_series = InteractionSeriesStore()
 
 def test_note_list_capture():
     """测试笔记列表抓取"""
@@ -30,7 +40,8 @@ def test_note_list_capture():
         if 'xiaohongshu.com' not in tab.url: # type: ignore
             print("📍 步骤2: 导航到小红书...")
             tab.get('https://www.xiaohongshu.com/')
-            time.sleep(5)
+            loaded = wait_for_selector(tab, 'a[href*="/explore/"]', timeout=8)
+            print(f"   ⏱️ 页面就绪用时 {loaded.waited:.1f}秒")
             print("✅ 已打开小红书")
 
         # 3. 启动网络监听
@@ -97,8 +108,9 @@ def test_note_list_capture():
                                 # 直接处理API响应
                                 if hasattr(packet, 'response') and packet.response:
                                     try:
-                                        if hasattr(packet.response, 'body') and packet.response.body:
-                                            notes = process_search_api_response(packet.response.body)
+                                        body = PacketBody.from_packet(packet)
+                                        if body:
+                                            notes = process_search_api_response(body)
                                             if notes:
                                                 captured_notes.extend(notes)
                                                 print(f"✅ 提取到 {len(notes)} 个笔记")
@@ -181,20 +193,20 @@ def extract_notes_from_request(request):
             return extract_notes_from_search_api(request)
 
         # 尝试解析响应数据
-        response_body = request.response.body
+        response_body = PacketBody.from_packet(request)
 
         if response_body:
             # 尝试JSON解析
-            try:
-                data = json.loads(response_body)
+            data = response_body.json()
+            if data is not None:
                 extracted = parse_json_for_notes(data)
                 notes.extend(extracted)
-            except json.JSONDecodeError:
+            else:
                 # 如果不是JSON，尝试其他解析方式
-                print(f"⚠️ 响应不是JSON格式: {response_body[:200]}...")
+                print(f"⚠️ 响应不是JSON格式: {response_body.text()[:200]}...")
 
         # 从URL中提取笔记ID
-        note_ids = extract_note_ids_from_url(request.url)
+        note_ids = extract_note_ids(request.url)
         for note_id in note_ids:
             notes.append({
                 'note_id': note_id,
@@ -213,13 +225,15 @@ def extract_notes_from_search_api(request):
     notes = []
 
     try:
-        response_body = request.response.body
+        response_body = PacketBody.from_packet(request)
         if not response_body:
             return notes
 
-        print(f"🔍 解析搜索API响应 ({len(response_body)} 字节)")
+        print("🔍 解析搜索API响应")
 
-        data = json.loads(response_body)
+        data = response_body.json()
+        if response_body.error:
+            raise response_body.error
         print(f"📊 API响应结构: {list(data.keys()) if isinstance(data, dict) else type(data)}")
 
         # 小红书搜索API的常见数据结构
@@ -233,7 +247,7 @@ def extract_notes_from_search_api(request):
 
         print(f"✅ 从搜索API提取到 {len(notes)} 个笔记")
 
-    except json.JSONDecodeError as e:
+    except json_codec.DECODE_ERRORS as e:
         print(f"❌ JSON解析失败: {str(e)}")
     except Exception as e:
         print(f"❌ 搜索API解析失败: {str(e)}")
@@ -322,24 +336,6 @@ def parse_note_item(item):
         'raw_data': item
     }
 
-def extract_note_ids_from_url(url):
-    """从URL中提取笔记ID"""
-    import re
-
-    # 常见的笔记ID模式
-    patterns = [
-        r'/explore/([a-f0-9]+)',  # /explore/{note_id}
-        r'/discovery/item/([a-f0-9]+)',  # /discovery/item/{note_id}
-        r'noteId["\s]*[:=]["\s]*([a-f0-9]+)',  # JSON中的noteId
-    ]
-
-    note_ids = []
-    for pattern in patterns:
-        matches = re.findall(pattern, url)
-        note_ids.extend(matches)
-
-    return list(set(note_ids))  # 去重
-
 def save_captured_notes(notes):
     """保存捕获的RedNote信息"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -353,8 +349,8 @@ def save_captured_notes(notes):
             'notes': [note.dict() for note in notes]
         }
 
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        with open(filename, 'wb') as f:
+            json_codec.dump(data, f, indent=True)
 
         print(f"💾 RedNote数据已保存到: {filename}")
 
@@ -408,24 +404,30 @@ def generate_summary_report(notes, filename):
     except Exception as e:
         print(f"❌ 生成报告失败: {str(e)}")
 
+def on_note_delta(note_id, delta):
+    """已知笔记的互动数据变化"""
+    interaction_series.record_delta(note_id, delta)
+    print(f"   🔄 笔记 {note_id} 互动变化: {delta}")
+
 def process_search_api_response(response_body):
     """处理搜索API响应数据 - 使用RedNote模型"""
     try:
-        print(f"🔍 处理API响应 ({len(response_body)} 字节)")
+        # 统一成PacketBody，多个解析器共享同一次解码
+        body = PacketBody.wrap(response_body)
+        print("🔍 处理API响应")
 
-        # DrissionPage会自动将JSON转为dict
-        if isinstance(response_body, dict):
-            data = response_body
-        else:
-            data = json.loads(response_body)
+        data = body.json_dict()
 
-        print(f"📊 响应结构: {list(data.keys()) if isinstance(data, dict) else type(data)}")
+        print(f"📊 响应结构: {list(data.keys())}")
 
-        # 使用RedNote模型解析
-        notes = create_rednotes_from_api_response(data)
+        # 使用RedNote模型解析，重复笔记只上报互动变化量
+        notes = create_rednote_previews_from_api_response(data, note_cache=note_cache, on_delta=on_note_delta)
 
         print(f"✅ 提取到 {len(notes)} 个RedNote")
 
+        for note in notes:
+            interaction_series.record(note.note_id, note.interaction)
+
         # 显示前几个笔记的摘要
         for i, note in enumerate(notes[:3]):
             print(f"\n📝 RedNote {i+1} 摘要:")
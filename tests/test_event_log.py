@@ -0,0 +1,61 @@
+"""
+事件预写日志回归测试
+"""
+
+import os
+import tempfile
+import unittest
+
+from core.event_log import EventLog, truncate_torn_tail
+from core.state_types import Event
+
+
+class TornTailTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, log: EventLog, count: int):
+        for index in range(count):
+            log.append(Event(type="note_found", data={"index": index}))
+        log.flush()
+
+    def test_append_after_torn_write_keeps_every_record(self):
+        log = EventLog(self.directory, batch_size=1)
+        self._write(log, 2)
+        log.close()
+
+        # 模拟崩溃：第3条记录只写了一半
+        segment = log.segments()[-1]
+        with open(segment, 'ab') as f:
+            f.write(b'{"seq":3,"type":"note_fo')
+
+        log = EventLog(self.directory, batch_size=1)
+        self.assertEqual(log.seq, 2)
+        self._write(log, 2)
+
+        self.assertEqual([record["seq"] for record in log.read()], [1, 2, 3, 4])
+        log.close()
+
+    def test_truncate_torn_tail(self):
+        path = os.path.join(self.directory, "segment.ndjson")
+        with open(path, 'wb') as f:
+            f.write(b'{"seq":1}\n{"seq":2')
+        self.assertEqual(truncate_torn_tail(path, chunk_size=4), len(b'{"seq":2'))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'{"seq":1}\n')
+
+        # 完整的文件和只有半行的文件
+        self.assertEqual(truncate_torn_tail(path), 0)
+        with open(path, 'wb') as f:
+            f.write(b'{"seq":1')
+        self.assertEqual(truncate_torn_tail(path), len(b'{"seq":1'))
+        self.assertEqual(os.path.getsize(path), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
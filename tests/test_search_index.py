@@ -0,0 +1,98 @@
+"""
+倒排索引回归测试：删除与段合并交错进行后，检索结果与逐条比对的结果一致
+"""
+
+import random
+import unittest
+from types import SimpleNamespace
+
+from app.data.search_index import SearchIndex, ngram_tokenize
+
+
+WORDS = ['咖啡', '拿铁', '手冲', '豆子', '烘焙', '甜品', '蛋糕', '探店', '上海', '杭州']
+
+
+def make_note(note_id: str, text: str, comments=None):
+    note = SimpleNamespace(note_id=note_id, title='', content=text, author_id='', publish_time=None)
+    if comments is not None:
+        note.comments = comments
+    return note
+
+
+class SearchIndexMergeTest(unittest.TestCase):
+
+    def _expected(self, texts, query, match_all=True):
+        terms = set(ngram_tokenize(query))
+        found = set()
+        for note_id, text in texts.items():
+            tokens = set(ngram_tokenize(text))
+            if (terms <= tokens) if match_all else (terms & tokens):
+                found.add(note_id)
+        return found
+
+    def _found(self, index, query, match_all=True):
+        hits = index.search(query, limit=10 ** 6, kind='note', match_all=match_all)
+        return {hit.note_id for hit in hits}
+
+    def test_remove_and_merge_match_brute_force(self):
+        rng = random.Random(20251118)
+        index = SearchIndex(segment_docs=7, merge_factor=2)
+        texts = {}
+        counter = 0
+
+        for step in range(600):
+            action = rng.random()
+            if action < 0.6 or not texts:
+                counter += 1
+                note_id = f"n{counter}"
+                texts[note_id] = ''.join(rng.sample(WORDS, 3))
+                index.add_note(make_note(note_id, texts[note_id]))
+            elif action < 0.75:
+                # 重新索引已有笔记，旧文档被标记删除
+                note_id = rng.choice(sorted(texts))
+                texts[note_id] = ''.join(rng.sample(WORDS, 3))
+                index.add_note(make_note(note_id, texts[note_id]))
+            elif action < 0.95:
+                note_id = rng.choice(sorted(texts))
+                del texts[note_id]
+                self.assertTrue(index.remove_note(note_id))
+            elif step % 3 == 0:
+                index.merge()
+            else:
+                index.flush()
+
+            if step % 25 == 0:
+                for query in ('咖啡', '拿铁手冲', '蛋糕上海', '探店杭州咖啡'):
+                    self.assertEqual(self._found(index, query), self._expected(texts, query), (step, query))
+                self.assertEqual(self._found(index, '甜品豆子', False), self._expected(texts, '甜品豆子', False))
+
+        index.merge()
+        self.assertEqual(index.segment_count, 1)
+        self.assertEqual(len(index), len(texts))
+        for note_id in texts:
+            self.assertIn(note_id, index)
+        for query in ('咖啡', '烘焙豆子'):
+            self.assertEqual(self._found(index, query), self._expected(texts, query))
+
+    def test_reindexed_note_replaces_comments(self):
+        comment = lambda comment_id, text: SimpleNamespace(
+            comment_id=comment_id, content=text, user_id='u1', create_time=None
+        )
+        index = SearchIndex(segment_docs=2, merge_factor=2)
+        index.add_note(make_note('n1', '咖啡探店', [comment('c1', '拿铁好喝'), comment('c2', '蛋糕一般')]))
+        index.add_note(make_note('n2', '杭州甜品', [comment('c3', '拿铁太甜')]))
+        index.add_note(make_note('n1', '咖啡探店', [comment('c4', '手冲不错')]))
+        index.merge()
+
+        hits = index.search('拿铁', kind='comment')
+        self.assertEqual([hit.key for hit in hits], ['c3'])
+        self.assertEqual([hit.key for hit in index.search('手冲', kind='comment')], ['c4'])
+
+        index.remove_note('n1')
+        index.merge()
+        self.assertEqual(index.search('手冲'), [])
+        self.assertEqual([hit.note_id for hit in index.search('拿铁')], ['n2'])
+
+
+if __name__ == '__main__':
+    unittest.main()